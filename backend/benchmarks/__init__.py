@@ -0,0 +1 @@
+"""Offline benchmarks for backend components (no network or API key required)."""
@@ -0,0 +1,108 @@
+"""
+Offline benchmark for hedged stateless runs.
+Drives the agent (stub model) with a latency distribution that has a long
+tail — most calls take ``--latency`` seconds, a ``--stall-rate`` fraction
+stall for ``--stall`` seconds — and reports p50/p95/p99 run latency and the
+extra upstream calls with hedging off and on.
+
+Usage (from the backend directory):
+    python -m benchmarks.hedging_benchmark [--runs 400 --stall-rate 0.03]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_AGENTS_DISABLE_TRACING", "1")
+
+import agents as openai_agents  # noqa: E402
+
+from portfolio_agents.stub_model import StubModel  # noqa: E402
+from services.hedging import Hedger  # noqa: E402
+
+
+class TailLatencyStubModel(StubModel):
+    """Stub model whose calls occasionally stall far beyond the median."""
+
+    def __init__(self, latency: float, stall: float, stall_rate: float, seed: int):
+        super().__init__(reply_fn=lambda _: "Here are his projects.")
+        self.base_latency = latency
+        self.stall = stall
+        self.stall_rate = stall_rate
+        self.random = random.Random(seed)
+        self.started = 0
+
+    async def get_response(self, *args, **kwargs):
+        self.started += 1
+        delay = self.base_latency * self.random.uniform(0.8, 1.2)
+        if self.random.random() < self.stall_rate:
+            delay = self.stall
+        await asyncio.sleep(delay)
+        return await super().get_response(*args, **kwargs)
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+async def _measure(hedger: Hedger, args: argparse.Namespace) -> dict:
+    model = TailLatencyStubModel(args.latency, args.stall, args.stall_rate, args.seed)
+    agent = openai_agents.Agent(name="HedgeBenchmark", instructions="Be brief.", model=model)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await hedger.run(lambda: openai_agents.Runner.run(agent, f"Show me his projects ({i})"))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(args.runs)))
+    ordered = sorted(latencies)
+    return {
+        "hedging": hedger.enabled,
+        "p50_ms": round(_percentile(ordered, 50), 1),
+        "p95_ms": round(_percentile(ordered, 95), 1),
+        "p99_ms": round(_percentile(ordered, 99), 1),
+        "max_ms": round(ordered[-1], 1),
+        "upstream_calls": model.started,
+        "extra_load_pct": round(100 * (model.started - args.runs) / args.runs, 1),
+        "hedges": hedger.hedges,
+        "hedge_wins": hedger.hedge_wins,
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> list[dict]:
+    results = [await _measure(Hedger(enabled=False), args)]
+    hedger = Hedger(
+        enabled=True,
+        percentile=args.percentile,
+        initial_delay=args.latency * 2,
+        max_extra_ratio=args.max_extra_ratio,
+    )
+    results.append(await _measure(hedger, args))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="typical call latency (s)")
+    parser.add_argument("--stall", type=float, default=1.0, help="latency of a stalled call (s)")
+    parser.add_argument("--stall-rate", type=float, default=0.03)
+    parser.add_argument("--percentile", type=float, default=95.0)
+    parser.add_argument("--max-extra-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    for row in asyncio.run(run_benchmark(args)):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
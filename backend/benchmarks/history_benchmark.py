@@ -0,0 +1,101 @@
+"""
+Offline benchmark for the session history policy.
+Builds conversations of increasing length, then runs one more turn through
+the agent (stub model) and reports prompt tokens and latency with the raw
+stored session versus the bounded history policy.
+
+Usage (from the backend directory):
+    python -m benchmarks.history_benchmark [--turns 10 50 200 1000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_AGENTS_DISABLE_TRACING", "1")
+
+import agents as openai_agents  # noqa: E402
+
+from portfolio_agents.stub_model import StubModel  # noqa: E402
+from services.history_policy import HistoryPolicySession  # noqa: E402
+from services.session_store import SessionStore, make_turn_items  # noqa: E402
+
+QUESTION = "Can you tell me more about the AI agent projects and which tools were used?"
+ANSWER = (
+    "Sure. The Agentic_AI repository collects chatbot and agent projects built with the "
+    "OpenAI Agent SDK, Python and N8n, with notes on MCP experiments. "
+) * 3
+
+
+async def _seed(store: SessionStore, session_id: str, turns: int) -> None:
+    session = store.get_session(session_id)
+    for i in range(turns):
+        await session.add_items(make_turn_items(f"{QUESTION} ({i})", ANSWER))
+
+
+async def _measure(agent: openai_agents.Agent, session, repeats: int) -> dict:
+    latencies = []
+    input_tokens = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        result = await openai_agents.Runner.run(
+            starting_agent=agent, input=f"Follow-up question {i}", session=session
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        input_tokens.append(result.context_wrapper.usage.input_tokens)
+    return {
+        "prompt_tokens": round(sum(input_tokens) / len(input_tokens)),
+        "run_ms": round(sorted(latencies)[len(latencies) // 2], 2),
+    }
+
+
+async def run_benchmark(turn_counts: list[int], repeats: int) -> list[dict]:
+    agent = openai_agents.Agent(
+        name="BenchmarkAssistant", instructions="You are a portfolio assistant.", model=StubModel()
+    )
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SessionStore(os.path.join(tmp, "bench.db"))
+        try:
+            for turns in turn_counts:
+                raw_id, policy_id = f"raw-{turns}", f"policy-{turns}"
+                await _seed(store, raw_id, turns)
+                await _seed(store, policy_id, turns)
+
+                policy_session = HistoryPolicySession(store.get_session(policy_id))
+                # First read folds the backlog into the summary once
+                fold_start = time.perf_counter()
+                await policy_session.get_items()
+                initial_fold_ms = (time.perf_counter() - fold_start) * 1000
+
+                raw = await _measure(agent, store.get_session(raw_id), repeats)
+                bounded = await _measure(agent, policy_session, repeats)
+                results.append({
+                    "turns": turns,
+                    "raw_prompt_tokens": raw["prompt_tokens"],
+                    "raw_run_ms": raw["run_ms"],
+                    "policy_prompt_tokens": bounded["prompt_tokens"],
+                    "policy_run_ms": bounded["run_ms"],
+                    "policy_initial_fold_ms": round(initial_fold_ms, 2),
+                })
+        finally:
+            store.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, nargs="*", default=[10, 50, 200, 1000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    for row in asyncio.run(run_benchmark(args.turns, args.repeats)):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark for upstream connection reuse.
+Serves the stub LLM over HTTPS (self-signed certificate made with ``openssl``)
+and sends bursts of chat completions separated by idle gaps — the traffic
+shape of a low-volume site — through three client setups:
+
+- ``per_request_client``: a new client (and connection) for every call
+- ``openai_default``: one client with the OpenAI SDK's default pool
+  (100 keep-alive connections, 5s keep-alive expiry)
+- ``shared_tuned``: the shared client settings (``HTTP_*`` environment)
+
+and reports TLS handshakes per request and latency percentiles.
+
+Usage (from the backend directory):
+    python -m benchmarks.http_pool_benchmark [--bursts 4 --gap 6 --concurrency 8]
+"""
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+import openai  # noqa: E402
+
+from benchmarks.load_test import BACKEND_DIR, _free_port, percentile  # noqa: E402
+from config import settings  # noqa: E402
+from services.http_client import TLS_HANDSHAKES, InstrumentedTransport  # noqa: E402
+
+
+def _make_certificate(directory: str) -> tuple[str, str]:
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", key, "-out", cert, "-subj", "/CN=127.0.0.1",
+         "-addext", "subjectAltName=IP:127.0.0.1"],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def _wait_for(url: str, verify: ssl.SSLContext, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, verify=verify, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def _http_client(limits: httpx.Limits, verify: ssl.SSLContext) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=InstrumentedTransport(httpx.AsyncHTTPTransport(limits=limits, verify=verify))
+    )
+
+
+async def _run_scenario(name: str, base_url: str, verify: ssl.SSLContext, args) -> dict:
+    if name == "openai_default":
+        limits = openai.DEFAULT_CONNECTION_LIMITS
+    else:
+        limits = httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        )
+    shared = None if name == "per_request_client" else _http_client(limits, verify)
+
+    async def one(i: int) -> float:
+        http_client = shared or _http_client(limits, verify)
+        client = openai.AsyncOpenAI(
+            api_key="stub", base_url=base_url, http_client=http_client, max_retries=0
+        )
+        start = time.perf_counter()
+        await client.chat.completions.create(
+            model="gemini-2.5-flash", messages=[{"role": "user", "content": f"Question {i}"}]
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        if shared is None:
+            await http_client.aclose()
+        return elapsed
+
+    handshakes_before = TLS_HANDSHAKES.value()
+    latencies = []
+    for burst in range(args.bursts):
+        if burst:
+            await asyncio.sleep(args.gap)
+        latencies += await asyncio.gather(*(one(i) for i in range(args.concurrency)))
+    if shared is not None:
+        await shared.aclose()
+
+    requests = len(latencies)
+    handshakes = TLS_HANDSHAKES.value() - handshakes_before
+    ordered = sorted(latencies)
+    return {
+        "scenario": name,
+        "requests": requests,
+        "tls_handshakes": int(handshakes),
+        "handshakes_per_request": round(handshakes / requests, 3),
+        "p50_ms": round(percentile(ordered, 50), 1),
+        "p95_ms": round(percentile(ordered, 95), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bursts", type=int, default=4)
+    parser.add_argument("--gap", type=float, default=6.0, help="idle seconds between bursts")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests per burst")
+    parser.add_argument("--scenarios", nargs="*",
+                        default=["per_request_client", "openai_default", "shared_tuned"])
+    args = parser.parse_args()
+
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = _make_certificate(tmp)
+        verify = ssl.create_default_context(cafile=cert)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.stub_llm_server", "--port", str(port),
+             "--latency", "0.02", "--tokens-per-second", "0",
+             "--ssl-certfile", cert, "--ssl-keyfile", key,
+             # Hosted APIs keep idle connections open far longer than uvicorn's 5s default
+             "--keep-alive", "120"],
+            cwd=BACKEND_DIR,
+        )
+        try:
+            _wait_for(f"https://127.0.0.1:{port}/health", verify)
+            for name in args.scenarios:
+                row = asyncio.run(_run_scenario(name, f"https://127.0.0.1:{port}/v1/", verify, args))
+                print(json.dumps(row))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Offline benchmark for knowledge retrieval.
+Reports BM25 index build time and query latency for the real portfolio
+knowledge and for synthetic corpora scaled up to many more chunks, and the
+prompt tokens of one agent run (stub model) with the whole portfolio in the
+instructions versus only the retrieved chunks.
+
+Usage (from the backend directory):
+    python -m benchmarks.knowledge_benchmark [--scale 1 10 100 1000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_AGENTS_DISABLE_TRACING", "1")
+
+import agents as openai_agents  # noqa: E402
+
+from benchmarks.load_test import percentile  # noqa: E402
+from config import settings  # noqa: E402
+from portfolio_agents.portfolio_agent import INSTRUCTIONS_TEMPLATE  # noqa: E402
+from portfolio_agents.stub_model import StubModel  # noqa: E402
+from services.knowledge import (  # noqa: E402
+    KnowledgeBase,
+    KnowledgeChunk,
+    KnowledgeInstructions,
+    load_knowledge,
+    retrieval_query,
+)
+
+QUESTIONS = [
+    "What is his email address?",
+    "Tell me about his AI agent projects",
+    "Which frontend frameworks does he know?",
+    "Where did he learn programming?",
+    "Show me his web development repositories",
+    "What tools does he use?",
+]
+
+
+def _scaled_corpus(chunks: list[KnowledgeChunk], scale: int) -> list[KnowledgeChunk]:
+    """The real chunks plus synthetic project chunks (scale - 1 per real chunk)."""
+    rng = random.Random(scale)
+    vocabulary = sorted({term for chunk in chunks for term in chunk.index_terms()})
+    extra = [
+        KnowledgeChunk(
+            f"synthetic:{i}",
+            "projects",
+            f"- **Project {i}**: " + " ".join(rng.choices(vocabulary, k=12)),
+            rng.choices(vocabulary, k=3),
+        )
+        for i in range(len(chunks) * (scale - 1))
+    ]
+    return chunks + extra
+
+
+def _index_row(chunks: list[KnowledgeChunk], scale: int, queries: int, top_k: int) -> dict:
+    build_start = time.perf_counter()
+    knowledge = KnowledgeBase(chunks, top_k=top_k)
+    build_ms = (time.perf_counter() - build_start) * 1000
+
+    latencies = []
+    for i in range(queries):
+        start = time.perf_counter()
+        knowledge.retrieve(QUESTIONS[i % len(QUESTIONS)])
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    ordered = sorted(latencies)
+    return {
+        "scale": scale,
+        "chunks": len(chunks),
+        "terms": len(knowledge.index.postings),
+        "build_ms": round(build_ms, 3),
+        "query_p50_us": round(percentile(ordered, 50), 1),
+        "query_p99_us": round(percentile(ordered, 99), 1),
+    }
+
+
+async def _prompt_tokens(knowledge: KnowledgeBase, retrieval_enabled: bool, question: str) -> int:
+    agent = openai_agents.Agent(
+        name="BenchmarkAssistant",
+        instructions=KnowledgeInstructions(INSTRUCTIONS_TEMPLATE, knowledge, retrieval_enabled),
+        model=StubModel(),
+    )
+    with retrieval_query(question):
+        result = await openai_agents.Runner.run(starting_agent=agent, input=question)
+    return result.context_wrapper.usage.input_tokens
+
+
+async def _token_rows(knowledge: KnowledgeBase) -> list[dict]:
+    rows = []
+    for question in QUESTIONS:
+        full = await _prompt_tokens(knowledge, False, question)
+        retrieved = await _prompt_tokens(knowledge, True, question)
+        rows.append({
+            "question": question,
+            "full_prompt_tokens": full,
+            "retrieved_prompt_tokens": retrieved,
+            "reduction": round(1 - retrieved / full, 3),
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=int, nargs="*", default=[1, 10, 100, 1000],
+                        help="corpus size as a multiple of the real knowledge")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=settings.knowledge_top_k)
+    args = parser.parse_args()
+
+    chunks = load_knowledge(settings.knowledge_dir)
+    for scale in args.scale:
+        print(json.dumps(_index_row(_scaled_corpus(chunks, scale), scale, args.queries, args.top_k)))
+    knowledge = KnowledgeBase(chunks, top_k=args.top_k)
+    for row in asyncio.run(_token_rows(knowledge)):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
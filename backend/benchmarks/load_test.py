@@ -0,0 +1,291 @@
+"""
+Async HTTP load generator for the backend API.
+Drives ``/api/assistant/chat``, ``/api/chat`` and ``/health`` with a fixed
+concurrency and reports p50/p95/p99 latency and throughput per endpoint.
+Results can be saved as a JSON baseline and later diffed against a new run.
+
+Usage (from the backend directory):
+    # Fully offline: spawn the stub LLM server and a backend pointed at it
+    python -m benchmarks.load_test --spawn --requests 200 --concurrency 20 \\
+        --save-baseline benchmarks/baseline.json
+
+    # Against a running server, compared with a saved baseline
+    python -m benchmarks.load_test --base-url http://localhost:8000 \\
+        --compare benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+ENDPOINTS = {
+    "chat": ("POST", "/api/assistant/chat"),
+    "compat": ("POST", "/api/chat"),
+    "health": ("GET", "/health"),
+}
+
+REPEATED_QUESTIONS = [
+    "What are his skills?",
+    "Show me his projects",
+    "What is his GitHub?",
+    "How can I contact him?",
+]
+
+# Metrics compared against a baseline (higher is worse for latency, better for throughput)
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_ms: list[float], errors: int, elapsed: float) -> dict:
+    """Latency percentiles and throughput for one endpoint."""
+    values = sorted(latencies_ms)
+    completed = len(values)
+    return {
+        "requests": completed + errors,
+        "errors": errors,
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+        "mean_ms": round(sum(values) / completed, 2) if completed else 0.0,
+        "max_ms": round(values[-1], 2) if values else 0.0,
+        "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def _payload(endpoint: str, index: int, repeat_messages: bool) -> Optional[dict]:
+    if endpoint == "health":
+        return None
+    if repeat_messages:
+        message = REPEATED_QUESTIONS[index % len(REPEATED_QUESTIONS)]
+    else:
+        # Unique questions bypass the response caches and exercise the model path
+        message = f"Question {index}: which of his projects uses Python? ({uuid.uuid4().hex[:6]})"
+    return {"message": message, "session_id": f"load-{uuid.uuid4().hex}"}
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    total_requests: int,
+    concurrency: int,
+    repeat_messages: bool,
+) -> dict:
+    """Fire ``total_requests`` at one endpoint with at most ``concurrency`` in flight."""
+    method, path = ENDPOINTS[endpoint]
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total_requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in counter:
+            payload = _payload(endpoint, index, repeat_messages)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=payload)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_load_test(
+    base_url: str,
+    endpoints: list[str],
+    total_requests: int,
+    concurrency: int,
+    repeat_messages: bool = False,
+    timeout: float = 120.0,
+) -> dict:
+    """Run the load test for each endpoint in turn."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        results = {}
+        for endpoint in endpoints:
+            results[endpoint] = await run_endpoint(
+                client, endpoint, total_requests, concurrency, repeat_messages
+            )
+    return results
+
+
+def compare_to_baseline(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Diff a run against a baseline.
+
+    Returns:
+        Human-readable regressions (latency up or throughput down by more than ``tolerance``)
+    """
+    regressions = []
+    for endpoint, metrics in current.get("results", {}).items():
+        base = baseline.get("results", {}).get(endpoint)
+        if not base:
+            continue
+        for metric in LATENCY_METRICS:
+            if base.get(metric) and metrics[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{endpoint} {metric}: {base[metric]} -> {metrics[metric]} "
+                    f"(+{(metrics[metric] / base[metric] - 1) * 100:.0f}%)"
+                )
+        base_rps = base.get("throughput_rps")
+        if base_rps and metrics["throughput_rps"] < base_rps * (1 - tolerance):
+            regressions.append(
+                f"{endpoint} throughput_rps: {base_rps} -> {metrics['throughput_rps']}"
+            )
+        if metrics["errors"] > base.get("errors", 0):
+            regressions.append(f"{endpoint} errors: {base.get('errors', 0)} -> {metrics['errors']}")
+    return regressions
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+@contextmanager
+def spawn_stack(
+    stub_latency: float, stub_tokens_per_second: float, workers: int = 1
+) -> Iterator[str]:
+    """Start the stub LLM server and a backend pointed at it; yield the backend URL."""
+    stub_port, backend_port = _free_port(), _free_port()
+    processes = []
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.stub_llm_server", "--port", str(stub_port),
+                 "--latency", str(stub_latency),
+                 "--tokens-per-second", str(stub_tokens_per_second)],
+                cwd=BACKEND_DIR,
+            ))
+            _wait_for(f"http://127.0.0.1:{stub_port}/health")
+
+            env = {
+                **os.environ,
+                "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY") or "stub-key",
+                "GEMINI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1/",
+                "SESSION_DB_PATH": os.path.join(tmp, "load-test.db"),
+                "OPENAI_AGENTS_DISABLE_TRACING": "1",
+                # All load comes from one client address
+                "RATE_LIMIT_ENABLED": "false",
+            }
+            if workers > 1:
+                env["PORT"] = str(backend_port)
+                command = [sys.executable, "main.py", "start", "--workers", str(workers)]
+            else:
+                command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(backend_port),
+                           "--log-level", "warning"]
+            processes.append(subprocess.Popen(command, cwd=BACKEND_DIR, env=env))
+            backend_url = f"http://127.0.0.1:{backend_port}"
+            _wait_for(f"{backend_url}/health")
+            yield backend_url
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backend load test")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true",
+                        help="start the stub LLM server and a backend instead of using --base-url")
+    parser.add_argument("--stub-latency", type=float, default=0.2)
+    parser.add_argument("--stub-tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="backend worker processes when spawning (uses `main.py start`)")
+    parser.add_argument("--endpoints", nargs="*", default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--repeat-messages", action="store_true",
+                        help="cycle a few common questions (exercises the caches)")
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--compare", type=Path, help="baseline JSON to diff against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative regression before failing")
+    args = parser.parse_args()
+
+    async def run(base_url: str) -> dict:
+        return await run_load_test(
+            base_url, args.endpoints, args.requests, args.concurrency, args.repeat_messages
+        )
+
+    if args.spawn:
+        with spawn_stack(args.stub_latency, args.stub_tokens_per_second, args.workers) as base_url:
+            results = asyncio.run(run(base_url))
+    else:
+        results = asyncio.run(run(args.base_url))
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "repeat_messages": args.repeat_messages,
+            "spawned": args.spawn,
+            "workers": args.workers if args.spawn else None,
+            "stub_latency": args.stub_latency if args.spawn else None,
+            "stub_tokens_per_second": args.stub_tokens_per_second if args.spawn else None,
+        },
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        regressions = compare_to_baseline(report, json.loads(args.compare.read_text()), args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
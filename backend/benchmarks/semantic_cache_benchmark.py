@@ -0,0 +1,135 @@
+"""
+Offline benchmark for the lexical semantic cache.
+Seeds the cache with one canonical question per intent, then replays a corpus
+of paraphrases and reports hit rate, false hits and lookup latency.
+
+Usage (from the backend directory):
+    python -m benchmarks.semantic_cache_benchmark [--threshold 0.8]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.semantic_cache import SemanticCache  # noqa: E402
+
+NAMESPACE = "benchmark"
+
+# intent -> (seed question, paraphrases that should reuse its answer)
+PARAPHRASE_CORPUS = {
+    "skills": (
+        "What are his skills?",
+        [
+            "What tech does Abdullah know?",
+            "list his skills",
+            "Which technologies does he use?",
+            "what's his tech stack",
+            "Tell me about his skill set",
+            "What languages does Muhammad know?",
+            "skills?",
+        ],
+    ),
+    "projects": (
+        "Show me his projects",
+        [
+            "What projects has he built?",
+            "list his repos",
+            "Which repositories does he have?",
+            "tell me about his projects",
+            "what has Abdullah built",
+        ],
+    ),
+    "email": (
+        "What is his email?",
+        [
+            "what's his email address",
+            "How can I contact him?",
+            "email?",
+            "give me his e-mail",
+        ],
+    ),
+    "github": (
+        "What is his GitHub?",
+        [
+            "github link please",
+            "Share his GitHub profile",
+            "where is his gh",
+        ],
+    ),
+    "education": (
+        "Where did he study?",
+        [
+            "Where did he learn programming?",
+            "what is his education",
+            "where was he studied",
+        ],
+    ),
+}
+
+# Questions that must not be answered from any seeded entry
+NEGATIVE_CORPUS = [
+    "What is his LinkedIn?",
+    "How old is he?",
+    "Can you write me a poem?",
+    "What is the weather today?",
+    "Does he know Rust?",
+]
+
+
+def run_benchmark(threshold: float) -> dict:
+    cache = SemanticCache(threshold=threshold, max_entries=256)
+    for intent, (seed, _) in PARAPHRASE_CORPUS.items():
+        cache.add(seed, intent, NAMESPACE)
+
+    latencies_us: list[float] = []
+    correct = wrong = missed = 0
+    for intent, (_, paraphrases) in PARAPHRASE_CORPUS.items():
+        for question in paraphrases:
+            start = time.perf_counter()
+            match = cache.lookup(question, NAMESPACE)
+            latencies_us.append((time.perf_counter() - start) * 1_000_000)
+            if match is None:
+                missed += 1
+            elif match.response == intent:
+                correct += 1
+            else:
+                wrong += 1
+
+    false_hits = 0
+    for question in NEGATIVE_CORPUS:
+        start = time.perf_counter()
+        match = cache.lookup(question, NAMESPACE)
+        latencies_us.append((time.perf_counter() - start) * 1_000_000)
+        if match is not None:
+            false_hits += 1
+
+    total = correct + wrong + missed
+    latencies_us.sort()
+    return {
+        "threshold": threshold,
+        "paraphrases": total,
+        "hit_rate": round(correct / total, 3),
+        "wrong_intent_hits": wrong,
+        "missed": missed,
+        "negative_queries": len(NEGATIVE_CORPUS),
+        "false_hits": false_hits,
+        "lookup_us_p50": round(statistics.median(latencies_us), 1),
+        "lookup_us_p95": round(latencies_us[int(len(latencies_us) * 0.95) - 1], 1),
+        "lookup_us_max": round(latencies_us[-1], 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threshold", type=float, nargs="*", default=[0.6, 0.7, 0.8, 0.9])
+    args = parser.parse_args()
+    for threshold in args.threshold:
+        print(json.dumps(run_benchmark(threshold)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Offline benchmark for the two-tier session backend.
+Replays concurrent conversations through the history policy and reports the
+session time each request spends on its critical path (read history, append
+the turn, record usage) with the plain SQLite store versus the in-memory hot
+tier, plus the batched write time the tiered backend moves to its flusher.
+
+Usage (from the backend directory):
+    python -m benchmarks.session_tier_benchmark [--sessions 50 --turns 20 --concurrency 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.load_test import percentile  # noqa: E402
+from services.history_policy import HistoryPolicySession  # noqa: E402
+from services.session_backend import SessionBackend  # noqa: E402
+from services.session_store import SessionStore, make_turn_items  # noqa: E402
+from services.tiered_session import TieredSessionBackend, run_flush_loop  # noqa: E402
+
+ANSWER = (
+    "He built a portfolio assistant with FastAPI and the OpenAI Agent SDK, "
+    "plus several agent projects with Python and N8n. "
+) * 2
+
+
+async def _replay(
+    backend: SessionBackend, sessions: int, turns: int, concurrency: int, model_ms: float
+) -> list[float]:
+    """Run every turn of every session; return per-request session time in ms."""
+    semaphore = asyncio.Semaphore(concurrency)
+    timings: list[float] = []
+
+    async def conversation(session_id: str) -> None:
+        session = HistoryPolicySession(backend.get_session(session_id))
+        for turn in range(turns):
+            async with semaphore:
+                start = time.perf_counter()
+                await session.get_items()
+                elapsed = time.perf_counter() - start
+                # Model call (not counted)
+                await asyncio.sleep(model_ms / 1000)
+                start = time.perf_counter()
+                await session.add_items(make_turn_items(f"Question {turn} from {session_id}", ANSWER))
+                await backend.record_usage(session_id, 1, 400, 60)
+                elapsed += time.perf_counter() - start
+                timings.append(elapsed * 1000)
+
+    await asyncio.gather(*(conversation(f"bench-{i}") for i in range(sessions)))
+    return timings
+
+
+def _summary(timings: list[float], wall_seconds: float) -> dict:
+    ordered = sorted(timings)
+    return {
+        "requests": len(ordered),
+        "session_p50_ms": round(percentile(ordered, 50), 3),
+        "session_p95_ms": round(percentile(ordered, 95), 3),
+        "session_p99_ms": round(percentile(ordered, 99), 3),
+        "session_mean_ms": round(sum(ordered) / len(ordered), 3),
+        "wall_s": round(wall_seconds, 2),
+    }
+
+
+async def run_benchmark(
+    sessions: int, turns: int, concurrency: int, model_ms: float, flush_interval: float
+) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SessionStore(os.path.join(tmp, "sqlite.db"))
+        try:
+            start = time.perf_counter()
+            timings = await _replay(store, sessions, turns, concurrency, model_ms)
+            results["sqlite"] = _summary(timings, time.perf_counter() - start)
+        finally:
+            store.close()
+
+        store = SessionStore(os.path.join(tmp, "tiered.db"))
+        try:
+            backend = TieredSessionBackend(store)
+            flusher = asyncio.create_task(run_flush_loop(backend, flush_interval))
+            start = time.perf_counter()
+            timings = await _replay(backend, sessions, turns, concurrency, model_ms)
+            wall_seconds = time.perf_counter() - start
+            flusher.cancel()
+            try:
+                await flusher
+            except asyncio.CancelledError:
+                pass
+            flush_start = time.perf_counter()
+            await backend.aclose()
+            final_flush_ms = (time.perf_counter() - flush_start) * 1000
+            stats = backend.stats()
+            results["tiered"] = {
+                **_summary(timings, wall_seconds),
+                "hot_tier_hit_rate": stats["hit_rate"],
+                "flush_batches": stats["flush_batches"],
+                "flushed_writes": stats["flushed_writes"],
+                "final_flush_ms": round(final_flush_ms, 2),
+            }
+        finally:
+            store.close()
+
+    results["session_p50_reduction"] = round(
+        1 - results["tiered"]["session_p50_ms"] / results["sqlite"]["session_p50_ms"], 3
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--model-ms", type=float, default=5.0, help="simulated model time per turn")
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    args = parser.parse_args()
+    results = asyncio.run(run_benchmark(
+        args.sessions, args.turns, args.concurrency, args.model_ms, args.flush_interval
+    ))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+OpenAI-compatible stub LLM server for offline load testing.
+Serves ``POST /v1/chat/completions`` (streaming and non-streaming) with a
+configurable time-to-first-token and token rate, so the backend can be
+benchmarked end to end by pointing ``GEMINI_BASE_URL`` at it. Upstream faults
+(error responses, hangs) can be injected to exercise the resilience layer.
+
+Usage (from the backend directory):
+    python -m benchmarks.stub_llm_server --port 9100 --latency 0.3 --tokens-per-second 80
+    python -m benchmarks.stub_llm_server --port 9100 --error-rate 0.3 --error-status 503
+    GEMINI_BASE_URL=http://127.0.0.1:9100/v1/ python main.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import AsyncIterator, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_REPLY = (
+    "Muhammad Abdullah Athar is a Python and TypeScript developer who builds AI agents "
+    "with the OpenAI Agent SDK and automations with N8n. His projects are on GitHub."
+)
+
+
+class StubLLMConfig:
+    """Runtime-adjustable behaviour of the stub server."""
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        tokens_per_second: float = 100.0,
+        reply: str = DEFAULT_REPLY,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        hang_rate: float = 0.0,
+    ):
+        """
+        Args:
+            latency: Seconds before the first token
+            tokens_per_second: Generation rate after the first token (0 = instant)
+            reply: Text returned for every completion
+            error_rate: Fraction of requests answered with ``error_status``
+            error_status: HTTP status of injected errors
+            hang_rate: Fraction of requests that never answer (client timeouts)
+        """
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.reply = reply
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.hang_rate = hang_rate
+        self.fail_next = 0
+        self.requests = 0
+        self.failures = 0
+
+    def injected_fault(self) -> Optional[str]:
+        """Decide whether this request fails ("error"), hangs ("hang") or succeeds (None)."""
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            return "error"
+        roll = random.random()
+        if roll < self.error_rate:
+            return "error"
+        if roll < self.error_rate + self.hang_rate:
+            return "hang"
+        return None
+
+
+def _prompt_tokens(messages: list) -> int:
+    return max(1, len(json.dumps(messages)) // 4)
+
+
+def _tokens(text: str) -> list[str]:
+    words = text.split(" ")
+    return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+
+def create_app(config: Optional[StubLLMConfig] = None) -> FastAPI:
+    """Build the stub server application."""
+    config = config or StubLLMConfig()
+    app = FastAPI(title="Stub LLM server")
+    app.state.config = config
+
+    async def completions(request: Request):
+        body = await request.json()
+        config.requests += 1
+        fault = config.injected_fault()
+        if fault == "hang":
+            config.failures += 1
+            await asyncio.sleep(3600)
+        if fault == "error":
+            config.failures += 1
+            return JSONResponse(
+                {"error": {"message": "Injected stub failure", "code": config.error_status}},
+                status_code=config.error_status,
+            )
+        model = body.get("model", "stub")
+        messages = body.get("messages", [])
+        tokens = _tokens(config.reply)
+        prompt_tokens = _prompt_tokens(messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        token_delay = 1.0 / config.tokens_per_second if config.tokens_per_second else 0.0
+
+        if not body.get("stream"):
+            await asyncio.sleep(config.latency + token_delay * len(tokens))
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": config.reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        async def chunks() -> AsyncIterator[str]:
+            def chunk(delta: dict, finish_reason: Optional[str] = None, **extra) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                    **extra,
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            await asyncio.sleep(config.latency)
+            yield chunk({"role": "assistant", "content": ""})
+            for token in tokens:
+                yield chunk({"content": token})
+                if token_delay:
+                    await asyncio.sleep(token_delay)
+            yield chunk({}, finish_reason="stop", usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    app.add_api_route("/v1/chat/completions", completions, methods=["POST"])
+    app.add_api_route("/chat/completions", completions, methods=["POST"])
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "requests": config.requests, "failures": config.failures}
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests hanging")
+    parser.add_argument("--ssl-certfile", help="serve HTTPS with this certificate")
+    parser.add_argument("--ssl-keyfile")
+    parser.add_argument("--keep-alive", type=int, default=5, help="idle connection timeout (s)")
+    args = parser.parse_args()
+
+    config = StubLLMConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        hang_rate=args.hang_rate,
+    )
+    uvicorn.run(
+        create_app(config),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+        ssl_certfile=args.ssl_certfile,
+        ssl_keyfile=args.ssl_keyfile,
+        timeout_keep_alive=args.keep_alive,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,28 @@ from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
 
 
+def _parse_model_pricing(value: str) -> dict[str, tuple[float, float]]:
+    """Parse ``model=input/output`` pairs (USD per million tokens)."""
+    pricing = {}
+    for entry in value.split(","):
+        if "=" not in entry:
+            continue
+        model, prices = entry.split("=", 1)
+        input_price, _, output_price = prices.partition("/")
+        pricing[model.strip()] = (float(input_price), float(output_price or input_price))
+    return pricing
+
+
+def _parse_model_endpoints(value: str, default_base_url: str) -> list[tuple[str, str]]:
+    """Parse ``model[@base_url]`` entries into ordered ``(model, base_url)`` pairs."""
+    endpoints = []
+    for entry in value.split(","):
+        model, _, base_url = entry.strip().partition("@")
+        if model:
+            endpoints.append((model.strip(), base_url.strip() or default_base_url))
+    return endpoints
+
+
 class Settings:
     """Application settings loaded from environment variables."""
     
@@ -39,15 +61,172 @@ class Settings:
                 "http://127.0.0.1:3000",
             ]
         
-        # AI Model Settings
+        # AI Model Settings ("stub" selects the offline stub model)
         self.default_model: str = os.getenv("DEFAULT_MODEL", "gemini-2.5-flash")
-        self.gemini_base_url: str = "https://generativelanguage.googleapis.com/v1beta/openai/"
+        self.gemini_base_url: str = os.getenv(
+            "GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"
+        )
+        # Ordered fallback list as "model[@base_url],..." (first entry is preferred);
+        # requests go to the healthiest, fastest model and fail over down the list
+        self.model_endpoints: list[tuple[str, str]] = _parse_model_endpoints(
+            os.getenv("MODELS", self.default_model), self.gemini_base_url
+        ) or [(self.default_model, self.gemini_base_url)]
+        self.default_model = self.model_endpoints[0][0]
+        # A model is skipped while its latency EWMA exceeds the best one by this factor
+        self.routing_latency_tolerance: float = float(os.getenv("ROUTING_LATENCY_TOLERANCE", "1.5"))
+        # ... or while its recent error rate (EWMA) is at least this high
+        self.routing_max_error_rate: float = float(os.getenv("ROUTING_MAX_ERROR_RATE", "0.5"))
+        # Stats older than this are forgotten so a skipped model gets probed again
+        self.routing_stale_seconds: float = float(os.getenv("ROUTING_STALE_SECONDS", "30"))
+        
+        # Portfolio Knowledge (structured files indexed at startup; BM25 retrieval)
+        self.knowledge_dir: str = os.getenv(
+            "KNOWLEDGE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge")
+        )
+        # Put only the top-k relevant chunks into the prompt (false = the whole portfolio)
+        self.knowledge_retrieval_enabled: bool = os.getenv("KNOWLEDGE_RETRIEVAL_ENABLED", "true").lower() == "true"
+        self.knowledge_top_k: int = int(os.getenv("KNOWLEDGE_TOP_K", "4"))
+        
+        # Fast Path (templated answers for common questions, no model call)
+        self.fast_path_enabled: bool = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+        # Intent confidence (0-1) needed to answer without the agent
+        self.fast_path_threshold: float = float(os.getenv("FAST_PATH_THRESHOLD", "0.7"))
+        # Longer questions (in meaningful terms) always go to the agent
+        self.fast_path_max_terms: int = int(os.getenv("FAST_PATH_MAX_TERMS", "4"))
+        
+        # Upstream Resilience (timeouts, retries with jitter, circuit breaker)
+        self.upstream_timeout_seconds: float = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", "20"))
+        self.request_deadline_seconds: float = float(os.getenv("REQUEST_DEADLINE_SECONDS", "45"))
+        self.upstream_max_attempts: int = int(os.getenv("UPSTREAM_MAX_ATTEMPTS", "3"))
+        self.upstream_backoff_base_seconds: float = float(os.getenv("UPSTREAM_BACKOFF_BASE_SECONDS", "0.25"))
+        self.upstream_backoff_max_seconds: float = float(os.getenv("UPSTREAM_BACKOFF_MAX_SECONDS", "4"))
+        self.circuit_failure_threshold: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+        self.circuit_reset_seconds: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+        
+        # Shared Upstream HTTP Client (connection pool used by every model endpoint)
+        self.http_max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "64"))
+        self.http_max_keepalive_connections: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "64"))
+        self.http_keepalive_expiry_seconds: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+        self.http_connect_timeout_seconds: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+        # Only takes effect when the optional "h2" package is installed
+        self.http2_enabled: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
         
         # Context7 Settings (if using Context7 MCP)
         self.context7_enabled: bool = os.getenv("CONTEXT7_ENABLED", "false").lower() == "true"
         
         # Session Settings
+        # Where history lives: "sqlite" (one host), "memory" (one worker), "kv" (shared server)
+        # or "tiered" (in-memory hot tier with write-behind to SQLite, one worker)
+        self.session_backend: str = os.getenv("SESSION_BACKEND", "sqlite").lower()
         self.session_db_path: str = os.getenv("SESSION_DB_PATH", "conversations.db")
+        self.session_pool_size: int = int(os.getenv("SESSION_POOL_SIZE", "4"))
+        self.session_cache_size: int = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+        self.session_memory_max_sessions: int = int(os.getenv("SESSION_MEMORY_MAX_SESSIONS", "10000"))
+        # Redis URL for the kv backend ("local" = in-process stand-in, single worker)
+        self.session_kv_url: str = os.getenv("SESSION_KV_URL", "redis://localhost:6379/0")
+        self.session_kv_prefix: str = os.getenv("SESSION_KV_PREFIX", "portfolio")
+        # Tiered backend: hot tier size, how often queued writes reach SQLite, the
+        # queue length at which writers flush inline, and the failed flushes after
+        # which a change is dropped
+        self.session_hot_max_bytes: int = int(os.getenv("SESSION_HOT_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.session_flush_interval_seconds: float = float(os.getenv("SESSION_FLUSH_INTERVAL_SECONDS", "0.5"))
+        self.session_flush_max_pending: int = int(os.getenv("SESSION_FLUSH_MAX_PENDING", "1000"))
+        self.session_flush_max_attempts: int = int(os.getenv("SESSION_FLUSH_MAX_ATTEMPTS", "5"))
+        
+        # Worker processes started by "python main.py start"
+        self.workers: int = int(os.getenv("WORKERS", "1"))
+        
+        # Startup Warm-up (readiness is reported once it has finished)
+        self.warmup_enabled: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+        # Canned questions answered at startup to fill the response cache, "|"-separated
+        self.warmup_queries: list[str] = [
+            query.strip() for query in os.getenv("WARMUP_QUERIES", "").split("|") if query.strip()
+        ]
+        # Connections opened to each model endpoint ahead of the first request
+        self.warmup_connections: int = int(os.getenv("WARMUP_CONNECTIONS", "2"))
+        self.warmup_timeout_seconds: float = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "30"))
+        
+        # Session Maintenance (TTL expiry, WAL checkpoint, incremental vacuum)
+        self.maintenance_enabled: bool = os.getenv("MAINTENANCE_ENABLED", "true").lower() == "true"
+        self.maintenance_interval_seconds: float = float(os.getenv("MAINTENANCE_INTERVAL_SECONDS", "3600"))
+        self.session_ttl_hours: float = float(os.getenv("SESSION_TTL_HOURS", "720"))
+        self.vacuum_pages_per_run: int = int(os.getenv("VACUUM_PAGES_PER_RUN", "0"))
+        
+        # Per-session locks (serialize turns within one conversation)
+        self.session_lock_max: int = int(os.getenv("SESSION_LOCK_MAX", "10000"))
+        self.session_lock_idle_seconds: float = float(os.getenv("SESSION_LOCK_IDLE_SECONDS", "300"))
+        
+        # Anonymous clients: "issue" a new session id (body + cookie) or run "stateless"
+        self.anonymous_session_mode: str = os.getenv("ANONYMOUS_SESSION_MODE", "issue").lower()
+        self.session_cookie_name: str = os.getenv("SESSION_COOKIE_NAME", "portfolio_session_id")
+        self.session_cookie_max_age: int = int(os.getenv("SESSION_COOKIE_MAX_AGE", str(30 * 24 * 3600)))
+        
+        # Legacy shared sessions trimmed at startup (all anonymous traffic used to share these)
+        legacy_sessions_str = os.getenv("LEGACY_SHARED_SESSIONS", "default_session,chainlit_session")
+        self.legacy_shared_sessions: list[str] = [s.strip() for s in legacy_sessions_str.split(",") if s.strip()]
+        self.legacy_session_keep_turns: int = int(os.getenv("LEGACY_SESSION_KEEP_TURNS", "0"))
+        
+        # History Policy (bounded replay of session history into each run)
+        self.history_policy_enabled: bool = os.getenv("HISTORY_POLICY_ENABLED", "true").lower() == "true"
+        self.history_max_turns: int = int(os.getenv("HISTORY_MAX_TURNS", "6"))
+        self.history_token_budget: int = int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+        self.history_summary_max_tokens: int = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "400"))
+        
+        # Client-held history: requests carrying conversation_history run without a stored session
+        self.client_history_enabled: bool = os.getenv("CLIENT_HISTORY_ENABLED", "true").lower() == "true"
+        # Larger histories are rejected (422); accepted ones are trimmed by the history policy
+        self.client_history_max_messages: int = int(os.getenv("CLIENT_HISTORY_MAX_MESSAGES", "50"))
+        self.client_history_max_message_chars: int = int(os.getenv("CLIENT_HISTORY_MAX_MESSAGE_CHARS", "4000"))
+        
+        # Response Cache Settings (exact-match cache for first-turn questions)
+        self.response_cache_enabled: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+        self.response_cache_ttl_seconds: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+        self.response_cache_max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+        
+        # Semantic Cache Settings (local TF-IDF match for paraphrased questions)
+        self.semantic_cache_enabled: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+        self.semantic_cache_threshold: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.7"))
+        self.semantic_cache_max_entries: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "256"))
+        
+        # Request Coalescing (share one upstream call between identical in-flight questions)
+        self.single_flight_enabled: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+        
+        # Hedged Requests (opt-in: re-issue slow stateless runs, first to finish wins)
+        self.hedging_enabled: bool = os.getenv("HEDGING_ENABLED", "false").lower() == "true"
+        self.hedge_percentile: float = float(os.getenv("HEDGE_PERCENTILE", "95"))
+        self.hedge_initial_delay_seconds: float = float(os.getenv("HEDGE_INITIAL_DELAY_SECONDS", "2"))
+        self.hedge_min_delay_seconds: float = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "0.05"))
+        # Hedges allowed per stateless run, i.e. the cap on extra upstream load
+        self.hedge_max_extra_ratio: float = float(os.getenv("HEDGE_MAX_EXTRA_RATIO", "0.1"))
+        
+        # Admission Control (caps concurrent agent runs per worker)
+        self.admission_enabled: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+        self.admission_max_in_flight: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "16"))
+        self.admission_max_queue: int = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+        self.admission_queue_timeout_seconds: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+        
+        # Rate Limiting (token buckets per client IP and per session id)
+        self.rate_limit_enabled: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.rate_limit_ip_per_minute: float = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "30"))
+        self.rate_limit_ip_burst: float = float(os.getenv("RATE_LIMIT_IP_BURST", "10"))
+        self.rate_limit_session_per_minute: float = float(os.getenv("RATE_LIMIT_SESSION_PER_MINUTE", "20"))
+        self.rate_limit_session_burst: float = float(os.getenv("RATE_LIMIT_SESSION_BURST", "5"))
+        # "memory" (per process) or "sqlite" (shared by all workers on the host)
+        self.rate_limit_backend: str = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+        self.rate_limit_db_path: str = os.getenv("RATE_LIMIT_DB_PATH", "rate_limits.db")
+        self.rate_limit_max_keys: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+        # Take the client IP from X-Forwarded-For (only behind trusted proxies): the
+        # address added by the outermost of RATE_LIMIT_TRUSTED_PROXIES appending proxies
+        self.rate_limit_trust_forwarded: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+        self.rate_limit_trusted_proxies: int = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "1"))
+        
+        # Token Usage Accounting (per-session budget: 0 = unlimited)
+        self.session_token_budget: int = int(os.getenv("SESSION_TOKEN_BUDGET", "0"))
+        # USD per million tokens as "model=input/output,...", used for cost estimates
+        self.model_pricing: dict[str, tuple[float, float]] = _parse_model_pricing(
+            os.getenv("MODEL_PRICING", "gemini-2.5-flash=0.30/2.50")
+        )
+        self.admin_token: str = os.getenv("ADMIN_TOKEN", "")
 
 
 # Global settings instance
@@ -61,8 +240,14 @@ def validate_settings() -> tuple[bool, Optional[str]]:
     Returns:
         Tuple of (is_valid, error_message)
     """
-    if not settings.gemini_api_key:
+    needs_key = any(model != "stub" for model, _ in settings.model_endpoints)
+    if not settings.gemini_api_key and needs_key:
         return False, "GEMINI_API_KEY environment variable is required"
     
+    if settings.session_backend not in ("sqlite", "memory", "kv", "tiered"):
+        return False, (
+            f"SESSION_BACKEND must be sqlite, memory, kv or tiered (got '{settings.session_backend}')"
+        )
+    
     return True, None
 
@@ -2,15 +2,25 @@
 Main application entry point for Portfolio AI Assistant backend.
 Provides both FastAPI REST API and optional Chainlit interface.
 """
+import asyncio
+import contextlib
 import logging
 import sys
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from config import settings, validate_settings
 from routes import assistant_router
+from services.rate_limit import RateLimitMiddleware, close_rate_limiter
+from services.metrics import (
+    SERIALIZATION_DURATION,
+    RequestMetricsMiddleware,
+    metrics_registry,
+    record_error,
+    render_metrics,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -42,20 +52,115 @@ async def lifespan(app: FastAPI):
     
     logger.info("Configuration validated successfully")
     logger.info(f"Using model: {settings.default_model}")
+    if len(settings.model_endpoints) > 1:
+        logger.info(f"Fallback models: {', '.join(m for m, _ in settings.model_endpoints[1:])}")
+    
+    # Shared connection pool for upstream model calls (used by the agent's clients)
+    from services.http_client import get_http_client, close_http_client
+    get_http_client()
+    
+    # Index portfolio knowledge and build the fast-path templates once, before any run needs them
+    from services.fast_path import get_fast_path
+    from services.knowledge import get_knowledge_base
+    get_knowledge_base()
+    get_fast_path()
     
     # Initialize agent (lazy loading, but pre-initialize for faster first request)
     try:
-        from portfolio_agents import get_portfolio_agent
+        from portfolio_agents import get_portfolio_agent, reset_portfolio_agent
         agent = get_portfolio_agent()
         logger.info("Portfolio agent initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize agent: {e}", exc_info=True)
         sys.exit(1)
     
+    # Open the session backend once per process
+    from services.session_backend import SQLITE_BACKENDS, get_session_backend, close_session_backend
+    session_backend = get_session_backend()
+    if settings.session_backend in SQLITE_BACKENDS:
+        from services.session_migrations import trim_legacy_shared_sessions
+        trim_legacy_shared_sessions()
+    
+    # Write-behind for the tiered backend; the final flush happens when the backend closes
+    flush_task = None
+    if settings.session_backend == "tiered":
+        from services.tiered_session import run_flush_loop
+        flush_task = asyncio.create_task(
+            run_flush_loop(session_backend, settings.session_flush_interval_seconds)
+        )
+    
+    # Warm the request path in the background; /ready reports when it is done
+    from routes.assistant import prime_reply
+    from services.warmup import get_warmup
+    warmup = get_warmup()
+    warmup.reset()
+    warmup_task = asyncio.create_task(warmup.run(answer=prime_reply))
+    
+    # Background maintenance for the session database
+    maintenance_task = None
+    if settings.maintenance_enabled and settings.session_backend in SQLITE_BACKENDS:
+        from services.maintenance import get_session_maintenance, run_maintenance_loop
+        maintenance_task = asyncio.create_task(
+            run_maintenance_loop(get_session_maintenance(), settings.maintenance_interval_seconds)
+        )
+    
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
+    warmup_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await warmup_task
+    if maintenance_task is not None:
+        maintenance_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await maintenance_task
+    if flush_task is not None:
+        flush_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await flush_task
+    await close_session_backend()
+    close_rate_limiter()
+    await close_http_client()
+    reset_portfolio_agent()
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSON response that records body rendering time."""
+
+    def render(self, content) -> bytes:
+        with SERIALIZATION_DURATION.time():
+            return super().render(content)
+
+
+def _cache_metrics():
+    """Scrape-time cache counters, read from the caches' own statistics."""
+    from services.response_cache import get_response_cache
+    from services.semantic_cache import get_semantic_cache
+    from services.single_flight import get_single_flight
+    
+    exact = get_response_cache().stats()
+    semantic = get_semantic_cache().stats()
+    single_flight = get_single_flight().stats()
+    yield (
+        "portfolio_cache_hits_total", "counter", "Replies served without a model call.",
+        [
+            ("portfolio_cache_hits_total", {"cache": "exact"}, exact["hits"]),
+            ("portfolio_cache_hits_total", {"cache": "semantic"}, semantic["hits"]),
+            ("portfolio_cache_hits_total", {"cache": "single_flight"},
+             single_flight["coalesced_requests"]),
+        ],
+    )
+    yield (
+        "portfolio_cache_misses_total", "counter", "Cache lookups that found no reply.",
+        [
+            ("portfolio_cache_misses_total", {"cache": "exact"}, exact["misses"]),
+            ("portfolio_cache_misses_total", {"cache": "semantic"}, semantic["misses"]),
+        ],
+    )
+
+
+metrics_registry.register_collector(_cache_metrics)
 
 
 # Create FastAPI application
@@ -66,6 +171,20 @@ app = FastAPI(
     lifespan=lifespan,
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=TimedJSONResponse,
+)
+
+# Per-client token-bucket limits on the chat endpoints
+# (inside CORS, so 429 responses carry the CORS headers cross-origin clients need)
+app.add_middleware(
+    RateLimitMiddleware,
+    paths=[
+        "/api/chat",
+        "/api/assistant/chat",
+        "/api/assistant/chat/stream",
+        "/api/assistant/chat/sync",
+    ],
+    trusted_proxies=settings.rate_limit_trusted_proxies if settings.rate_limit_trust_forwarded else 0,
 )
 
 # Configure CORS
@@ -77,6 +196,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request latency (outermost, so it covers the whole request)
+app.add_middleware(RequestMetricsMiddleware)
+
 # Include routers
 app.include_router(assistant_router)
 from routes import compat_router
@@ -92,23 +214,47 @@ async def root():
         "status": "operational",
         "docs": "/docs",
         "health": "/api/assistant/health",
+        "ready": "/ready",
     }
 
 
 @app.get("/health")
 async def health():
-    """Health check endpoint."""
+    """Health check endpoint (reports "degraded" while no model has a closed circuit breaker)."""
+    from services.resilience import upstream_health
+    
+    upstream = upstream_health()
     return {
-        "status": "healthy",
+        "status": "healthy" if upstream["state"] == "closed" else "degraded",
         "service": settings.app_name,
         "version": settings.app_version,
+        "upstream": upstream,
     }
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until the startup warm-up has finished (liveness is /health)."""
+    from services.warmup import get_warmup
+    
+    warmup = get_warmup()
+    return JSONResponse(
+        status_code=200 if warmup.ready else 503,
+        content={"ready": warmup.ready, "warmup": warmup.stats()},
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics in the text exposition format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 # Error handlers
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
+    record_error(exc)
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
     return JSONResponse(
         status_code=500,
@@ -138,14 +284,22 @@ try:
         """Chainlit message handler."""
         import agents as openai_agents
         from portfolio_agents import get_portfolio_agent, get_agent_session
+        from services.knowledge import retrieval_query
+        from services.model_router import track_served_model
+        from services.usage import get_usage_tracker
         
         agent = get_portfolio_agent()
-        session = get_agent_session("chainlit_session")
+        # One session per Chainlit conversation, not one shared by every user
+        session = get_agent_session(f"chainlit-{cl.user_session.get('id')}")
         
-        result = await openai_agents.Runner.run(
-            starting_agent=agent,
-            input=message.content,
-            session=session,
+        with track_served_model() as served, retrieval_query(message.content):
+            result = await openai_agents.Runner.run(
+                starting_agent=agent,
+                input=message.content,
+                session=session,
+            )
+        await get_usage_tracker().record(
+            served.name, result.context_wrapper.usage, session.session_id
         )
         
         cl.Message(content=result.final_output).send()
@@ -156,14 +310,91 @@ except ImportError:
     logger.debug("Chainlit not available, skipping Chainlit integration")
 
 
-if __name__ == "__main__":
+def check_worker_settings(workers: int) -> tuple[list[str], list[str]]:
+    """
+    Check that the settings are safe to serve from ``workers`` processes.
+    
+    Returns:
+        Tuple of (errors that must stop the start, warnings)
+    """
+    errors: list[str] = []
+    warnings: list[str] = []
+    if workers <= 1:
+        return errors, warnings
+    if settings.session_backend in ("memory", "tiered") or (
+        settings.session_backend == "kv" and settings.session_kv_url == "local"
+    ):
+        errors.append(
+            f"SESSION_BACKEND={settings.session_backend} keeps sessions inside one process; "
+            "use sqlite (one host) or kv with a shared server for several workers"
+        )
+    if settings.rate_limit_enabled and settings.rate_limit_backend == "memory":
+        warnings.append(
+            f"RATE_LIMIT_BACKEND=memory limits each worker separately "
+            f"(up to {workers}x the configured rate); use sqlite to share the limits"
+        )
+    if settings.debug:
+        warnings.append("DEBUG auto-reload is not available with several workers; reload is off")
+    return errors, warnings
+
+
+def start(workers: int) -> None:
+    """
+    Serve the API from ``workers`` uvicorn worker processes.
+    
+    Refuses settings that would split state between workers and prepares
+    the SQLite session database once, before the workers start, so they do
+    not race on schema creation and legacy trimming.
+    """
     import uvicorn
+    from services.session_backend import SQLITE_BACKENDS
+    
+    errors, warnings = check_worker_settings(workers)
+    for warning in warnings:
+        logger.warning(warning)
+    if errors:
+        for error in errors:
+            logger.error(error)
+        sys.exit(1)
     
-    logger.info(f"Starting server on {settings.host}:{settings.port}")
+    if settings.session_backend in SQLITE_BACKENDS:
+        from services.session_migrations import trim_legacy_shared_sessions
+        from services.session_store import close_session_store, get_session_store
+        get_session_store()
+        trim_legacy_shared_sessions()
+        close_session_store()
+    
+    logger.info(f"Starting {workers} workers on {settings.host}:{settings.port}")
     uvicorn.run(
         "main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug,
+        workers=workers,
+        reload=settings.debug and workers <= 1,
         log_level="info",
     )
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description="Run the Portfolio AI Assistant backend")
+    parser.add_argument(
+        "mode", nargs="?", choices=("dev", "start"), default="dev",
+        help="dev: one process (auto-reload with DEBUG); start: WORKERS worker processes",
+    )
+    parser.add_argument("--workers", type=int, default=settings.workers)
+    args = parser.parse_args()
+    
+    if args.mode == "start":
+        start(args.workers)
+    else:
+        logger.info(f"Starting server on {settings.host}:{settings.port}")
+        uvicorn.run(
+            "main:app",
+            host=settings.host,
+            port=settings.port,
+            reload=settings.debug,
+            log_level="info",
+        )
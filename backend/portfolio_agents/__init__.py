@@ -1,5 +1,5 @@
 """Portfolio agents package for backend application."""
-from .portfolio_agent import get_portfolio_agent, get_agent_session
+from .portfolio_agent import get_portfolio_agent, get_agent_session, reset_portfolio_agent
 
-__all__ = ["get_portfolio_agent", "get_agent_session"]
+__all__ = ["get_portfolio_agent", "get_agent_session", "reset_portfolio_agent"]
 
@@ -11,62 +11,26 @@ from pathlib import Path
 # Import from OpenAI Agent SDK
 # Now safe to import since we renamed our local module to portfolio_agents
 import agents as openai_agents
-from agents.memory import Session, SQLiteSession
+from agents.memory import Session
+from agents.models.interface import Model
 
 from config import settings
+from services.history_policy import apply_history_policy
+from services.http_client import get_http_client
+from services.knowledge import KnowledgeInstructions, get_knowledge_base
+from services.model_router import ModelRoute, RoutedModel
+from services.resilience import ResilientModel, default_retry_policy, get_circuit_breaker
+from services.session_backend import get_session_backend
+from .stub_model import StubModel, STUB_MODEL_NAME
 
 logger = logging.getLogger(__name__)
 
 
-# Portfolio owner information
-PORTFOLIO_INFO = """
-# Portfolio Owner Information
-
-## Personal Details
-- **Name**: Muhammad Abdullah Athar
-- **Age**: 17
-- **Email**: muhammadabdullah51700@gmail.com
-- **LinkedIn**: www.linkedin.com/in/muhammad-abdullah-athar
-- **GitHub**: https://github.com/AbdullahMalik17
-
-## Skills & Technologies
-- **Frontend**: HTML, CSS, JavaScript, TypeScript
-- **Backend**: Python
-- **Tools**: N8n, OpenAI Agent SDK, Git & GitHub
-- **Learning**: MCP (Model Context Protocol)
-- **Education**: Learned through Panaversity.org
-
-## Projects & Repositories
-1. **Main Repository**: [AbdullahMalik17](https://github.com/AbdullahMalik17/AbdullahMalik17)
-2. **Web Development Projects**: [Projects-of-html](https://github.com/AbdullahMalik17/Projects-of-html)
-3. **AI Agents & Chatbots**: [Agentic_AI](https://github.com/AbdullahMalik17/Agentic_AI/tree/main/_Projects)
-"""
-
-
-def create_portfolio_agent() -> openai_agents.Agent:
-    """
-    Create and configure the portfolio assistant agent.
-    
-    Returns:
-        Configured Agent instance
-    """
-    # Initialize OpenAI client with Gemini API
-    client = openai_agents.AsyncOpenAI(
-        api_key=settings.gemini_api_key,
-        base_url=settings.gemini_base_url,
-    )
-    
-    # Configure the LLM model
-    model = openai_agents.OpenAIChatCompletionsModel(
-        model=settings.default_model,
-        openai_client=client,
-    )
-    
-    # Agent instructions
-    instructions = f"""You are a professional portfolio assistant agent. Your role is to help visitors 
+# Agent instructions; {knowledge} is filled per run with the relevant portfolio facts
+INSTRUCTIONS_TEMPLATE = """You are a professional portfolio assistant agent. Your role is to help visitors 
 learn about the portfolio owner in a friendly, concise, and professional manner.
 
-{PORTFOLIO_INFO}
+{knowledge}
 
 ## Your Responsibilities:
 1. Provide accurate information about the portfolio owner
@@ -82,6 +46,81 @@ learn about the portfolio owner in a friendly, concise, and professional manner.
 - Encourage visitors to explore the portfolio
 - Maintain a professional yet approachable tone
 """
+
+
+def _create_upstream_model(
+    model_name: str,
+    base_url: str,
+    clients: dict[str, openai_agents.AsyncOpenAI],
+) -> Model:
+    """Build the raw model for one configured endpoint (clients are shared per base URL)."""
+    if model_name == STUB_MODEL_NAME:
+        # Offline stub model (no network, no API key) for local testing
+        return StubModel()
+    
+    # OpenAI-compatible client for the Gemini API on the shared connection pool
+    # (retries are handled by the resilience layer, not the client)
+    if base_url not in clients:
+        clients[base_url] = openai_agents.AsyncOpenAI(
+            api_key=settings.gemini_api_key,
+            base_url=base_url,
+            timeout=settings.upstream_timeout_seconds,
+            max_retries=0,
+            http_client=get_http_client(),
+        )
+    return openai_agents.OpenAIChatCompletionsModel(
+        model=model_name,
+        openai_client=clients[base_url],
+    )
+
+
+def create_routed_model() -> RoutedModel:
+    """
+    Build the model used by the agent from ``settings.model_endpoints``.
+    
+    Every endpoint gets its own resilience wrapper (deadlines, retries with
+    backoff, and a per-model circuit breaker); the router picks among them
+    per call and falls back down the configured list on failure.
+    
+    Returns:
+        RoutedModel over the configured endpoints
+    """
+    clients: dict[str, openai_agents.AsyncOpenAI] = {}
+    routes = []
+    for model_name, base_url in settings.model_endpoints:
+        upstream = _create_upstream_model(model_name, base_url, clients)
+        routes.append(ModelRoute(
+            model_name,
+            ResilientModel(
+                upstream,
+                breaker=get_circuit_breaker(model_name),
+                policy=default_retry_policy(),
+            ),
+        ))
+    logger.info(f"Model routing order: {', '.join(route.name for route in routes)}")
+    return RoutedModel(
+        routes,
+        latency_tolerance=settings.routing_latency_tolerance,
+        max_error_rate=settings.routing_max_error_rate,
+        stale_after=settings.routing_stale_seconds,
+    )
+
+
+def create_portfolio_agent() -> openai_agents.Agent:
+    """
+    Create and configure the portfolio assistant agent.
+    
+    Returns:
+        Configured Agent instance
+    """
+    model = create_routed_model()
+    
+    # Instructions carry only the portfolio facts relevant to each question
+    instructions = KnowledgeInstructions(
+        INSTRUCTIONS_TEMPLATE,
+        get_knowledge_base(),
+        retrieval_enabled=settings.knowledge_retrieval_enabled,
+    )
     
     # Create the agent
     agent = openai_agents.Agent(
@@ -98,16 +137,17 @@ def get_agent_session(session_id: str) -> Session:
     """
     Get or create a session for the agent.
     
+    Sessions come from the configured backend (``SESSION_BACKEND``): the
+    pooled SQLite store, an in-memory LRU or a shared key-value server.
+    The history policy bounds how much of the conversation is replayed.
+    
     Args:
         session_id: Unique identifier for the session
         
     Returns:
         Session instance
     """
-    return SQLiteSession(
-        session_id=session_id,
-        db_path=settings.session_db_path,
-    )
+    return apply_history_policy(get_session_backend().get_session(session_id))
 
 
 # Global agent instance
@@ -121,3 +161,8 @@ def get_portfolio_agent() -> openai_agents.Agent:
         _portfolio_agent = create_portfolio_agent()
     return _portfolio_agent
 
+
+def reset_portfolio_agent() -> None:
+    """Drop the agent so the next lookup rebuilds it (its clients use the closed HTTP pool)."""
+    global _portfolio_agent
+    _portfolio_agent = None
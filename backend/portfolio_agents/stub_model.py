@@ -0,0 +1,224 @@
+"""
+Local stub model for offline development and testing.
+Implements the OpenAI Agent SDK model interface without any network access,
+so the full agent/session/streaming path can be exercised without a Gemini key.
+"""
+import asyncio
+import random
+import time
+from collections.abc import AsyncIterator
+from typing import Any, Callable, Optional
+
+import httpx
+import openai
+from agents.items import ModelResponse
+from agents.models.interface import Model
+from agents.usage import Usage
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseCreatedEvent,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+    ResponseUsage,
+)
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+
+from utils.tokens import estimate_tokens, item_text
+
+STUB_MODEL_NAME = "stub"
+STUB_RESPONSE_ID = "__stub_response__"
+
+
+def _last_user_message(input: Any) -> str:
+    """Extract the most recent user message from a string or Responses item list."""
+    if isinstance(input, str):
+        return input
+    for item in reversed(list(input or [])):
+        if isinstance(item, dict) and item.get("role") == "user":
+            return item_text(item)
+    return ""
+
+
+def _input_text(system_instructions: Optional[str], input: Any) -> str:
+    """Flatten instructions and input into one string for token estimation."""
+    if isinstance(input, str):
+        return (system_instructions or "") + input
+    return (system_instructions or "") + repr(input)
+
+
+class StubModel(Model):
+    """
+    Deterministic, network-free model.
+
+    Replies are generated by ``reply_fn`` (default: a canned answer echoing the
+    last user message) and streamed word by word. Upstream faults can be
+    injected with ``error_rate`` or :meth:`fail_next`.
+    """
+
+    def __init__(
+        self,
+        reply_fn: Optional[Callable[[str], str]] = None,
+        latency: float = 0.0,
+        token_delay: float = 0.0,
+        model_name: str = STUB_MODEL_NAME,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+    ):
+        """
+        Args:
+            reply_fn: Maps the last user message to the reply text
+            latency: Seconds to wait before the first token
+            token_delay: Seconds to wait between streamed chunks
+            model_name: Model name reported in responses
+            error_rate: Probability that a call fails with ``error_status``
+            error_status: HTTP status of injected failures
+        """
+        self.reply_fn = reply_fn or self._default_reply
+        self.latency = latency
+        self.token_delay = token_delay
+        self.model_name = model_name
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.calls = 0
+        self.failures = 0
+        self._fail_next = 0
+
+    def fail_next(self, count: int = 1, status_code: Optional[int] = None) -> None:
+        """Make the next ``count`` calls fail (after their latency)."""
+        self._fail_next = count
+        if status_code is not None:
+            self.error_status = status_code
+
+    def _maybe_fail(self) -> None:
+        if self._fail_next > 0:
+            self._fail_next -= 1
+        elif not (self.error_rate and random.random() < self.error_rate):
+            return
+        self.failures += 1
+        request = httpx.Request("POST", "http://stub/v1/chat/completions")
+        raise openai.APIStatusError(
+            f"Injected stub failure ({self.error_status})",
+            response=httpx.Response(self.error_status, request=request),
+            body=None,
+        )
+
+    @staticmethod
+    def _default_reply(message: str) -> str:
+        return (
+            f"Thanks for asking about \"{message.strip()}\". "
+            "Muhammad Abdullah Athar is a Python and TypeScript developer "
+            "building AI agents with the OpenAI Agent SDK."
+        )
+
+    def _usage(self, system_instructions: Optional[str], input: Any, text: str) -> Usage:
+        input_tokens = estimate_tokens(_input_text(system_instructions, input))
+        output_tokens = estimate_tokens(text)
+        return Usage(
+            requests=1,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=input_tokens + output_tokens,
+        )
+
+    @staticmethod
+    def _message(text: str) -> ResponseOutputMessage:
+        return ResponseOutputMessage(
+            id=STUB_RESPONSE_ID,
+            content=[ResponseOutputText(text=text, type="output_text", annotations=[])],
+            role="assistant",
+            status="completed",
+            type="message",
+        )
+
+    async def get_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        *,
+        previous_response_id=None,
+        conversation_id=None,
+        prompt=None,
+    ) -> ModelResponse:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        text = self.reply_fn(_last_user_message(input))
+        return ModelResponse(
+            output=[self._message(text)],
+            usage=self._usage(system_instructions, input, text),
+            response_id=None,
+        )
+
+    async def stream_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        *,
+        previous_response_id=None,
+        conversation_id=None,
+        prompt=None,
+    ) -> AsyncIterator:
+        self.calls += 1
+        # Injected failures happen before the first event, like a refused request
+        self._maybe_fail()
+        text = self.reply_fn(_last_user_message(input))
+        response = Response(
+            id=STUB_RESPONSE_ID,
+            created_at=time.time(),
+            model=self.model_name,
+            object="response",
+            output=[],
+            tool_choice="auto",
+            tools=[],
+            parallel_tool_calls=False,
+        )
+        sequence = 0
+        yield ResponseCreatedEvent(
+            response=response, type="response.created", sequence_number=sequence
+        )
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            sequence += 1
+            yield ResponseTextDeltaEvent(
+                content_index=0,
+                delta=word if i == 0 else f" {word}",
+                item_id=STUB_RESPONSE_ID,
+                output_index=0,
+                type="response.output_text.delta",
+                sequence_number=sequence,
+                logprobs=[],
+            )
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+
+        usage = self._usage(system_instructions, input, text)
+        final_response = response.model_copy()
+        final_response.output = [self._message(text)]
+        final_response.usage = ResponseUsage(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            total_tokens=usage.total_tokens,
+            input_tokens_details=InputTokensDetails(cached_tokens=0),
+            output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+        )
+        yield ResponseCompletedEvent(
+            response=final_response,
+            type="response.completed",
+            sequence_number=sequence + 1,
+        )
@@ -2,9 +2,15 @@
 FastAPI routes for the AI assistant endpoints.
 Handles chat requests and conversation management.
 """
+import contextlib
+import json
 import logging
-from typing import Optional
-from fastapi import APIRouter, HTTPException, status
+import secrets
+import uuid
+from typing import AsyncIterator, Literal, NamedTuple, Optional
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from openai.types.responses import ResponseTextDeltaEvent
 from pydantic import BaseModel, Field
 import sys
 from pathlib import Path
@@ -15,7 +21,33 @@ if str(backend_path) not in sys.path:
     sys.path.insert(0, str(backend_path))
 
 import agents as openai_agents
+from agents.items import TResponseInputItem
+from agents.memory import Session
+from agents.usage import Usage
 from portfolio_agents import get_portfolio_agent, get_agent_session
+from services.admission import AdmissionRejected, get_admission_controller
+from services.fast_path import FAST_PATH_MODEL, get_fast_path
+from services.hedging import get_hedger
+from services.history_policy import bound_client_history
+from services.knowledge import get_knowledge_base, retrieval_query
+from services.maintenance import get_session_maintenance
+from services.metrics import record_error, track_agent_run
+from services.model_router import ServedModel, track_served_model
+from services.resilience import (
+    CircuitOpenError,
+    DeadlineExceeded,
+    deadline_scope,
+    upstream_health,
+)
+from services.response_cache import ResponseCache, get_response_cache
+from services.semantic_cache import get_semantic_cache
+from services.single_flight import get_single_flight
+from services.session_backend import SQLITE_BACKENDS, get_session_backend
+from services.session_locks import get_session_locks
+from services.session_store import make_turn_items
+from services.tiered_session import TieredSessionBackend
+from services.usage import TokenBudgetExceeded, get_usage_tracker, usage_to_dict
+from utils.tokens import item_text
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -27,11 +59,29 @@ compat_router = APIRouter(prefix="/api", tags=["compat"])
 
 
 # Request/Response Models
+class HistoryMessage(BaseModel):
+    """One message of client-held conversation history."""
+    role: Literal["user", "assistant"]
+    content: str = Field(..., max_length=settings.client_history_max_message_chars)
+
+
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
     message: str = Field(..., description="User's message", min_length=1, max_length=2000)
-    session_id: Optional[str] = Field(None, description="Session ID for conversation continuity")
-    conversation_history: Optional[list[dict]] = Field(None, description="Previous conversation messages")
+    session_id: Optional[str] = Field(None, description="Session ID for conversation continuity", max_length=128)
+    conversation_history: Optional[list[HistoryMessage]] = Field(
+        None,
+        description="Previous conversation messages, oldest first (the turn then runs without a stored session)",
+        max_length=settings.client_history_max_messages,
+    )
+
+
+class TokenUsage(BaseModel):
+    """Model usage for one request (zero when served from a cache)."""
+    requests: int = Field(0, description="Model calls made")
+    input_tokens: int = Field(0, description="Prompt tokens sent")
+    output_tokens: int = Field(0, description="Completion tokens received")
+    total_tokens: int = Field(0, description="Input plus output tokens")
 
 
 class ChatResponse(BaseModel):
@@ -40,6 +90,7 @@ class ChatResponse(BaseModel):
     response: str = Field(..., description="Assistant's response")
     session_id: Optional[str] = Field(None, description="Session ID for the conversation")
     model: str = Field(..., description="Model used for generation")
+    usage: Optional[TokenUsage] = Field(None, description="Token usage for this request")
 
 
 class HealthResponse(BaseModel):
@@ -48,6 +99,333 @@ class HealthResponse(BaseModel):
     service: str
     version: str
     model: str
+    upstream: Optional[dict] = None
+
+
+def _resolve_session_id(request: ChatRequest, http_request: Request) -> Optional[str]:
+    """
+    Determine the session id for a chat request.
+    
+    Uses the id from the request body, then the session cookie. Anonymous
+    clients get a freshly issued id, or no session at all when
+    ``ANONYMOUS_SESSION_MODE=stateless`` (one-shot questions, nothing stored).
+    
+    Returns:
+        Session id, or None for a stateless turn
+    """
+    session_id = request.session_id or http_request.cookies.get(settings.session_cookie_name)
+    if session_id:
+        return session_id
+    if settings.anonymous_session_mode == "stateless":
+        return None
+    return uuid.uuid4().hex
+
+
+def _client_history(request: ChatRequest) -> Optional[list[TResponseInputItem]]:
+    """
+    Bounded client-held history for a turn.
+    
+    Clients such as the chat widget send the history including the current
+    message; that trailing copy is dropped because the message is appended
+    to the agent input separately. A history without an earlier user message
+    (only the widget's greeting) comes back empty, so the turn is treated as
+    a first turn: cacheable and coalesced, still without a session.
+    
+    Returns:
+        Input items (possibly empty) when the client sent ``conversation_history``
+        and it is honoured, or None to use a stored session instead
+    """
+    if request.conversation_history is None or not settings.client_history_enabled:
+        return None
+    items: list[TResponseInputItem] = [
+        {"role": m.role, "content": m.content.strip()}
+        for m in request.conversation_history
+        if m.content.strip()
+    ]
+    message = request.message.strip()
+    if items and items[-1]["role"] == "user" and (
+        # The widget prefixes its instructions to the message ("...\n\nUser: <question>")
+        message == items[-1]["content"] or message.endswith(f"\n\nUser: {items[-1]['content']}")
+    ):
+        items.pop()
+    if not any(item["role"] == "user" for item in items):
+        return []
+    return bound_client_history(items)
+
+
+def _attach_session_cookie(
+    response: Response, http_request: Request, session_id: Optional[str]
+) -> None:
+    """Set the session cookie when the client does not already hold this id."""
+    if session_id and http_request.cookies.get(settings.session_cookie_name) != session_id:
+        response.set_cookie(
+            key=settings.session_cookie_name,
+            value=session_id,
+            max_age=settings.session_cookie_max_age,
+            httponly=True,
+            samesite="lax",
+        )
+
+
+async def _lookup_cached_reply(
+    message: str, session: Optional[Session]
+) -> tuple[Optional[str], bool]:
+    """
+    Look up a cached reply for a stateless turn.
+    
+    Only first turns (no prior session history) are cacheable, because their
+    answer depends solely on the message, the model and the agent instructions.
+    The exact-match cache is consulted first, then the paraphrase cache.
+    
+    Returns:
+        Tuple of (cached reply or None, whether the turn is cacheable)
+    """
+    cache = get_response_cache()
+    semantic_cache = get_semantic_cache()
+    if not (cache.enabled or semantic_cache.enabled):
+        return None, False
+    if session is not None and await session.get_items(limit=1):
+        return None, False
+    
+    instructions = get_portfolio_agent().instructions
+    if cache.enabled:
+        cached = cache.get(cache.make_key(message, settings.default_model, instructions))
+        if cached is not None:
+            logger.info("Serving response from cache")
+            return cached, True
+    
+    if semantic_cache.enabled:
+        match = semantic_cache.lookup(
+            message, semantic_cache.namespace(settings.default_model, instructions)
+        )
+        if match is not None:
+            logger.info(
+                f"Serving response from semantic cache (score={match.score}, "
+                f"matched: {match.matched_message[:50]})"
+            )
+            return match.response, True
+    
+    return None, True
+
+
+def _store_cached_reply(message: str, reply: str) -> None:
+    """Record a freshly generated first-turn reply in the response caches."""
+    instructions = get_portfolio_agent().instructions
+    cache = get_response_cache()
+    if cache.enabled:
+        cache.set(cache.make_key(message, settings.default_model, instructions), reply)
+    semantic_cache = get_semantic_cache()
+    if semantic_cache.enabled:
+        semantic_cache.add(
+            message, reply, semantic_cache.namespace(settings.default_model, instructions)
+        )
+
+
+def _turn_lock(session: Optional[Session]):
+    """Serialize turns within a session (no-op for stateless turns)."""
+    if session is None:
+        return contextlib.nullcontext()
+    return get_session_locks().hold(session.session_id)
+
+
+def _session_id(session: Optional[Session]) -> Optional[str]:
+    return session.session_id if session is not None else None
+
+
+class TurnResult(NamedTuple):
+    """Outcome of one assistant turn."""
+    reply: str
+    usage: Usage
+    model: str
+
+
+async def _previous_user_message(
+    session: Optional[Session], history: Optional[list[TResponseInputItem]] = None
+) -> Optional[str]:
+    """The user's previous message in the conversation, if there is one."""
+    if history is not None:
+        items = history
+    elif session is not None:
+        items = await session.get_items(limit=4)
+    else:
+        return None
+    for item in reversed(items):
+        if isinstance(item, dict) and item.get("role") == "user":
+            return item_text(item)
+    return None
+
+
+@contextlib.asynccontextmanager
+async def _agent_run(
+    mode: str, message: str, previous: Optional[str] = None
+) -> AsyncIterator[ServedModel]:
+    """
+    Admit, instrument and time-box one agent run answering ``message``.
+    The message, with the user's ``previous`` one so that follow-ups ("tell
+    me more about that") keep their subject, selects the portfolio knowledge
+    put into the prompt. Yields the model that answers it.
+    """
+    query = f"{previous}\n{message}" if previous else message
+    async with get_admission_controller().admit():
+        with (
+            track_agent_run(mode),
+            deadline_scope(settings.request_deadline_seconds),
+            track_served_model() as served,
+            retrieval_query(query),
+        ):
+            yield served
+
+
+async def _run_stateless_turn(message: str, session: Optional[Session]) -> TurnResult:
+    """
+    Run the agent for a first-turn question without a session and cache the reply.
+    Usage is charged to ``session`` (the caller that actually triggered the run).
+    Slow runs may be hedged with a second attempt (both share one admission slot).
+    """
+    async with _agent_run("stateless", message) as served:
+        result = await get_hedger().run(lambda: openai_agents.Runner.run(
+            starting_agent=get_portfolio_agent(),
+            input=message,
+        ))
+    usage = result.context_wrapper.usage
+    await get_usage_tracker().record(served.name, usage, _session_id(session))
+    _store_cached_reply(message, result.final_output)
+    return TurnResult(result.final_output, usage, served.name)
+
+
+async def _run_client_history_turn(message: str, history: list[TResponseInputItem]) -> TurnResult:
+    """
+    Run the agent on client-held history plus the new message.
+    Nothing is read from or written to the session store; slow runs may be hedged.
+    """
+    agent_input = [*history, {"role": "user", "content": message}]
+    previous = await _previous_user_message(None, history)
+    async with _agent_run("client_history", message, previous) as served:
+        result = await get_hedger().run(lambda: openai_agents.Runner.run(
+            starting_agent=get_portfolio_agent(),
+            input=agent_input,
+        ))
+    usage = result.context_wrapper.usage
+    await get_usage_tracker().record(served.name, usage)
+    return TurnResult(result.final_output, usage, served.name)
+
+
+async def _generate_reply(
+    message: str,
+    session: Optional[Session],
+    history: Optional[list[TResponseInputItem]] = None,
+) -> TurnResult:
+    """
+    Produce the assistant reply for one turn.
+    
+    Answers common questions from templates (fast path, not for turns on
+    client-held history) and first-turn questions from the response caches
+    when possible, recording the turn in
+    the session, and otherwise runs the agent. Turns within one session are
+    serialized so history is read and appended in order.
+    
+    Args:
+        message: Cleaned user message
+        session: Session holding the conversation history (None for stateless turns)
+        history: Client-held history of a stateless turn (used instead of a session)
+        
+    Returns:
+        The reply text, the model usage of this turn and the model that answered
+        
+    Raises:
+        TokenBudgetExceeded: If the session has spent its token budget
+        AdmissionRejected: If the worker is at capacity
+        CircuitOpenError: If the model provider is failing
+        DeadlineExceeded: If the model did not answer within the request deadline
+    """
+    async with _turn_lock(session):
+        await get_usage_tracker().check_budget(_session_id(session))
+        
+        # Follow-ups ("which of those use Python?") depend on the earlier turns
+        if history:
+            return await _run_client_history_turn(message, history)
+        
+        fast = get_fast_path().answer(message)
+        if fast is not None:
+            if session is not None:
+                await session.add_items(make_turn_items(message, fast.text))
+            return TurnResult(fast.text, Usage(), FAST_PATH_MODEL)
+        
+        cached, cacheable = await _lookup_cached_reply(message, session)
+        if cached is not None:
+            if session is not None:
+                await session.add_items(make_turn_items(message, cached))
+            return TurnResult(cached, Usage(), settings.default_model)
+        
+        if cacheable:
+            # Identical first-turn questions in flight share one upstream call;
+            # each caller then records the turn in its own session. Only the
+            # caller whose run was executed is charged for it.
+            coalesce_key = ResponseCache.make_key(
+                message, settings.default_model, get_portfolio_agent().instructions
+            )
+            ran = False
+            
+            def run_turn():
+                nonlocal ran
+                ran = True
+                return _run_stateless_turn(message, session)
+            
+            turn = await get_single_flight().do(coalesce_key, run_turn)
+            if session is not None:
+                await session.add_items(make_turn_items(message, turn.reply))
+            return turn if ran else turn._replace(usage=Usage())
+        
+        previous = await _previous_user_message(session)
+        async with _agent_run("session", message, previous) as served:
+            result = await openai_agents.Runner.run(
+                starting_agent=get_portfolio_agent(),
+                input=message,
+                session=session,
+            )
+        usage = result.context_wrapper.usage
+        await get_usage_tracker().record(served.name, usage, _session_id(session))
+        return TurnResult(result.final_output, usage, served.name)
+
+
+async def prime_reply(message: str) -> str:
+    """Answer a canned first-turn question so its reply lands in the response caches."""
+    turn = await _generate_reply(message.strip(), None)
+    return turn.reply
+
+
+# Errors that refuse a turn with a specific status instead of a generic 500
+REFUSAL_ERRORS = (TokenBudgetExceeded, AdmissionRejected, CircuitOpenError, DeadlineExceeded)
+REFUSAL_STATUS_CODES = {
+    status.HTTP_429_TOO_MANY_REQUESTS,
+    status.HTTP_503_SERVICE_UNAVAILABLE,
+    status.HTTP_504_GATEWAY_TIMEOUT,
+}
+
+
+def _refusal(error: Exception) -> HTTPException:
+    """Map a refusal error to its HTTP response (with Retry-After where it applies)."""
+    if isinstance(error, TokenBudgetExceeded):
+        return HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(error))
+    if isinstance(error, DeadlineExceeded):
+        return HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(error))
+    status_code = getattr(error, "status_code", status.HTTP_503_SERVICE_UNAVAILABLE)
+    return HTTPException(
+        status_code=status_code,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def _require_admin(x_admin_token: Optional[str]) -> None:
+    """
+    Check the admin token. Admin endpoints are hidden (404) unless
+    ``ADMIN_TOKEN`` is configured, so usage is never readable by default.
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
 
 
 @router.get("/health", response_model=HealthResponse)
@@ -58,21 +436,100 @@ async def health_check():
     Returns:
         Health status information
     """
+    upstream = upstream_health()
     return HealthResponse(
-        status="healthy",
+        status="healthy" if upstream["state"] == "closed" else "degraded",
         service=settings.app_name,
         version=settings.app_version,
         model=settings.default_model,
+        upstream=upstream,
     )
 
 
+@router.get("/cache/stats")
+async def cache_stats():
+    """
+    Response cache statistics (size, hits, misses, evictions).
+    
+    Returns:
+        Counters for the exact-match and semantic caches, request coalescing, hedging,
+        the knowledge index, the fast path and the session hot tier (tiered backend only)
+    """
+    session_backend = get_session_backend()
+    return {
+        "exact": get_response_cache().stats(),
+        "semantic": get_semantic_cache().stats(),
+        "single_flight": get_single_flight().stats(),
+        "hedging": get_hedger().stats(),
+        "knowledge": get_knowledge_base().stats(),
+        "fast_path": get_fast_path().stats(),
+        "session_hot_tier": (
+            session_backend.stats() if isinstance(session_backend, TieredSessionBackend) else None
+        ),
+    }
+
+
+@router.get("/maintenance")
+async def maintenance_report():
+    """
+    Report from the most recent session database maintenance run.
+    
+    Returns:
+        Expired sessions, reclaimed bytes and run time (or null before the first run)
+    """
+    # Only backends stored in SQLite are maintained; the others expire sessions themselves
+    sqlite = settings.session_backend in SQLITE_BACKENDS
+    report = get_session_maintenance().last_report if sqlite else None
+    return {
+        "enabled": settings.maintenance_enabled and sqlite,
+        "interval_seconds": settings.maintenance_interval_seconds,
+        "session_ttl_hours": settings.session_ttl_hours,
+        "last_run": report.to_dict() if report else None,
+    }
+
+
+@router.get("/usage")
+async def usage_report(x_admin_token: Optional[str] = Header(None)):
+    """
+    Token usage and estimated cost aggregated per model.
+    
+    Requires the ``X-Admin-Token`` header (404 while ``ADMIN_TOKEN`` is unset).
+    
+    Returns:
+        Per-model totals and the configured per-session budget
+    """
+    _require_admin(x_admin_token)
+    return {
+        "models": get_usage_tracker().model_stats(),
+        "session_token_budget": settings.session_token_budget or None,
+    }
+
+
+@router.get("/usage/{session_id}")
+async def session_usage_report(session_id: str, x_admin_token: Optional[str] = Header(None)):
+    """
+    Token usage, estimated cost and remaining budget for one session.
+    
+    Requires the ``X-Admin-Token`` header (404 while ``ADMIN_TOKEN`` is unset).
+    """
+    _require_admin(x_admin_token)
+    return await get_usage_tracker().session_usage(session_id)
+
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request, response: Response):
     """
     Chat endpoint for interacting with the portfolio assistant.
     
+    Clients without a session id are issued one (returned in the body and
+    as a cookie) instead of sharing a global session. Clients sending
+    ``conversation_history`` hold the conversation themselves: the turn runs
+    on that history and no session is read, written or issued.
+    
     Args:
         request: Chat request with message and optional session info
+        http_request: Incoming HTTP request (for the session cookie)
+        response: Outgoing response (to set the session cookie)
         
     Returns:
         Chat response with assistant's reply
@@ -90,12 +547,10 @@ async def chat(request: ChatRequest):
         
         logger.info(f"Received chat request: {request.message[:50]}...")
         
-        # Get agent instance
-        agent = get_portfolio_agent()
-        
-        # Handle session
+        # Handle session (none when the client holds the history)
         session = None
-        session_id = request.session_id or "default_session"
+        history = _client_history(request)
+        session_id = _resolve_session_id(request, http_request) if history is None else None
         
         if session_id:
             session = get_agent_session(session_id)
@@ -103,32 +558,32 @@ async def chat(request: ChatRequest):
         
         # Run the agent
         try:
-            result = await openai_agents.Runner.run(
-                starting_agent=agent,
-                input=request.message.strip(),
-                session=session,
-            )
-            
-            response_text = result.final_output
+            turn = await _generate_reply(request.message.strip(), session, history)
             logger.info(f"Agent response generated successfully")
             
+        except REFUSAL_ERRORS as e:
+            raise _refusal(e)
         except Exception as e:
+            record_error(e)
             logger.error(f"Error running agent: {e}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error processing request: {str(e)}"
             )
         
+        _attach_session_cookie(response, http_request, session_id)
         return ChatResponse(
             success=True,
-            response=response_text,
+            response=turn.reply,
             session_id=session_id,
-            model=settings.default_model,
+            model=turn.model,
+            usage=TokenUsage(**usage_to_dict(turn.usage)),
         )
         
     except HTTPException:
         raise
     except Exception as e:
+        record_error(e)
         logger.error(f"Unexpected error in chat endpoint: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -136,13 +591,129 @@ async def chat(request: ChatRequest):
         )
 
 
+def _sse_event(payload: dict) -> str:
+    """Format a payload as a single Server-Sent Events message."""
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Streaming chat endpoint using Server-Sent Events.
+    
+    Emits ``delta`` events with text fragments as the model generates them,
+    followed by a single ``done`` event (or an ``error`` event on failure).
+    The completed turn is written to the session by the runner (clients
+    sending ``conversation_history`` get no session, as in ``/chat``).
+    
+    Args:
+        request: Chat request with message and optional session info
+        http_request: Incoming HTTP request (for the session cookie)
+        
+    Returns:
+        ``text/event-stream`` response
+    """
+    if not request.message or not request.message.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Message cannot be empty"
+        )
+    
+    logger.info(f"Received streaming chat request: {request.message[:50]}...")
+    
+    message = request.message.strip()
+    history = _client_history(request)
+    session_id = _resolve_session_id(request, http_request) if history is None else None
+    session = get_agent_session(session_id) if session_id else None
+    
+    # Refuse up front so the client gets a proper status code, not an error event
+    try:
+        await get_usage_tracker().check_budget(session_id)
+        get_admission_controller().check()
+    except REFUSAL_ERRORS as e:
+        raise _refusal(e)
+    
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async with _turn_lock(session):
+                fast = None if history else get_fast_path().answer(message)
+                if history:
+                    cached, cacheable = None, False
+                elif fast is not None:
+                    cached, cacheable = fast.text, False
+                else:
+                    cached, cacheable = await _lookup_cached_reply(message, session)
+                
+                if cached is not None:
+                    if session is not None:
+                        await session.add_items(make_turn_items(message, cached))
+                    response_text = cached
+                    usage = Usage()
+                    model_name = FAST_PATH_MODEL if fast is not None else settings.default_model
+                    yield _sse_event({"type": "delta", "delta": cached})
+                else:
+                    previous = None if cacheable else await _previous_user_message(session, history)
+                    async with _agent_run("stream", message, previous) as served:
+                        result = openai_agents.Runner.run_streamed(
+                            starting_agent=get_portfolio_agent(),
+                            input=[*history, {"role": "user", "content": message}] if history else message,
+                            session=session,
+                        )
+                        async for event in result.stream_events():
+                            if event.type == "raw_response_event" and isinstance(
+                                event.data, ResponseTextDeltaEvent
+                            ):
+                                yield _sse_event({"type": "delta", "delta": event.data.delta})
+                    response_text = result.final_output
+                    usage = result.context_wrapper.usage
+                    model_name = served.name
+                    await get_usage_tracker().record(model_name, usage, session_id)
+                    if cacheable:
+                        _store_cached_reply(message, response_text)
+            
+            logger.info("Agent streaming response completed")
+            yield _sse_event({
+                "type": "done",
+                "response": response_text,
+                "session_id": session_id,
+                "model": model_name,
+                "usage": usage_to_dict(usage),
+            })
+        except REFUSAL_ERRORS as e:
+            refusal = _refusal(e)
+            yield _sse_event({
+                "type": "error",
+                "detail": refusal.detail,
+                "status": refusal.status_code,
+                "retry_after": getattr(e, "retry_after", None),
+            })
+        except Exception as e:
+            record_error(e)
+            logger.error(f"Error streaming agent response: {e}", exc_info=True)
+            yield _sse_event({"type": "error", "detail": f"Error processing request: {str(e)}"})
+    
+    streaming_response = StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    _attach_session_cookie(streaming_response, http_request, session_id)
+    return streaming_response
+
+
 @router.post("/chat/sync", response_model=ChatResponse)
-async def chat_sync(request: ChatRequest):
+async def chat_sync(request: ChatRequest, http_request: Request, response: Response):
     """
     Synchronous chat endpoint (for testing/compatibility).
     
+    Returns the complete reply in one response, like ``/chat``. The run is
+    delegated to the async runner: ``Runner.run_sync`` would block the event
+    loop (and every other request on this worker) for the whole LLM call.
+    
     Args:
         request: Chat request with message and optional session info
+        http_request: Incoming HTTP request (for the session cookie)
+        response: Outgoing response (to set the session cookie)
         
     Returns:
         Chat response with assistant's reply
@@ -156,29 +727,28 @@ async def chat_sync(request: ChatRequest):
         
         logger.info(f"Received sync chat request: {request.message[:50]}...")
         
-        agent = get_portfolio_agent()
-        
         session = None
-        session_id = request.session_id or "default_session"
+        history = _client_history(request)
+        session_id = _resolve_session_id(request, http_request) if history is None else None
         
         if session_id:
             session = get_agent_session(session_id)
         
-        # Use synchronous runner
-        result = openai_agents.Runner.run_sync(
-            starting_agent=agent,
-            input=request.message.strip(),
-            session=session,
-        )
+        turn = await _generate_reply(request.message.strip(), session, history)
         
+        _attach_session_cookie(response, http_request, session_id)
         return ChatResponse(
             success=True,
-            response=result.final_output,
+            response=turn.reply,
             session_id=session_id,
-            model=settings.default_model,
+            model=turn.model,
+            usage=TokenUsage(**usage_to_dict(turn.usage)),
         )
         
+    except REFUSAL_ERRORS as e:
+        raise _refusal(e)
     except Exception as e:
+        record_error(e)
         logger.error(f"Error in sync chat: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -188,7 +758,7 @@ async def chat_sync(request: ChatRequest):
 
 # Compatibility endpoint for frontend (/api/chat)
 @compat_router.post("/chat")
-async def chat_compat(request: ChatRequest):
+async def chat_compat(request: ChatRequest, http_request: Request, response: Response):
     """
     Compatibility endpoint for frontend that expects /api/chat.
     Returns response in the format expected by the frontend.
@@ -202,18 +772,33 @@ async def chat_compat(request: ChatRequest):
             if len(lines) > 1:
                 message = lines[-1]
         
-        # Create new request with cleaned message
-        clean_request = ChatRequest(message=message, session_id=request.session_id)
+        # Create new request with cleaned message (keeping any client-held history)
+        clean_request = ChatRequest(
+            message=message,
+            session_id=request.session_id,
+            conversation_history=request.conversation_history,
+        )
         
         # Get response
-        result = await chat(clean_request)
+        result = await chat(clean_request, http_request, response)
         
         # Return in format expected by frontend
         return {
             "success": result.success,
             "response": result.response,
+            "session_id": result.session_id,
             "model": result.model,
+            "usage": result.usage.model_dump() if result.usage else None,
         }
+    except HTTPException as e:
+        # Refusals keep their status; other failures are reported as before
+        if e.status_code in REFUSAL_STATUS_CODES:
+            raise
+        logger.error(f"Error in compat endpoint: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing request: {str(e)}"
+        )
     except Exception as e:
         logger.error(f"Error in compat endpoint: {e}", exc_info=True)
         raise HTTPException(
@@ -0,0 +1,180 @@
+"""
+Admission control for agent runs.
+Caps how many ``Runner.run`` calls a worker has in flight, queues a bounded
+number of extra requests for a limited time and rejects the rest immediately,
+so an overload turns into fast 429/503 responses instead of a pile of slow
+upstream calls that all fail together.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from config import settings
+from services.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = metrics_registry.gauge(
+    "portfolio_admission_queue_depth",
+    "Requests waiting for an agent run slot.",
+)
+REJECTIONS = metrics_registry.counter(
+    "portfolio_admission_rejections_total",
+    "Requests refused by admission control.",
+    ("reason",),
+)
+WAIT_DURATION = metrics_registry.histogram(
+    "portfolio_admission_wait_seconds",
+    "Time spent waiting for an agent run slot.",
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted."""
+
+    def __init__(self, reason: str, status_code: int, retry_after: int):
+        super().__init__(f"Server is busy ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Max-in-flight limiter with a bounded FIFO wait queue and a wait deadline."""
+
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        max_queue: int = 64,
+        queue_timeout: float = 10.0,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            max_in_flight: Agent runs allowed at once
+            max_queue: Requests allowed to wait for a slot; more are rejected with 429
+            queue_timeout: Seconds a request may wait before it is rejected with 503
+            enabled: When False every request is admitted immediately
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.enabled = enabled
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        # Smoothed run time, used to suggest a Retry-After
+        self._avg_run_seconds = 1.0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _retry_after(self) -> int:
+        backlog = len(self._waiters) + 1
+        return max(1, math.ceil(self._avg_run_seconds * backlog / self.max_in_flight))
+
+    def _reject(self, reason: str, status_code: int) -> AdmissionRejected:
+        self.rejected += 1
+        REJECTIONS.inc(reason=reason)
+        logger.warning(f"Admission rejected ({reason}): {self._in_flight} in flight, "
+                       f"{len(self._waiters)} queued")
+        return AdmissionRejected(reason, status_code, self._retry_after())
+
+    def check(self) -> None:
+        """
+        Fail fast if a new request would be rejected right now (queue full).
+
+        Raises:
+            AdmissionRejected: With status 429 when the wait queue is full
+        """
+        if not self.enabled or self._in_flight < self.max_in_flight:
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full", 429)
+
+    async def _acquire(self) -> None:
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return
+        self.check()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        QUEUE_DEPTH.set(len(self._waiters))
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except BaseException as e:
+            # A slot may have been handed over just as the wait ended
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            if isinstance(e, TimeoutError):
+                raise self._reject("queue_timeout", 503) from None
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            QUEUE_DEPTH.set(len(self._waiters))
+            WAIT_DURATION.observe(time.perf_counter() - start)
+
+    def _release(self) -> None:
+        # Hand the slot straight to the oldest live waiter, if any
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """
+        Hold an agent run slot for the duration of the block.
+
+        Raises:
+            AdmissionRejected: 429 if the wait queue is full, 503 if the wait deadline passed
+        """
+        if not self.enabled:
+            yield
+            return
+        await self._acquire()
+        self.admitted += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._avg_run_seconds = 0.8 * self._avg_run_seconds + 0.2 * elapsed
+            self._release()
+
+    def stats(self) -> dict:
+        """Snapshot of slots, queue and counters."""
+        return {
+            "enabled": self.enabled,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+# Global admission controller instance
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get the global admission controller (singleton)."""
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController(
+            max_in_flight=settings.admission_max_in_flight,
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout_seconds,
+            enabled=settings.admission_enabled,
+        )
+    return _admission_controller
@@ -0,0 +1,330 @@
+"""
+Deterministic fast path for high-frequency questions.
+Short questions such as "what's his email", "GitHub link" or "what skills"
+are classified locally (keyword patterns plus character n-gram similarity to
+example questions) and answered from templates filled with the structured
+portfolio data, without a model call. Anything long, ambiguous, below the
+confidence threshold or containing a term the intent does not account for
+("best project", "email password") falls through to the agent.
+"""
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from config import settings
+from services.knowledge import load_portfolio_data
+from services.metrics import metrics_registry
+from services.semantic_cache import STOPWORDS, extract_features
+
+logger = logging.getLogger(__name__)
+
+FAST_PATH_ANSWERS = metrics_registry.counter(
+    "portfolio_fast_path_answers_total",
+    "Questions answered from templates without a model call.",
+    ("intent",),
+)
+FAST_PATH_FALLTHROUGHS = metrics_registry.counter(
+    "portfolio_fast_path_fallthrough_total",
+    "Questions passed on to the agent "
+    "(no_match, low_confidence, ambiguous, too_long, deferred, unexplained).",
+    ("reason",),
+)
+FAST_PATH_DURATION = metrics_registry.histogram(
+    "portfolio_fast_path_seconds",
+    "Time to classify (and answer) one question on the fast path.",
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005),
+)
+
+# Reported as the model of fast-path replies
+FAST_PATH_MODEL = "fast-path"
+
+_WORD_RE = re.compile(r"[a-z0-9+#.]+")
+
+# Wording that asks for reasoning or a negation the templates cannot honour
+_DEFER_RE = re.compile(
+    r"\b(not|no|never|don'?t|doesn'?t|without|why|compare|versus|vs|better|should|would|if)\b"
+)
+
+
+def _name(data: dict) -> str:
+    return data["profile"].get("name", "The portfolio owner")
+
+
+def _contact(data: dict) -> Optional[str]:
+    profile = data["profile"]
+    if "email" not in profile:
+        return None
+    lines = [f"You can reach {_name(data)} by email at {profile['email']}."]
+    if "linkedin" in profile:
+        lines.append(f"- **LinkedIn**: {profile['linkedin']}")
+    if "github" in profile:
+        lines.append(f"- **GitHub**: {profile['github']}")
+    return "\n".join(lines)
+
+
+def _github(data: dict) -> Optional[str]:
+    profile = data["profile"]
+    if "github" not in profile:
+        return None
+    return f"{_name(data)}'s GitHub profile: {profile['github']}"
+
+
+def _linkedin(data: dict) -> Optional[str]:
+    profile = data["profile"]
+    if "linkedin" not in profile:
+        return None
+    return f"{_name(data)}'s LinkedIn profile: {profile['linkedin']}"
+
+
+def _skills(data: dict) -> Optional[str]:
+    if not data["skills"]:
+        return None
+    lines = [f"{_name(data)}'s skills and technologies:"]
+    lines += [f"- **{group['category']}**: {', '.join(group['items'])}" for group in data["skills"]]
+    return "\n".join(lines)
+
+
+def _projects(data: dict) -> Optional[str]:
+    if not data["projects"]:
+        return None
+    lines = [f"Projects by {_name(data)}:"]
+    lines += [f"- **{p['name']}**: [{p['repo']}]({p['url']})" for p in data["projects"]]
+    return "\n".join(lines)
+
+
+def _education(data: dict) -> Optional[str]:
+    profile = data["profile"]
+    if "education" not in profile:
+        return None
+    return f"**Education** ({_name(data)}): {profile['education']}"
+
+
+def _terms(text: str) -> list[str]:
+    """
+    Meaningful words of ``text`` as written: stopwords and the single letters
+    left over from contractions ("what's") are dropped, but no synonyms are
+    folded, so a word no intent knows ("work") is never read as one it does.
+    """
+    terms = []
+    for word in _WORD_RE.findall(text.lower()):
+        word = word.strip(".")
+        if len(word) > 1 and word not in STOPWORDS and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def _unit_vector(features: Counter) -> dict[str, float]:
+    norm = math.sqrt(sum(v * v for v in features.values()))
+    return {feature: count / norm for feature, count in features.items()} if norm else {}
+
+
+def _cosine(a: dict[str, float], b: dict[str, float]) -> float:
+    """Cosine similarity of two unit vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(feature, 0.0) for feature, weight in a.items())
+
+
+@dataclass
+class Intent:
+    """A question type answered from a template."""
+    name: str
+    # Keyword cue on the lowercased message
+    pattern: re.Pattern
+    # Example questions the message is compared with (character n-grams)
+    examples: list[str]
+    render: Callable[[dict], Optional[str]]
+    example_vectors: list[dict[str, float]] = field(default_factory=list)
+    # Words of the examples
+    vocabulary: frozenset[str] = frozenset()
+
+    def __post_init__(self):
+        self.example_vectors = [_unit_vector(extract_features(example)) for example in self.examples]
+        self.vocabulary = frozenset(term for example in self.examples for term in _terms(example))
+
+    def explains(self, terms: list[str]) -> bool:
+        """
+        Whether the template answers a question made of ``terms``: one of them
+        is a keyword and every other one is a keyword or an example term.
+        Any other word ("best", "password", "Java") may change the meaning.
+        """
+        keywords = [term for term in terms if self.pattern.fullmatch(term)]
+        return bool(keywords) and all(
+            term in self.vocabulary or term in keywords for term in terms
+        )
+
+
+def default_intents() -> list[Intent]:
+    return [
+        Intent(
+            "contact",
+            re.compile(r"\b(e-?mail|mail|contact|reach|hire)\b"),
+            ["What is his email?", "email address", "How can I contact him?", "reach him", "hire him"],
+            _contact,
+        ),
+        Intent(
+            "github",
+            re.compile(r"\b(github|gh)\b"),
+            ["GitHub", "GitHub link", "GitHub profile", "GitHub account"],
+            _github,
+        ),
+        Intent(
+            "linkedin",
+            re.compile(r"\blinked\s?in\b"),
+            ["LinkedIn", "LinkedIn profile", "LinkedIn link"],
+            _linkedin,
+        ),
+        Intent(
+            "skills",
+            re.compile(r"\b(skills?|tech\w*|stack|languages?|frameworks?|tools?)\b"),
+            ["What skills?", "What technologies does he know?", "tech stack", "programming languages"],
+            _skills,
+        ),
+        Intent(
+            "projects",
+            re.compile(r"\b(projects?|repos?|repositor(y|ies))\b"),
+            ["projects", "What has he built?", "Show me his repositories", "project list"],
+            _projects,
+        ),
+        Intent(
+            "education",
+            re.compile(r"\b(educat\w*|stud(y|ied)|learn(ed|t)?|school|course)\b"),
+            ["education", "Where did he study?", "Where did he learn?"],
+            _education,
+        ),
+    ]
+
+
+@dataclass
+class FastPathAnswer:
+    """A templated reply with the intent and confidence that selected it."""
+    intent: str
+    confidence: float
+    text: str
+
+
+class FastPath:
+    """Local intent classifier answering common questions from templates."""
+
+    def __init__(
+        self,
+        data: dict[str, Any],
+        threshold: float = 0.7,
+        max_terms: int = 4,
+        margin: float = 0.15,
+        enabled: bool = True,
+        intents: Optional[list[Intent]] = None,
+    ):
+        """
+        Args:
+            data: Structured portfolio data (see ``load_portfolio_data``)
+            threshold: Minimum confidence (0-1) to answer without the agent
+            max_terms: Questions with more meaningful terms go to the agent
+            margin: Required confidence lead over the runner-up intent
+            enabled: Whether questions are classified at all
+            intents: Intents to recognise (defaults to :func:`default_intents`)
+        """
+        self.threshold = threshold
+        self.max_terms = max_terms
+        self.margin = margin
+        self.enabled = enabled
+        self.intents: list[Intent] = []
+        self.answers: dict[str, str] = {}
+        # Templates are rendered once; intents without data are dropped
+        for intent in intents if intents is not None else default_intents():
+            text = intent.render(data)
+            if text:
+                self.intents.append(intent)
+                self.answers[intent.name] = text
+        self.answered: Counter = Counter()
+        self.fallthroughs: Counter = Counter()
+
+    def classify(self, message: str) -> tuple[Optional[str], float, str]:
+        """
+        Score ``message`` against every intent.
+
+        A keyword cue puts the score at 0.5 plus half the n-gram similarity to
+        the closest example; without one only the similarity counts. A match
+        is only answered if the intent explains every term of the message.
+
+        Returns:
+            Tuple of (best intent or None, its confidence, outcome) where outcome is
+            ``"match"`` or the fall-through reason
+        """
+        terms = _terms(message)
+        if not terms:
+            return None, 0.0, "no_match"
+        if len(terms) > self.max_terms:
+            return None, 0.0, "too_long"
+        lowered = message.lower()
+        if _DEFER_RE.search(lowered):
+            return None, 0.0, "deferred"
+
+        vector = _unit_vector(extract_features(message))
+        scores = []
+        for intent in self.intents:
+            similarity = max(_cosine(vector, example) for example in intent.example_vectors)
+            if intent.pattern.search(lowered):
+                similarity = 0.5 + 0.5 * similarity
+            scores.append((similarity, intent.name))
+        scores.sort(reverse=True)
+        if not scores or scores[0][0] == 0.0:
+            return None, 0.0, "no_match"
+
+        confidence, name = scores[0]
+        if confidence < self.threshold:
+            return name, confidence, "low_confidence"
+        if len(scores) > 1 and confidence - scores[1][0] < self.margin:
+            return name, confidence, "ambiguous"
+        intent = next(intent for intent in self.intents if intent.name == name)
+        if not intent.explains(terms):
+            return name, confidence, "unexplained"
+        return name, confidence, "match"
+
+    def answer(self, message: str) -> Optional[FastPathAnswer]:
+        """Templated reply for ``message``, or None to let the agent answer."""
+        if not self.enabled:
+            return None
+        with FAST_PATH_DURATION.time():
+            name, confidence, outcome = self.classify(message)
+        if outcome != "match":
+            self.fallthroughs[outcome] += 1
+            FAST_PATH_FALLTHROUGHS.inc(reason=outcome)
+            return None
+        self.answered[name] += 1
+        FAST_PATH_ANSWERS.inc(intent=name)
+        logger.info(f"Answered on the fast path (intent={name}, confidence={confidence:.2f})")
+        return FastPathAnswer(name, round(confidence, 3), self.answers[name])
+
+    def stats(self) -> dict:
+        answered = sum(self.answered.values())
+        total = answered + sum(self.fallthroughs.values())
+        return {
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "answered": answered,
+            "fall_through": total - answered,
+            "absorbed_ratio": round(answered / total, 4) if total else 0.0,
+            "by_intent": dict(self.answered),
+            "fall_through_reasons": dict(self.fallthroughs),
+        }
+
+
+# Global fast path
+_fast_path: Optional[FastPath] = None
+
+
+def get_fast_path() -> FastPath:
+    """Get the fast-path answerer built from the portfolio data (singleton)."""
+    global _fast_path
+    if _fast_path is None:
+        _fast_path = FastPath(
+            load_portfolio_data(settings.knowledge_dir),
+            threshold=settings.fast_path_threshold,
+            max_terms=settings.fast_path_max_terms,
+            enabled=settings.fast_path_enabled,
+        )
+    return _fast_path
@@ -0,0 +1,181 @@
+"""
+Hedged requests for stateless agent runs.
+When a run has not finished after a percentile of recent run latencies, a
+second identical attempt is started and whichever finishes first wins; the
+other is cancelled. A token budget caps hedges to a fraction of requests so
+hedging cannot multiply upstream load while the provider is slow for everyone.
+
+The delay is a percentile of first attempts' own latencies. A first attempt
+that loses to its hedge is cancelled at once and its time so far is recorded
+as a lower bound of its latency; recording the winner's time instead would
+feed hedged times back into the percentile and pull the delay down.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from config import settings
+from services.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HEDGES = metrics_registry.counter(
+    "portfolio_hedged_requests_total",
+    "Hedging decisions for slow stateless runs (issued, won, budget_exhausted).",
+    ("outcome",),
+)
+HEDGE_DELAY = metrics_registry.gauge(
+    "portfolio_hedge_delay_seconds",
+    "Current delay before a hedge attempt is started.",
+)
+
+
+class Hedger:
+    """Runs coroutine factories with a delayed backup attempt."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        percentile: float = 95.0,
+        initial_delay: float = 2.0,
+        min_delay: float = 0.05,
+        max_extra_ratio: float = 0.1,
+        window: int = 200,
+        min_samples: int = 20,
+    ):
+        """
+        Args:
+            enabled: When False every call runs once, unhedged
+            percentile: Latency percentile of recent runs used as the hedge delay
+            initial_delay: Hedge delay until ``min_samples`` runs have been seen
+            min_delay: Lower bound for the hedge delay
+            max_extra_ratio: Hedges allowed per call (0.1 = at most ~10% extra load)
+            window: Number of recent run latencies kept
+            min_samples: Samples needed before the percentile is trusted
+        """
+        self.enabled = enabled
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_extra_ratio = max_extra_ratio
+        self.min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=window)
+        # Every call earns ``max_extra_ratio`` of a hedge and a hedge spends one;
+        # unused budget is banked for bursts of up to 100 calls' worth
+        self._budget = 1.0
+        self._budget_cap = max(1.0, max_extra_ratio * 100)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the first attempt before hedging."""
+        if len(self._latencies) < self.min_samples:
+            return max(self.min_delay, self.initial_delay)
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, math.ceil(self.percentile / 100 * len(ordered)) - 1)
+        return max(self.min_delay, ordered[max(0, index)])
+
+    def _record_primary(self, task: asyncio.Future, start: float) -> None:
+        # Failures and caller cancellations say nothing about how long a run takes
+        if not task.cancelled() and task.exception() is None:
+            self._latencies.append(time.perf_counter() - start)
+
+    def _take_hedge(self) -> bool:
+        if self._budget < 1.0:
+            HEDGES.inc(outcome="budget_exhausted")
+            return False
+        self._budget -= 1.0
+        return True
+
+    async def run(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``fn``, starting a second attempt if the first is slow.
+
+        The first attempt to succeed wins and the other is cancelled. If one
+        attempt fails while the other is still running, the other one is
+        awaited instead; the error is raised only when both fail.
+
+        Args:
+            fn: Zero-argument coroutine factory; must be safe to run twice
+
+        Returns:
+            The result of the winning attempt
+        """
+        if not self.enabled:
+            return await fn()
+
+        self.calls += 1
+        self._budget = min(self._budget_cap, self._budget + self.max_extra_ratio)
+        delay = self.hedge_delay()
+        HEDGE_DELAY.set(delay)
+
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(fn())
+        primary.add_done_callback(lambda task: self._record_primary(task, start))
+        attempts = [primary]
+        hedge_won = False
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done and self._take_hedge():
+                self.hedges += 1
+                HEDGES.inc(outcome="issued")
+                logger.debug(f"Run still pending after {delay:.2f}s, starting a hedge attempt")
+                attempts.append(asyncio.ensure_future(fn()))
+
+            pending = set(attempts)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                            HEDGES.inc(outcome="won")
+                            hedge_won = True
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    if task is primary and hedge_won:
+                        # Censored sample: the first attempt would have taken at least this long
+                        self._latencies.append(time.perf_counter() - start)
+                    task.cancel()
+                elif not task.cancelled():
+                    # Mark a losing attempt's error as retrieved
+                    task.exception()
+
+    def stats(self) -> dict:
+        """Snapshot of hedging counters."""
+        return {
+            "enabled": self.enabled,
+            "hedge_delay_seconds": round(self.hedge_delay(), 4),
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+# Global hedger instance
+_hedger: Optional[Hedger] = None
+
+
+def get_hedger() -> Hedger:
+    """Get the global hedger (singleton)."""
+    global _hedger
+    if _hedger is None:
+        _hedger = Hedger(
+            enabled=settings.hedging_enabled,
+            percentile=settings.hedge_percentile,
+            initial_delay=settings.hedge_initial_delay_seconds,
+            min_delay=settings.hedge_min_delay_seconds,
+            max_extra_ratio=settings.hedge_max_extra_ratio,
+        )
+    return _hedger
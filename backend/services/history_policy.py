@@ -0,0 +1,170 @@
+"""
+Bounded conversation history with a token budget and rolling summarization.
+Wraps a stored session so the agent only sees a running summary of older
+turns plus the most recent turns verbatim. Older turns are folded into the
+summary incrementally, so each request reads only the unsummarized tail of
+the conversation and prompt size stays flat as conversations grow.
+"""
+import logging
+from typing import Optional
+
+from agents.items import TResponseInputItem
+from agents.memory import SessionABC
+
+from config import settings
+from services.session_backend import StoredSession
+from utils.tokens import estimate_item_tokens, estimate_tokens, item_text
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+
+Turn = list[tuple[int, TResponseInputItem]]
+
+
+def split_turns(rows: list[tuple[int, TResponseInputItem]]) -> list[Turn]:
+    """Group ``(row id, item)`` pairs into turns, each starting at a user message."""
+    turns: list[Turn] = []
+    for row in rows:
+        item = row[1]
+        is_user = isinstance(item, dict) and item.get("role") == "user"
+        if is_user or not turns:
+            turns.append([row])
+        else:
+            turns[-1].append(row)
+    return turns
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3].rstrip() + "..."
+
+
+def summarize_turn(turn: Turn) -> str:
+    """Condense one turn into a single summary line (extractive, no model call)."""
+    question = ""
+    answer = ""
+    for _, item in turn:
+        if not isinstance(item, dict):
+            continue
+        if item.get("role") == "user" and not question:
+            question = item_text(item)
+        elif item.get("role") == "assistant":
+            answer = item_text(item) or answer
+    first_sentence = answer.split(". ")[0] if answer else ""
+    line = f"- User asked: {_clip(question, 160)}"
+    if first_sentence:
+        line += f" | Assistant: {_clip(first_sentence, 200)}"
+    return line
+
+
+def fold_into_summary(summary: str, turns: list[Turn], max_tokens: int) -> str:
+    """Append condensed turns to the running summary, dropping its oldest lines past ``max_tokens``."""
+    lines = [line for line in summary.splitlines() if line]
+    lines.extend(summarize_turn(turn) for turn in turns)
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def select_turns(turns: list[Turn], max_turns: int, token_budget: int) -> tuple[list[Turn], list[Turn]]:
+    """
+    Split turns into (older turns to fold into the summary, recent turns kept verbatim).
+    The latest turn is always kept, even if it alone exceeds ``token_budget``.
+    """
+    tokens = sum(estimate_item_tokens(item) for turn in turns for _, item in turn)
+    cut = 0
+    while len(turns) - cut > 1 and (len(turns) - cut > max_turns or tokens > token_budget):
+        tokens -= sum(estimate_item_tokens(item) for _, item in turns[cut])
+        cut += 1
+    return turns[:cut], turns[cut:]
+
+
+def summary_item(summary: str) -> TResponseInputItem:
+    return {"role": "system", "content": f"{SUMMARY_PREFIX}\n{summary}"}
+
+
+class HistoryPolicySession(SessionABC):
+    """Session wrapper enforcing a turn cap and token budget on replayed history."""
+
+    def __init__(
+        self,
+        session: StoredSession,
+        max_turns: int = 6,
+        token_budget: int = 2000,
+        summary_max_tokens: int = 400,
+    ):
+        """
+        Args:
+            session: Underlying stored session
+            max_turns: Most recent turns kept verbatim
+            token_budget: Token budget for summary plus verbatim turns
+            summary_max_tokens: Token cap for the running summary
+        """
+        self.session = session
+        self.session_id = session.session_id
+        self.max_turns = max(1, max_turns)
+        self.summary_max_tokens = summary_max_tokens
+        self.verbatim_budget = max(0, token_budget - summary_max_tokens)
+
+    async def get_items(self, limit: Optional[int] = None) -> list[TResponseInputItem]:
+        """Return the summary (if any) followed by the recent turns within budget."""
+        summary, through_id = await self.session.get_summary()
+        turns = split_turns(await self.session.get_items_after(through_id))
+        folded, turns = select_turns(turns, self.max_turns, self.verbatim_budget)
+
+        if folded:
+            summary = fold_into_summary(summary, folded, self.summary_max_tokens)
+            await self.session.set_summary(summary, folded[-1][-1][0])
+            logger.debug(f"Folded {len(folded)} turns into summary for session {self.session_id}")
+
+        items: list[TResponseInputItem] = []
+        if summary:
+            items.append(summary_item(summary))
+        items.extend(item for turn in turns for _, item in turn)
+        return items[-limit:] if limit else items
+
+    async def add_items(self, items: list[TResponseInputItem]) -> None:
+        """Append items to the stored history."""
+        await self.session.add_items(items)
+
+    async def pop_item(self) -> Optional[TResponseInputItem]:
+        """Remove and return the most recent stored item."""
+        return await self.session.pop_item()
+
+    async def clear_session(self) -> None:
+        """Clear the stored history and its summary."""
+        await self.session.clear_session()
+
+
+def apply_history_policy(session: StoredSession) -> SessionABC:
+    """Wrap a stored session with the configured history policy (if enabled)."""
+    if not settings.history_policy_enabled:
+        return session
+    return HistoryPolicySession(
+        session,
+        max_turns=settings.history_max_turns,
+        token_budget=settings.history_token_budget,
+        summary_max_tokens=settings.history_summary_max_tokens,
+    )
+
+
+def bound_client_history(items: list[TResponseInputItem]) -> list[TResponseInputItem]:
+    """
+    Apply the configured history policy to history held by the client.
+
+    Older turns beyond the turn cap or token budget are condensed into a
+    summary item, like stored sessions, but nothing is persisted: the summary
+    is rebuilt from the client's history on every request.
+    """
+    if not settings.history_policy_enabled:
+        return list(items)
+    verbatim_budget = max(0, settings.history_token_budget - settings.history_summary_max_tokens)
+    folded, turns = select_turns(
+        split_turns(list(enumerate(items))), max(1, settings.history_max_turns), verbatim_budget
+    )
+    bounded: list[TResponseInputItem] = []
+    if folded:
+        bounded.append(summary_item(fold_into_summary("", folded, settings.history_summary_max_tokens)))
+    bounded.extend(item for turn in turns for _, item in turn)
+    return bounded
@@ -0,0 +1,154 @@
+"""
+Shared HTTP client for upstream model calls.
+One explicitly tuned ``httpx.AsyncClient`` per process (connection limits,
+keep-alive expiry, HTTP/2 when the ``h2`` package is installed), created in
+the application lifespan and closed on shutdown. Connection setup is traced
+so new TCP connections and TLS handshakes show up in the metrics.
+"""
+import importlib.util
+import logging
+from typing import Optional
+
+import httpx
+
+from config import settings
+from services.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+CONNECTIONS_OPENED = metrics_registry.counter(
+    "portfolio_http_connections_opened_total",
+    "TCP connections opened to upstream hosts.",
+)
+TLS_HANDSHAKES = metrics_registry.counter(
+    "portfolio_http_tls_handshakes_total",
+    "TLS handshakes with upstream hosts.",
+)
+HTTP_REQUESTS_IN_FLIGHT = metrics_registry.gauge(
+    "portfolio_http_requests_in_flight",
+    "Upstream HTTP requests currently waiting for a response.",
+)
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional ``h2`` package."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper counting in-flight requests and new connections/handshakes."""
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport):
+        self.transport = transport
+
+    async def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            CONNECTIONS_OPENED.inc()
+        elif event_name == "connection.start_tls.complete":
+            TLS_HANDSHAKES.inc()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions = {**request.extensions, "trace": self._trace}
+        with HTTP_REQUESTS_IN_FLIGHT.track_in_progress():
+            return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    def pool_stats(self) -> dict:
+        """Connections currently held by the pool, split into active and idle."""
+        pool = getattr(self.transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "connections": len(connections),
+            "active": len(connections) - idle,
+            "idle": idle,
+        }
+
+
+def create_http_client(
+    max_connections: int = 64,
+    max_keepalive_connections: int = 64,
+    keepalive_expiry: float = 30.0,
+    connect_timeout: float = 5.0,
+    read_timeout: float = 20.0,
+    http2: bool = True,
+) -> httpx.AsyncClient:
+    """
+    Build a tuned, instrumented async HTTP client.
+
+    Args:
+        max_connections: Upper bound on open connections
+        max_keepalive_connections: Idle connections kept for reuse
+        keepalive_expiry: Seconds an idle connection is kept open
+        connect_timeout: Seconds allowed to establish a connection
+        read_timeout: Seconds allowed between bytes of a response
+        http2: Negotiate HTTP/2 when ``h2`` is installed
+
+    Returns:
+        Configured ``httpx.AsyncClient``
+    """
+    use_http2 = http2 and http2_available()
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    transport = InstrumentedTransport(httpx.AsyncHTTPTransport(limits=limits, http2=use_http2))
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+    )
+
+
+# Global shared client
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared upstream HTTP client (singleton)."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+            connect_timeout=settings.http_connect_timeout_seconds,
+            read_timeout=settings.upstream_timeout_seconds,
+            http2=settings.http2_enabled,
+        )
+        logger.info(
+            f"Shared HTTP client created (max {settings.http_max_connections} connections, "
+            f"HTTP/2 {'on' if settings.http2_enabled and http2_available() else 'off'})"
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _pool_metrics():
+    """Scrape-time pool utilisation of the shared client."""
+    if _http_client is None or not isinstance(_http_client._transport, InstrumentedTransport):
+        return
+    stats = _http_client._transport.pool_stats()
+    yield (
+        "portfolio_http_pool_connections", "gauge", "Connections held by the shared HTTP pool.",
+        [
+            ("portfolio_http_pool_connections", {"state": "active"}, stats["active"]),
+            ("portfolio_http_pool_connections", {"state": "idle"}, stats["idle"]),
+        ],
+    )
+    yield (
+        "portfolio_http_pool_max_connections", "gauge", "Connection limit of the shared HTTP pool.",
+        [("portfolio_http_pool_max_connections", {}, settings.http_max_connections)],
+    )
+
+
+metrics_registry.register_collector(_pool_metrics)
@@ -0,0 +1,310 @@
+"""
+Portfolio knowledge base with local BM25 retrieval.
+Portfolio facts live in structured files (``knowledge/*.json``: profile,
+skills, projects). They are split into small chunks and indexed in an
+in-memory inverted index at startup; each run then puts only the chunks
+relevant to the current question into the agent instructions instead of the
+whole portfolio.
+"""
+import hashlib
+import heapq
+import json
+import logging
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from config import settings
+from services.metrics import metrics_registry
+from services.semantic_cache import STOPWORDS, SYNONYMS
+from utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_DURATION = metrics_registry.histogram(
+    "portfolio_knowledge_retrieval_seconds",
+    "Time to retrieve knowledge chunks for one run.",
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05),
+)
+KNOWLEDGE_TOKENS = metrics_registry.histogram(
+    "portfolio_knowledge_prompt_tokens",
+    "Estimated tokens of portfolio knowledge put into the instructions per run.",
+    buckets=(16, 32, 64, 128, 256, 512, 1024, 2048),
+)
+
+_TERM_RE = re.compile(r"[a-z0-9+#]+")
+
+# Section headings in display order
+SECTION_TITLES = {
+    "profile": "Personal Details",
+    "contact": "Contact",
+    "skills": "Skills & Technologies",
+    "projects": "Projects & Repositories",
+}
+
+# Question being answered by the current run (None: include everything)
+_query: ContextVar[Optional[str]] = ContextVar("knowledge_query", default=None)
+
+
+@contextmanager
+def retrieval_query(message: Optional[str]) -> Iterator[None]:
+    """Retrieve knowledge for ``message`` in agent runs inside the block."""
+    token = _query.set(message)
+    try:
+        yield
+    finally:
+        _query.reset(token)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased, stopword-free terms with the semantic cache's synonyms folded."""
+    terms = []
+    for word in _TERM_RE.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        word = SYNONYMS.get(word, word)
+        # Light plural folding ("agents" -> "agent")
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+@dataclass
+class KnowledgeChunk:
+    """One retrievable piece of portfolio knowledge."""
+    id: str
+    section: str
+    text: str
+    keywords: list[str] = field(default_factory=list)
+    # Pinned chunks are always included (who the assistant is talking about)
+    pinned: bool = False
+
+    def index_terms(self) -> list[str]:
+        return tokenize(" ".join([SECTION_TITLES.get(self.section, self.section), self.text, *self.keywords]))
+
+
+def _read_json(path: Path) -> Any:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_portfolio_data(directory: str) -> dict[str, Any]:
+    """
+    Read the structured portfolio files.
+
+    Args:
+        directory: Folder holding ``profile.json``, ``skills.json`` and ``projects.json``
+
+    Returns:
+        Dict with ``profile`` (dict), ``skills`` and ``projects`` (lists); missing
+        files yield empty values
+    """
+    root = Path(directory)
+    data: dict[str, Any] = {"profile": {}, "skills": [], "projects": []}
+    for key in data:
+        path = root / f"{key}.json"
+        if path.exists():
+            data[key] = _read_json(path)
+    return data
+
+
+def load_knowledge(directory: str) -> list[KnowledgeChunk]:
+    """
+    Load and chunk the structured portfolio files.
+
+    Args:
+        directory: Folder holding ``profile.json``, ``skills.json`` and ``projects.json``
+
+    Returns:
+        Chunks in display order
+    """
+    data = load_portfolio_data(directory)
+    chunks: list[KnowledgeChunk] = []
+
+    profile = data["profile"]
+    if profile:
+        details = [f"- **Name**: {profile['name']}"]
+        if "age" in profile:
+            details.append(f"- **Age**: {profile['age']}")
+        if "education" in profile:
+            details.append(f"- **Education**: {profile['education']}")
+        chunks.append(KnowledgeChunk("profile", "profile", "\n".join(details), ["about", "who"], pinned=True))
+        contact = [
+            f"- **{label}**: {profile[key]}"
+            for key, label in (("email", "Email"), ("linkedin", "LinkedIn"), ("github", "GitHub"))
+            if key in profile
+        ]
+        if contact:
+            chunks.append(KnowledgeChunk(
+                "contact", "contact", "\n".join(contact), ["contact", "reach", "hire", "social", "link"]
+            ))
+
+    for group in data["skills"]:
+        chunks.append(KnowledgeChunk(
+            f"skills:{group['category'].lower()}",
+            "skills",
+            f"- **{group['category']}**: {', '.join(group['items'])}",
+            ["skills"],
+        ))
+
+    for project in data["projects"]:
+        text = f"- **{project['name']}**: [{project['repo']}]({project['url']})"
+        if project.get("description"):
+            text += f" – {project['description']}"
+        chunks.append(KnowledgeChunk(
+            f"projects:{project['repo'].lower()}",
+            "projects",
+            text,
+            ["projects", "repository", *project.get("tags", [])],
+        ))
+
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index of chunk terms."""
+
+    def __init__(self, chunks: list[KnowledgeChunk], k1: float = 1.5, b: float = 0.75):
+        start = time.perf_counter()
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self.lengths: list[int] = []
+        for doc_id, chunk in enumerate(chunks):
+            terms = Counter(chunk.index_terms())
+            self.lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((doc_id, tf))
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        count = len(chunks)
+        self.idf = {
+            term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+        self.build_seconds = time.perf_counter() - start
+
+    def search(self, query: str, k: int) -> list[tuple[KnowledgeChunk, float]]:
+        """Top ``k`` chunks with a positive score for ``query``, best first."""
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.chunks[doc_id], score) for doc_id, score in ranked]
+
+
+class KnowledgeBase:
+    """Chunks, their index, and rendering of the knowledge section of the prompt."""
+
+    def __init__(self, chunks: list[KnowledgeChunk], top_k: int = 4):
+        """
+        Args:
+            chunks: Knowledge chunks in display order
+            top_k: Chunks retrieved per question (in addition to pinned chunks)
+        """
+        self.chunks = chunks
+        self.top_k = top_k
+        self.index = BM25Index(chunks)
+        digest = hashlib.sha256("\0".join(c.id + c.text for c in chunks).encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+
+    @classmethod
+    def from_directory(cls, directory: str, top_k: int = 4) -> "KnowledgeBase":
+        knowledge = cls(load_knowledge(directory), top_k=top_k)
+        logger.info(
+            f"Knowledge index built: {len(knowledge.chunks)} chunks, "
+            f"{len(knowledge.index.postings)} terms in {knowledge.index.build_seconds * 1000:.2f}ms"
+        )
+        return knowledge
+
+    def retrieve(self, query: str) -> list[KnowledgeChunk]:
+        """Pinned chunks plus the top-k matches for ``query``, in display order."""
+        with RETRIEVAL_DURATION.time():
+            matched = {chunk.id for chunk, _ in self.index.search(query, self.top_k)}
+        return [c for c in self.chunks if c.pinned or c.id in matched]
+
+    def render(self, chunks: Optional[list[KnowledgeChunk]] = None) -> str:
+        """Markdown knowledge section (all chunks when ``chunks`` is None)."""
+        chunks = self.chunks if chunks is None else chunks
+        lines = ["# Portfolio Owner Information"]
+        section = None
+        for chunk in chunks:
+            if chunk.section != section:
+                section = chunk.section
+                lines.append(f"\n## {SECTION_TITLES.get(section, section.title())}")
+            lines.append(chunk.text)
+        return "\n".join(lines)
+
+    def context_for(self, query: Optional[str]) -> str:
+        """
+        Knowledge section for a question. Everything is included when no
+        question is known or nothing beyond the pinned chunks matches it
+        ("yes", "tell me more"), since it may then be about anything.
+        """
+        if not query:
+            return self.render()
+        chunks = self.retrieve(query)
+        if all(chunk.pinned for chunk in chunks):
+            return self.render()
+        return self.render(chunks)
+
+    def stats(self) -> dict:
+        return {
+            "chunks": len(self.chunks),
+            "terms": len(self.index.postings),
+            "build_ms": round(self.index.build_seconds * 1000, 3),
+            "top_k": self.top_k,
+            "version": self.version,
+        }
+
+
+class KnowledgeInstructions:
+    """
+    Agent instructions callable that fills ``{knowledge}`` in ``template`` with
+    the chunks relevant to the run's :func:`retrieval_query`.
+    ``str()`` is stable per template and knowledge version, so response cache
+    keys built from the instructions stay valid across runs.
+    """
+
+    def __init__(self, template: str, knowledge: KnowledgeBase, retrieval_enabled: bool = True):
+        self.template = template
+        self.knowledge = knowledge
+        self.retrieval_enabled = retrieval_enabled
+
+    def render(self, query: Optional[str]) -> str:
+        section = self.knowledge.context_for(query if self.retrieval_enabled else None)
+        KNOWLEDGE_TOKENS.observe(estimate_tokens(section))
+        return self.template.format(knowledge=section)
+
+    def __call__(self, context: Any, agent: Any) -> str:
+        return self.render(_query.get())
+
+    def __str__(self) -> str:
+        mode = f"top{self.knowledge.top_k}" if self.retrieval_enabled else "full"
+        return f"{self.template}\0{self.knowledge.version}\0{mode}"
+
+
+# Global knowledge base
+_knowledge_base: Optional[KnowledgeBase] = None
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    """Get the portfolio knowledge base, building its index on first use (singleton)."""
+    global _knowledge_base
+    if _knowledge_base is None:
+        _knowledge_base = KnowledgeBase.from_directory(
+            settings.knowledge_dir, top_k=settings.knowledge_top_k
+        )
+    return _knowledge_base
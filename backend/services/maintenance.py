@@ -0,0 +1,258 @@
+"""
+Background maintenance for the session database.
+Periodically expires idle sessions, checkpoints the WAL and incrementally
+vacuums free pages so ``conversations.db`` stays small enough to live in the
+page cache. Each run reports reclaimed bytes and its run time.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+from typing import IO, Optional
+
+from config import settings
+from services.session_store import (
+    MESSAGES_TABLE,
+    SESSIONS_TABLE,
+    SUMMARIES_TABLE,
+    USAGE_TABLE,
+    SessionStore,
+    get_session_store,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# SQLite auto_vacuum modes
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+@dataclass
+class MaintenanceReport:
+    """Outcome of one maintenance run."""
+    expired_sessions: int
+    deleted_messages: int
+    checkpointed_pages: int
+    vacuumed_pages: int
+    bytes_before: int
+    bytes_after: int
+    reclaimed_bytes: int
+    duration_ms: float
+    finished_at: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _database_bytes(db_path: str) -> int:
+    """Combined size of the database file and its WAL/SHM side files."""
+    total = 0
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            total += os.path.getsize(db_path + suffix)
+        except OSError:
+            pass
+    return total
+
+
+class SessionMaintenance:
+    """Runs TTL expiry, WAL checkpointing and incremental vacuum on a session store."""
+
+    def __init__(
+        self,
+        store: SessionStore,
+        session_ttl_seconds: float,
+        vacuum_pages: int = 0,
+        expire_batch_size: int = 500,
+    ):
+        """
+        Args:
+            store: Session store to maintain
+            session_ttl_seconds: Idle time after which a session expires (0 disables expiry)
+            vacuum_pages: Free pages to reclaim per run (0 reclaims all of them)
+            expire_batch_size: Sessions deleted per write transaction
+        """
+        self.store = store
+        self.session_ttl_seconds = session_ttl_seconds
+        self.vacuum_pages = vacuum_pages
+        self.expire_batch_size = max(1, expire_batch_size)
+        self.last_report: Optional[MaintenanceReport] = None
+        self._incremental_vacuum_ready = False
+
+    def _ensure_incremental_vacuum(self) -> None:
+        """Switch the database to incremental auto-vacuum (a one-time full VACUUM)."""
+        if self._incremental_vacuum_ready or self.store.db_path == ":memory:":
+            return
+        with self.store.write_connection() as conn:
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if mode != AUTO_VACUUM_INCREMENTAL:
+                logger.info("Enabling incremental auto-vacuum on session database (one-time VACUUM)")
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+        self._incremental_vacuum_ready = True
+
+    def expire_idle_sessions(self) -> tuple[int, int]:
+        """
+        Delete sessions idle longer than the TTL, in bounded batches.
+
+        Returns:
+            Tuple of (expired sessions, deleted messages)
+        """
+        if self.session_ttl_seconds <= 0:
+            return 0, 0
+
+        cutoff = f"-{int(self.session_ttl_seconds)} seconds"
+        expired = deleted = 0
+        while True:
+            with self.store.write_connection() as conn:
+                session_ids = [
+                    row[0]
+                    for row in conn.execute(
+                        f"SELECT session_id FROM {SESSIONS_TABLE} "
+                        "WHERE updated_at < datetime('now', ?) LIMIT ?",
+                        (cutoff, self.expire_batch_size),
+                    ).fetchall()
+                ]
+                if not session_ids:
+                    return expired, deleted
+                placeholders = ",".join("?" * len(session_ids))
+                deleted += conn.execute(
+                    f"DELETE FROM {MESSAGES_TABLE} WHERE session_id IN ({placeholders})",
+                    session_ids,
+                ).rowcount
+                conn.execute(
+                    f"DELETE FROM {SUMMARIES_TABLE} WHERE session_id IN ({placeholders})",
+                    session_ids,
+                )
+                conn.execute(
+                    f"DELETE FROM {USAGE_TABLE} WHERE session_id IN ({placeholders})",
+                    session_ids,
+                )
+                conn.execute(
+                    f"DELETE FROM {SESSIONS_TABLE} WHERE session_id IN ({placeholders})",
+                    session_ids,
+                )
+                conn.commit()
+                expired += len(session_ids)
+
+    def checkpoint_wal(self) -> int:
+        """Checkpoint the WAL into the main database and truncate it."""
+        with self.store.write_connection() as conn:
+            busy, _, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        if busy:
+            logger.debug("WAL checkpoint could not complete (active readers)")
+        return max(0, checkpointed)
+
+    def incremental_vacuum(self) -> int:
+        """Return free pages to the filesystem."""
+        with self.store.write_connection() as conn:
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free_pages:
+                pages = self.vacuum_pages or free_pages
+                conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+                conn.commit()
+            return free_pages - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def run_once(self) -> MaintenanceReport:
+        """Run every maintenance step once (blocking; call from a worker thread)."""
+        start = time.perf_counter()
+        bytes_before = _database_bytes(self.store.db_path)
+
+        self._ensure_incremental_vacuum()
+        expired, deleted = self.expire_idle_sessions()
+        vacuumed = self.incremental_vacuum()
+        # Checkpoint last so vacuumed pages are written back and the WAL is truncated
+        checkpointed = self.checkpoint_wal()
+
+        bytes_after = _database_bytes(self.store.db_path)
+        report = MaintenanceReport(
+            expired_sessions=expired,
+            deleted_messages=deleted,
+            checkpointed_pages=checkpointed,
+            vacuumed_pages=vacuumed,
+            bytes_before=bytes_before,
+            bytes_after=bytes_after,
+            reclaimed_bytes=max(0, bytes_before - bytes_after),
+            duration_ms=round((time.perf_counter() - start) * 1000, 2),
+            finished_at=time.time(),
+        )
+        self.last_report = report
+        logger.info(
+            f"Session maintenance: expired {expired} sessions ({deleted} messages), "
+            f"vacuumed {vacuumed} pages, reclaimed {report.reclaimed_bytes} bytes "
+            f"in {report.duration_ms} ms"
+        )
+        return report
+
+
+class MaintenanceLock:
+    """
+    Non-blocking advisory lock on a file next to the database.
+    With several worker processes on one database only the holder runs
+    maintenance; the lock is freed when its process exits, so another
+    worker takes over on its next attempt.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[IO] = None
+
+    def acquire(self) -> bool:
+        """Take the lock if it is free (always succeeds without ``fcntl``)."""
+        if self._file is not None or fcntl is None:
+            return True
+        lock_file = open(self.path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+async def run_maintenance_loop(maintenance: SessionMaintenance, interval_seconds: float) -> None:
+    """Run maintenance every ``interval_seconds`` until cancelled (in one worker per database)."""
+    lock = None
+    if maintenance.store.db_path != ":memory:":
+        lock = MaintenanceLock(maintenance.store.db_path + ".maintenance.lock")
+    try:
+        while True:
+            if lock is None or lock.acquire():
+                try:
+                    await asyncio.to_thread(maintenance.run_once)
+                except asyncio.CancelledError:
+                    raise
+                except sqlite3.Error as e:
+                    logger.error(f"Session maintenance failed: {e}", exc_info=True)
+            await asyncio.sleep(interval_seconds)
+    finally:
+        if lock is not None:
+            lock.release()
+
+
+# Global maintenance instance
+_maintenance: Optional[SessionMaintenance] = None
+
+
+def get_session_maintenance() -> SessionMaintenance:
+    """Get the maintenance runner for the process-wide session store."""
+    global _maintenance
+    if _maintenance is None or _maintenance.store is not get_session_store():
+        _maintenance = SessionMaintenance(
+            get_session_store(),
+            session_ttl_seconds=settings.session_ttl_hours * 3600,
+            vacuum_pages=settings.vacuum_pages_per_run,
+        )
+    return _maintenance
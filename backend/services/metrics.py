@@ -0,0 +1,335 @@
+"""
+In-process metrics with Prometheus text exposition.
+Provides counters, gauges and histograms with labels, plus scrape-time
+collectors for components that keep their own counters (e.g. the caches).
+No external client library is required.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# A sample is (metric name, labels, value)
+Sample = tuple[str, dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _labels(self, key: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.label_names, key))
+
+    def samples(self) -> list[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[Sample]:
+        with self._lock:
+            return [(self.name, self._labels(k), v) for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track_in_progress(self, **labels: str) -> Iterator[None]:
+        """Increment for the duration of the block."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> list[Sample]:
+        with self._lock:
+            return [(self.name, self._labels(k), v) for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram of observed values (seconds, by convention)."""
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall-clock duration of the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> list[Sample]:
+        samples: list[Sample] = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                labels = self._labels(key)
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    le = "+Inf" if math.isinf(bound) else _format_value(bound)
+                    samples.append((f"{self.name}_bucket", {**labels, "le": le}, cumulative))
+                samples.append((f"{self.name}_sum", labels, self._sums[key]))
+                samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """Holds metrics and scrape-time collectors and renders the text format."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], Iterable[tuple[str, str, str, list[Sample]]]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def register_collector(
+        self, collector: Callable[[], Iterable[tuple[str, str, str, list[Sample]]]]
+    ) -> None:
+        """
+        Register a callable evaluated at scrape time.
+        It yields ``(name, type, documentation, samples)`` tuples.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        families = [
+            (m.name, m.type_name, m.documentation, m.samples()) for m in self._metrics.values()
+        ]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        lines = []
+        for name, type_name, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {type_name}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+metrics_registry = MetricsRegistry()
+
+# Per-stage latency
+REQUEST_DURATION = metrics_registry.histogram(
+    "portfolio_request_duration_seconds",
+    "Total HTTP request time.",
+    ("method", "path", "status"),
+)
+SESSION_LOAD_DURATION = metrics_registry.histogram(
+    "portfolio_session_load_seconds",
+    "Time spent reading conversation history from the session store.",
+    ("operation",),
+)
+SESSION_WRITE_DURATION = metrics_registry.histogram(
+    "portfolio_session_write_seconds",
+    "Time spent writing conversation history to the session store.",
+    ("operation",),
+)
+SESSION_FLUSH_DURATION = metrics_registry.histogram(
+    "portfolio_session_flush_seconds",
+    "Time spent writing a batch of queued session changes to SQLite (off the request path).",
+)
+AGENT_RUN_DURATION = metrics_registry.histogram(
+    "portfolio_agent_run_seconds",
+    "Time spent in Runner.run (agent loop and model calls).",
+    ("mode",),
+)
+SERIALIZATION_DURATION = metrics_registry.histogram(
+    "portfolio_response_serialization_seconds",
+    "Time spent rendering JSON response bodies.",
+)
+
+# Counters and gauges
+ERRORS = metrics_registry.counter(
+    "portfolio_errors_total",
+    "Errors by exception type.",
+    ("type",),
+)
+SESSION_HOT_TIER_LOOKUPS = metrics_registry.counter(
+    "portfolio_session_hot_tier_lookups_total",
+    "Session lookups in the in-memory hot tier by result (hit, miss).",
+    ("result",),
+)
+SESSION_FLUSHED_WRITES = metrics_registry.counter(
+    "portfolio_session_flushed_writes_total",
+    "Queued session changes written to SQLite by the background flusher.",
+)
+SESSION_DEAD_LETTERED_WRITES = metrics_registry.counter(
+    "portfolio_session_dead_lettered_writes_total",
+    "Queued session changes dropped after failing every flush attempt.",
+)
+AGENT_RUNS_IN_FLIGHT = metrics_registry.gauge(
+    "portfolio_agent_runs_in_flight",
+    "Agent runs currently in progress.",
+)
+
+
+def record_error(error: BaseException) -> None:
+    """Count an error by its exception type."""
+    ERRORS.inc(type=type(error).__name__)
+
+
+@contextmanager
+def track_agent_run(mode: str) -> Iterator[None]:
+    """Time an agent run and count it as in flight while it runs."""
+    with AGENT_RUNS_IN_FLIGHT.track_in_progress(), AGENT_RUN_DURATION.time(mode=mode):
+        yield
+
+
+def render_metrics() -> str:
+    """Render the global registry."""
+    return metrics_registry.render()
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware observing total request time per route.
+    Timing ends when the response body is complete, so streamed responses are
+    measured to their last event. Paths are labelled by route template to keep
+    label cardinality bounded.
+    """
+
+    def __init__(self, app, excluded_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.excluded_paths = set(excluded_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                path=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            )
@@ -0,0 +1,251 @@
+"""
+Latency- and error-aware routing across an ordered list of models.
+Each request goes to the first configured model that is currently healthy
+(breaker not open, recent error rate and latency within bounds) and falls
+back down the list when a model fails, times out or has its breaker open.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional, Sequence
+
+import openai
+from agents.models.interface import Model
+
+from config import settings
+from services.metrics import metrics_registry
+from services.resilience import CircuitBreaker, CircuitOpenError, is_retryable
+
+logger = logging.getLogger(__name__)
+
+LATENCY_EWMA = metrics_registry.gauge(
+    "portfolio_model_latency_ewma_seconds",
+    "Exponentially weighted moving average of model latency (time to first event when streaming).",
+    ("model",),
+)
+ERROR_RATE_EWMA = metrics_registry.gauge(
+    "portfolio_model_error_rate_ewma",
+    "Exponentially weighted moving average of the model call failure rate.",
+    ("model",),
+)
+MODEL_CALLS = metrics_registry.counter(
+    "portfolio_model_calls_total",
+    "Routed model calls by model and outcome.",
+    ("model", "outcome"),
+)
+FALLBACKS = metrics_registry.counter(
+    "portfolio_model_fallbacks_total",
+    "Model calls that fell back to the next model, by the model that failed.",
+    ("model",),
+)
+
+
+@dataclass
+class ServedModel:
+    """Name of the model that answered the current run."""
+    name: str
+
+
+# Holder filled in by the router; shared (not copied) with tasks the runner spawns
+_served_model: ContextVar[Optional[ServedModel]] = ContextVar("served_model", default=None)
+
+
+@contextmanager
+def track_served_model() -> Iterator[ServedModel]:
+    """Record which model answers the runs inside the block."""
+    served = ServedModel(settings.default_model)
+    token = _served_model.set(served)
+    try:
+        yield served
+    finally:
+        _served_model.reset(token)
+
+
+def should_fall_back(error: BaseException) -> bool:
+    """Failures that another model might not have: outages, timeouts, open breakers, unknown models."""
+    if isinstance(error, CircuitOpenError):
+        return True
+    if isinstance(error, openai.NotFoundError):
+        return True
+    return is_retryable(error)
+
+
+class ModelRoute:
+    """One candidate model and its recent latency/error statistics."""
+
+    def __init__(self, name: str, model: Model, alpha: float = 0.3):
+        """
+        Args:
+            name: Model name (metrics label)
+            model: Model to call, usually a ``ResilientModel``
+            alpha: EWMA smoothing factor (weight of the newest sample)
+        """
+        self.name = name
+        self.model = model
+        self.alpha = alpha
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.last_sample: Optional[float] = None
+
+    @property
+    def breaker(self) -> Optional[CircuitBreaker]:
+        return getattr(self.model, "breaker", None)
+
+    @property
+    def breaker_open(self) -> bool:
+        return self.breaker is not None and self.breaker.state == "open"
+
+    def is_fresh(self, now: float, stale_after: float) -> bool:
+        return self.last_sample is not None and now - self.last_sample < stale_after
+
+    def record_success(self, latency: float) -> None:
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += self.alpha * (latency - self.latency_ewma)
+        self._record(0.0)
+        LATENCY_EWMA.set(self.latency_ewma, model=self.name)
+        MODEL_CALLS.inc(model=self.name, outcome="success")
+
+    def record_failure(self) -> None:
+        self._record(1.0)
+        MODEL_CALLS.inc(model=self.name, outcome="failure")
+
+    def _record(self, error: float) -> None:
+        self.error_ewma += self.alpha * (error - self.error_ewma)
+        self.last_sample = time.monotonic()
+        ERROR_RATE_EWMA.set(self.error_ewma, model=self.name)
+
+    def stats(self) -> dict:
+        return {
+            "latency_ewma_seconds": self.latency_ewma,
+            "error_rate_ewma": round(self.error_ewma, 4),
+            "breaker": self.breaker.stats() if self.breaker is not None else None,
+        }
+
+
+class RoutedModel(Model):
+    """
+    Agents SDK model that routes each call across ``routes``.
+
+    Configuration order is the preference order: a model is only passed over
+    while it is degraded (breaker open, error-rate EWMA at or above
+    ``max_error_rate``, or latency EWMA more than ``latency_tolerance`` times
+    the fastest healthy model). Statistics older than ``stale_after`` seconds
+    are ignored so degraded models are probed again once traffic moves away.
+    """
+
+    def __init__(
+        self,
+        routes: Sequence[ModelRoute],
+        latency_tolerance: float = 1.5,
+        max_error_rate: float = 0.5,
+        stale_after: float = 30.0,
+    ):
+        if not routes:
+            raise ValueError("RoutedModel needs at least one route")
+        self.routes = list(routes)
+        self.latency_tolerance = latency_tolerance
+        self.max_error_rate = max_error_rate
+        self.stale_after = stale_after
+
+    @property
+    def inner(self) -> Model:
+        """The preferred (first configured) model."""
+        return self.routes[0].model
+
+    def candidates(self) -> list[ModelRoute]:
+        """Routes in the order they should be tried for the next call."""
+        now = time.monotonic()
+        fresh = [r for r in self.routes if r.is_fresh(now, self.stale_after)]
+        latencies = [
+            r.latency_ewma for r in fresh
+            if r.latency_ewma is not None and r.error_ewma < self.max_error_rate and not r.breaker_open
+        ]
+        best = min(latencies) if latencies else None
+
+        healthy, degraded = [], []
+        for route in self.routes:
+            slow = (
+                best is not None
+                and route.latency_ewma is not None
+                and route.latency_ewma > best * self.latency_tolerance
+            )
+            failing = route.error_ewma >= self.max_error_rate
+            if route.breaker_open or (route in fresh and (slow or failing)):
+                degraded.append(route)
+            else:
+                healthy.append(route)
+        # Degraded models remain as a last resort, least bad first
+        degraded.sort(key=lambda r: (
+            r.breaker_open, r.error_ewma, r.latency_ewma if r.latency_ewma is not None else 0.0
+        ))
+        return healthy + degraded
+
+    def _served_by(self, route: ModelRoute) -> None:
+        served = _served_model.get()
+        if served is not None:
+            served.name = route.name
+
+    def _fell_back(self, route: ModelRoute, error: BaseException, remaining: int) -> None:
+        FALLBACKS.inc(model=route.name)
+        if remaining:
+            logger.warning(f"Model {route.name} failed ({type(error).__name__}: {error}), falling back")
+
+    async def get_response(self, *args, **kwargs):
+        candidates = self.candidates()
+        for index, route in enumerate(candidates):
+            start = time.perf_counter()
+            try:
+                result = await route.model.get_response(*args, **kwargs)
+            except Exception as e:
+                if not should_fall_back(e):
+                    raise
+                route.record_failure()
+                remaining = len(candidates) - index - 1
+                self._fell_back(route, e, remaining)
+                if not remaining:
+                    raise
+                continue
+            route.record_success(time.perf_counter() - start)
+            self._served_by(route)
+            return result
+
+    async def stream_response(self, *args, **kwargs) -> AsyncIterator:
+        """
+        Stream from the first healthy model. Falls back only while no event
+        has been yielded; a stream that breaks midway raises to the caller.
+        """
+        candidates = self.candidates()
+        for index, route in enumerate(candidates):
+            start = time.perf_counter()
+            started = False
+            events = route.model.stream_response(*args, **kwargs).__aiter__()
+            try:
+                async for event in events:
+                    if not started:
+                        started = True
+                        route.record_success(time.perf_counter() - start)
+                        self._served_by(route)
+                    yield event
+            except Exception as e:
+                if not should_fall_back(e):
+                    raise
+                route.record_failure()
+                if started:
+                    raise
+                remaining = len(candidates) - index - 1
+                self._fell_back(route, e, remaining)
+                if not remaining:
+                    raise
+                continue
+            finally:
+                if hasattr(events, "aclose"):
+                    await events.aclose()
+            return
+
+    def stats(self) -> dict:
+        """Per-model routing statistics, in configuration order."""
+        return {route.name: route.stats() for route in self.routes}
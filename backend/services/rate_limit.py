@@ -0,0 +1,352 @@
+"""
+Per-client rate limiting with token buckets.
+Each client IP and each session id gets a bucket that refills at a steady
+rate up to a burst size; a chat request spends one token from both. Buckets
+live in a bounded in-process LRU by default, or in a small SQLite database
+shared by every worker on the host (``RATE_LIMIT_BACKEND=sqlite``).
+"""
+import asyncio
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from config import settings
+from services.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED = metrics_registry.counter(
+    "portfolio_rate_limited_total",
+    "Requests refused by the per-client rate limiter.",
+    ("scope",),
+)
+
+# Only this much of a request body is buffered to find its session id
+MAX_INSPECTED_BODY_BYTES = 64 * 1024
+
+
+@dataclass
+class BucketLimit:
+    """Refill rate (tokens per second) and burst size of a bucket."""
+    rate: float
+    burst: float
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: float) -> "BucketLimit":
+        return cls(rate=requests_per_minute / 60.0, burst=max(1.0, burst))
+
+
+def refill(tokens: float, updated: float, now: float, limit: BucketLimit) -> float:
+    """Tokens in a bucket at ``now``, given its level at ``updated``."""
+    return min(limit.burst, tokens + max(0.0, now - updated) * limit.rate)
+
+
+class MemoryBucketStore:
+    """Bounded LRU of buckets for a single process."""
+    blocking = False
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max(1, max_keys)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: BucketLimit, now: float) -> tuple[bool, float]:
+        """
+        Spend one token from ``key``'s bucket.
+
+        Returns:
+            Tuple of (allowed, tokens left)
+        """
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (limit.burst, now))
+            tokens = refill(tokens, updated, now, limit)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            self._buckets[key] = (tokens, now)
+            # Evicted buckets are the least recently seen, so usually already full
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed, tokens
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def close(self) -> None:
+        self._buckets.clear()
+
+
+class SQLiteBucketStore:
+    """Buckets in a SQLite file, shared by every worker process on the host."""
+    blocking = True
+
+    def __init__(self, db_path: str, max_keys: int = 10000):
+        self.db_path = db_path
+        self.max_keys = max(1, max_keys)
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, timeout=5.0, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+            """
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def take(self, key: str, limit: BucketLimit, now: float) -> tuple[bool, float]:
+        """Spend one token from ``key``'s bucket (atomic across processes)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens = refill(*(row or (limit.burst, now)), now, limit)
+                allowed = tokens >= 1.0
+                if allowed:
+                    tokens -= 1.0
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) "
+                    "VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._prune()
+            return allowed, tokens
+
+    def _prune(self) -> None:
+        # Keep the most recently used buckets only
+        self._conn.execute(
+            """
+            DELETE FROM rate_limit_buckets WHERE key NOT IN (
+                SELECT key FROM rate_limit_buckets ORDER BY updated DESC LIMIT ?
+            )
+            """,
+            (self.max_keys,),
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rate_limit_buckets").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of a rate-limit check."""
+    allowed: bool
+    scope: Optional[str] = None
+    retry_after: int = 0
+
+
+class RateLimiter:
+    """Token-bucket limits per client IP and per session id."""
+
+    def __init__(
+        self,
+        store,
+        ip_limit: BucketLimit,
+        session_limit: BucketLimit,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            store: Bucket store (:class:`MemoryBucketStore` or :class:`SQLiteBucketStore`)
+            ip_limit: Limit applied to each client IP
+            session_limit: Limit applied to each session id
+            enabled: When False every request is allowed
+        """
+        self.store = store
+        self.ip_limit = ip_limit
+        self.session_limit = session_limit
+        self.enabled = enabled
+
+    def _check_sync(self, client_ip: Optional[str], session_id: Optional[str]) -> RateLimitDecision:
+        now = time.time()
+        checks = [("ip", client_ip, self.ip_limit), ("session", session_id, self.session_limit)]
+        for scope, value, limit in checks:
+            if not value:
+                continue
+            allowed, tokens = self.store.take(f"{scope}:{value}", limit, now)
+            if not allowed:
+                retry_after = math.ceil((1.0 - tokens) / limit.rate) if limit.rate else 60
+                return RateLimitDecision(False, scope, max(1, retry_after))
+        return RateLimitDecision(True)
+
+    async def check(self, client_ip: Optional[str], session_id: Optional[str]) -> RateLimitDecision:
+        """Spend a token from the client's IP and session buckets."""
+        if not self.enabled:
+            return RateLimitDecision(True)
+        if self.store.blocking:
+            decision = await asyncio.to_thread(self._check_sync, client_ip, session_id)
+        else:
+            decision = self._check_sync(client_ip, session_id)
+        if not decision.allowed:
+            RATE_LIMITED.inc(scope=decision.scope)
+            logger.info(f"Rate limited {decision.scope} (ip={client_ip}, session={session_id})")
+        return decision
+
+
+def _client_ip(scope, trusted_proxies: int = 0) -> Optional[str]:
+    """
+    The address to limit. Behind ``trusted_proxies`` proxies that append to
+    X-Forwarded-For, the client is the entry the outermost of them added
+    (that many from the right); entries left of it are client-controlled.
+    """
+    if trusted_proxies > 0:
+        entries = [
+            entry.strip()
+            for name, value in scope.get("headers", [])
+            if name == b"x-forwarded-for"
+            for entry in value.decode("latin-1").split(",")
+            if entry.strip()
+        ]
+        if entries:
+            return entries[-min(trusted_proxies, len(entries))]
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+def _session_id(scope, body: bytes) -> Optional[str]:
+    if body:
+        try:
+            session_id = json.loads(body).get("session_id")
+            if isinstance(session_id, str) and session_id:
+                return session_id
+        except (ValueError, AttributeError):
+            pass
+    cookie_name = settings.session_cookie_name.encode()
+    for name, value in scope.get("headers", []):
+        if name == b"cookie":
+            for part in value.split(b";"):
+                key, _, cookie_value = part.strip().partition(b"=")
+                if key == cookie_name and cookie_value:
+                    return cookie_value.decode("latin-1")
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying :class:`RateLimiter` to the chat endpoints.
+    The request body is buffered (up to a cap) to read its session id, then
+    replayed to the application unchanged.
+    """
+
+    def __init__(self, app, paths: Iterable[str], trusted_proxies: int = 0):
+        """
+        Args:
+            app: ASGI application to wrap
+            paths: Request paths that are limited
+            trusted_proxies: Proxies in front of the app that append to
+                X-Forwarded-For (0 = use the peer address)
+        """
+        self.app = app
+        self.paths = set(paths)
+        self.trusted_proxies = max(0, trusted_proxies)
+
+    async def __call__(self, scope, receive, send):
+        limiter = get_rate_limiter()
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+            or not limiter.enabled
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        messages = []
+        body = b""
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            if not message.get("more_body") or len(body) > MAX_INSPECTED_BODY_BYTES:
+                break
+
+        inspected = body if len(body) <= MAX_INSPECTED_BODY_BYTES else b""
+        decision = await limiter.check(
+            _client_ip(scope, self.trusted_proxies), _session_id(scope, inspected)
+        )
+        if not decision.allowed:
+            detail = f"Too many requests for this {decision.scope}, retry in {decision.retry_after}s"
+            payload = json.dumps({
+                "success": False,
+                "error": "Rate limit exceeded",
+                "detail": detail,
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode()),
+                    (b"retry-after", str(decision.retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": payload})
+            return
+
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+
+# Global rate limiter instance
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the global rate limiter (singleton)."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        if settings.rate_limit_backend == "sqlite":
+            store = SQLiteBucketStore(settings.rate_limit_db_path, settings.rate_limit_max_keys)
+        else:
+            store = MemoryBucketStore(settings.rate_limit_max_keys)
+        _rate_limiter = RateLimiter(
+            store,
+            ip_limit=BucketLimit.per_minute(
+                settings.rate_limit_ip_per_minute, settings.rate_limit_ip_burst
+            ),
+            session_limit=BucketLimit.per_minute(
+                settings.rate_limit_session_per_minute, settings.rate_limit_session_burst
+            ),
+            enabled=settings.rate_limit_enabled,
+        )
+    return _rate_limiter
+
+
+def close_rate_limiter() -> None:
+    """Release the rate limiter's store."""
+    global _rate_limiter
+    if _rate_limiter is not None:
+        _rate_limiter.store.close()
+        _rate_limiter = None
@@ -0,0 +1,337 @@
+"""
+Resilience layer for upstream model calls.
+Wraps an agents SDK ``Model`` with a per-request deadline budget, bounded
+retries with exponential backoff and full jitter for retryable errors, and a
+circuit breaker that fails fast while the upstream is unhealthy.
+"""
+import asyncio
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+import openai
+from agents.models.interface import Model
+
+from config import settings
+from services.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+RETRIES = metrics_registry.counter(
+    "portfolio_upstream_retries_total",
+    "Upstream model calls retried after a retryable error.",
+)
+FAILURES = metrics_registry.counter(
+    "portfolio_upstream_failures_total",
+    "Failed upstream model call attempts by kind.",
+    ("kind",),
+)
+FAST_FAILS = metrics_registry.counter(
+    "portfolio_circuit_open_rejections_total",
+    "Model calls refused while the circuit breaker was open.",
+)
+
+# Absolute (monotonic) deadline for the current request, if any
+_deadline: ContextVar[Optional[float]] = ContextVar("upstream_deadline", default=None)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the breaker is open."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Model provider unavailable, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the request's time budget runs out before the model answers."""
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Give model calls inside the block ``seconds`` in total (None/0 = no deadline)."""
+    token = _deadline.set(time.monotonic() + seconds if seconds else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left before the current request's deadline (None if unbounded)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transport failures, timeouts, rate limits and 5xx responses are worth retrying."""
+    if isinstance(error, (openai.APIConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    ``closed`` passes calls through; after ``failure_threshold`` failures in a
+    row it turns ``open`` and refuses calls for ``reset_timeout`` seconds, then
+    lets a single trial call through (``half_open``) to decide whether to close.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self._trial_in_progress = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> int:
+        if self.opened_at is None:
+            return 0
+        return max(1, int(self.reset_timeout - (time.monotonic() - self.opened_at)) + 1)
+
+    def before_call(self) -> None:
+        """
+        Admit a call or fail fast.
+
+        Raises:
+            CircuitOpenError: While open, or while a half-open trial is running
+        """
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._trial_in_progress:
+            self._trial_in_progress = True
+            logger.info("Circuit breaker half-open, sending a trial request")
+            return
+        FAST_FAILS.inc()
+        raise CircuitOpenError(self.retry_after())
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Circuit breaker closed, upstream recovered")
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        trial_failed = self._trial_in_progress
+        self._trial_in_progress = False
+        if trial_failed or (
+            self.opened_at is None and self.consecutive_failures >= self.failure_threshold
+        ):
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+            logger.warning(
+                f"Circuit breaker opened after {self.consecutive_failures} consecutive failures"
+            )
+
+    def record_abandoned(self) -> None:
+        """A call was cancelled before it finished; free the half-open trial slot."""
+        self._trial_in_progress = False
+
+    def stats(self) -> dict:
+        """Breaker state for health reporting."""
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "times_opened": self.times_opened,
+            "retry_after_seconds": self.retry_after() if state == "open" else 0,
+        }
+
+
+@dataclass
+class RetryPolicy:
+    """Bounded retries with exponential backoff and full jitter."""
+    max_attempts: int = 3
+    base_delay: float = 0.25
+    max_delay: float = 4.0
+    attempt_timeout: float = 20.0
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number ``attempt`` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class ResilientModel(Model):
+    """Agents SDK model wrapper adding deadlines, retries and a circuit breaker."""
+
+    def __init__(
+        self,
+        inner: Model,
+        breaker: Optional[CircuitBreaker] = None,
+        policy: Optional[RetryPolicy] = None,
+    ):
+        """
+        Args:
+            inner: Model making the actual upstream calls
+            breaker: Circuit breaker shared by calls to this upstream
+            policy: Retry and timeout policy
+        """
+        self.inner = inner
+        self.breaker = breaker or CircuitBreaker()
+        self.policy = policy or RetryPolicy()
+
+    def _attempt_timeout(self) -> tuple[float, bool]:
+        """Timeout for the next attempt and whether the request deadline is what bounds it."""
+        remaining = remaining_budget()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded("Request deadline exceeded before the model answered")
+        if remaining is not None and remaining < self.policy.attempt_timeout:
+            return remaining, True
+        return self.policy.attempt_timeout, False
+
+    async def _before_retry(self, attempt: int, error: BaseException) -> None:
+        """Sleep before the next attempt, or re-raise if no attempt or budget is left."""
+        if attempt >= self.policy.max_attempts:
+            raise error
+        delay = self.policy.backoff(attempt)
+        remaining = remaining_budget()
+        if remaining is not None and delay >= remaining:
+            raise error
+        RETRIES.inc()
+        logger.warning(
+            f"Model call failed ({type(error).__name__}: {error}), "
+            f"retrying in {delay:.2f}s (attempt {attempt + 1}/{self.policy.max_attempts})"
+        )
+        await asyncio.sleep(delay)
+
+    def _record_failure(self, error: BaseException) -> None:
+        FAILURES.inc(kind=type(error).__name__)
+        self.breaker.record_failure()
+
+    async def _call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        for attempt in range(1, self.policy.max_attempts + 1):
+            self.breaker.before_call()
+            timeout, bounded_by_deadline = self._attempt_timeout()
+            try:
+                result = await asyncio.wait_for(fn(), timeout)
+            except asyncio.CancelledError:
+                self.breaker.record_abandoned()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # The upstream answered (e.g. 400); it is not unhealthy
+                    self.breaker.record_success()
+                    raise
+                self._record_failure(e)
+                if isinstance(e, TimeoutError) and bounded_by_deadline:
+                    raise DeadlineExceeded("Request deadline exceeded waiting for the model") from e
+                await self._before_retry(attempt, e)
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def get_response(self, *args, **kwargs):
+        return await self._call(lambda: self.inner.get_response(*args, **kwargs))
+
+    async def stream_response(self, *args, **kwargs) -> AsyncIterator:
+        """
+        Stream from the inner model. Failures before the first event are retried;
+        once events have been yielded the error is raised to the caller. Each
+        event must arrive within the attempt timeout (and the request deadline).
+        """
+        for attempt in range(1, self.policy.max_attempts + 1):
+            self.breaker.before_call()
+            started = False
+            events = self.inner.stream_response(*args, **kwargs).__aiter__()
+            try:
+                while True:
+                    timeout, bounded_by_deadline = self._attempt_timeout()
+                    try:
+                        event = await asyncio.wait_for(events.__anext__(), timeout)
+                    except StopAsyncIteration:
+                        break
+                    started = True
+                    yield event
+            except (asyncio.CancelledError, GeneratorExit):
+                self.breaker.record_abandoned()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.record_success()
+                    raise
+                self._record_failure(e)
+                if isinstance(e, TimeoutError) and bounded_by_deadline:
+                    raise DeadlineExceeded("Request deadline exceeded waiting for the model") from e
+                if started:
+                    raise
+                await self._before_retry(attempt, e)
+                continue
+            finally:
+                if hasattr(events, "aclose"):
+                    await events.aclose()
+            self.breaker.record_success()
+            return
+
+
+def base_model(model: Model) -> Model:
+    """The innermost model behind any resilience/routing wrappers."""
+    while hasattr(model, "inner"):
+        model = model.inner
+    return model
+
+
+# Circuit breakers per upstream model
+_circuit_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(model_name: Optional[str] = None) -> CircuitBreaker:
+    """Get the circuit breaker for ``model_name`` (default: the primary model)."""
+    name = model_name or settings.default_model
+    breaker = _circuit_breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            failure_threshold=settings.circuit_failure_threshold,
+            reset_timeout=settings.circuit_reset_seconds,
+        )
+        _circuit_breakers[name] = breaker
+    return breaker
+
+
+def upstream_health() -> dict:
+    """
+    Combined breaker state of every model: ``closed`` while any model is
+    usable, ``open`` when all are open, otherwise ``half_open``.
+    """
+    models = {name: breaker.stats() for name, breaker in _circuit_breakers.items()}
+    if not models:
+        models = {settings.default_model: get_circuit_breaker().stats()}
+    states = {stats["state"] for stats in models.values()}
+    if "closed" in states:
+        state = "closed"
+    elif states == {"open"}:
+        state = "open"
+    else:
+        state = "half_open"
+    return {"state": state, "models": models}
+
+
+def default_retry_policy() -> RetryPolicy:
+    """Retry policy from settings."""
+    return RetryPolicy(
+        max_attempts=settings.upstream_max_attempts,
+        base_delay=settings.upstream_backoff_base_seconds,
+        max_delay=settings.upstream_backoff_max_seconds,
+        attempt_timeout=settings.upstream_timeout_seconds,
+    )
@@ -0,0 +1,120 @@
+"""
+Exact-match response cache for stateless portfolio questions.
+Answers to first-turn questions depend only on the message, the model and
+the agent instructions, so identical questions can reuse an earlier reply
+instead of making another model round trip.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION_RE = re.compile(r"[\s?!.,;:]+$")
+
+
+def normalize_message(message: str) -> str:
+    """Normalize a user message for cache lookups (case, whitespace, trailing punctuation)."""
+    normalized = _WHITESPACE_RE.sub(" ", message.strip().lower())
+    return _TRAILING_PUNCTUATION_RE.sub("", normalized)
+
+
+def instructions_fingerprint(instructions: Any) -> str:
+    """Stable hash of the agent instructions, so cached answers expire when they change."""
+    return hashlib.sha256(str(instructions).encode("utf-8")).hexdigest()[:16]
+
+
+class ResponseCache:
+    """In-memory LRU cache with per-entry TTL and hit/miss counters."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0, enabled: bool = True):
+        """
+        Args:
+            max_entries: Maximum number of cached responses
+            ttl_seconds: Seconds before a cached response expires
+            enabled: Whether lookups and stores are performed at all
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(message: str, model: str, instructions: Any) -> str:
+        """Build the cache key from normalized message, model and instructions hash."""
+        raw = f"{model}\0{instructions_fingerprint(instructions)}\0{normalize_message(message)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for ``key``, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, response = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def set(self, key: str, response: str) -> None:
+        """Store a response, evicting the least recently used entries when full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached response (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Snapshot of cache size and counters."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global response cache instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the global response cache instance (singleton)."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            max_entries=settings.response_cache_max_entries,
+            ttl_seconds=settings.response_cache_ttl_seconds,
+            enabled=settings.response_cache_enabled,
+        )
+    return _response_cache
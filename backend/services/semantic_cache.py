@@ -0,0 +1,245 @@
+"""
+Local lexical "semantic" cache for paraphrased questions.
+Matches new questions against previously answered ones using TF-IDF weighted
+character n-grams over a canonicalized form of the message (stopwords removed,
+common portfolio synonyms folded together). Everything runs in-process; no
+external embedding service is involved.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from config import settings
+from services.response_cache import instructions_fingerprint
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9+#.]+")
+
+# Words that carry no meaning for matching portfolio questions
+STOPWORDS = frozenset(
+    """
+    a an the is are was were be been do does did can could would should will
+    what whats which who whom how where when why tell me us about show list give
+    share please i you he him his her she they them their it its this that these
+    those of on in to for from with and or any some all your my our has have had
+    use uses using
+    muhammad abdullah athar owner portfolio know knows
+    """.split()
+)
+
+# Domain synonyms folded onto one canonical term
+SYNONYMS = {
+    "tech": "skills", "technologies": "skills", "technology": "skills", "stack": "skills",
+    "skill": "skills", "languages": "skills", "language": "skills", "tools": "skills",
+    "expertise": "skills", "abilities": "skills",
+    "project": "projects", "repos": "projects", "repo": "projects", "repositories": "projects",
+    "repository": "projects", "built": "projects",
+    "mail": "email", "e-mail": "email", "contact": "email",
+    "gh": "github",
+    "learned": "education", "study": "education", "studied": "education",
+    "school": "education",
+}
+
+
+def canonicalize(message: str) -> str:
+    """Reduce a message to its meaningful, synonym-folded terms."""
+    terms = []
+    for word in _WORD_RE.findall(message.lower()):
+        word = word.strip(".")
+        if not word or word in STOPWORDS:
+            continue
+        word = SYNONYMS.get(word, word)
+        if word not in terms:
+            terms.append(word)
+    return " ".join(sorted(terms))
+
+
+def extract_features(message: str, ngram_range: tuple[int, int] = (3, 4)) -> Counter:
+    """Character n-grams (with word boundaries) plus whole terms of the canonical message."""
+    canonical = canonicalize(message)
+    features: Counter = Counter()
+    for term in canonical.split():
+        features[f"w:{term}"] += 1
+        padded = f" {term} "
+        for n in range(ngram_range[0], ngram_range[1] + 1):
+            for i in range(len(padded) - n + 1):
+                features[padded[i:i + n]] += 1
+    return features
+
+
+@dataclass
+class _Entry:
+    namespace: str
+    message: str
+    response: str
+    expires_at: float
+    weights: dict[str, float] = field(default_factory=dict)
+    norm: float = 0.0
+
+
+@dataclass
+class SemanticMatch:
+    """A cache hit with the matched question and its similarity score."""
+    response: str
+    matched_message: str
+    score: float
+
+
+class SemanticCache:
+    """Bounded TF-IDF similarity cache with an inverted index and LRU/TTL eviction."""
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600.0,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a hit (0-1)
+            max_entries: Maximum number of cached questions
+            ttl_seconds: Seconds before a cached answer expires
+            enabled: Whether lookups and stores are performed at all
+        """
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._postings: dict[str, set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def namespace(model: str, instructions: object) -> str:
+        """Entries only match questions asked of the same model and instructions."""
+        return f"{model}:{instructions_fingerprint(instructions)}"
+
+    def _idf(self, feature: str) -> float:
+        df = len(self._postings.get(feature, ()))
+        return math.log((1 + len(self._entries)) / (1 + df)) + 1.0
+
+    def _weigh(self, features: Counter) -> tuple[dict[str, float], float]:
+        weights = {f: (1.0 + math.log(tf)) * self._idf(f) for f, tf in features.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        return weights, norm
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        for feature in entry.weights:
+            postings = self._postings.get(feature)
+            if postings is not None:
+                postings.discard(entry_id)
+                if not postings:
+                    del self._postings[feature]
+
+    def lookup(self, message: str, namespace: str) -> Optional[SemanticMatch]:
+        """Return the most similar cached answer above the threshold, if any."""
+        features = extract_features(message)
+        with self._lock:
+            if not features or not self._entries:
+                self.misses += 1
+                return None
+
+            query, query_norm = self._weigh(features)
+            scores: dict[int, float] = {}
+            for feature, weight in query.items():
+                for entry_id in self._postings.get(feature, ()):
+                    entry_weight = self._entries[entry_id].weights[feature]
+                    scores[entry_id] = scores.get(entry_id, 0.0) + weight * entry_weight
+
+            now = time.monotonic()
+            best: Optional[tuple[float, int]] = None
+            for entry_id, dot in scores.items():
+                entry = self._entries[entry_id]
+                if entry.namespace != namespace or entry.expires_at <= now:
+                    continue
+                score = dot / (query_norm * entry.norm) if entry.norm and query_norm else 0.0
+                if best is None or score > best[0]:
+                    best = (score, entry_id)
+
+            if best is None or best[0] < self.threshold:
+                self.misses += 1
+                return None
+
+            score, entry_id = best
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            entry = self._entries[entry_id]
+            return SemanticMatch(
+                response=entry.response, matched_message=entry.message, score=round(score, 4)
+            )
+
+    def add(self, message: str, response: str, namespace: str) -> None:
+        """Index an answered question, evicting expired and least recently used entries."""
+        features = extract_features(message)
+        if not features:
+            return
+        with self._lock:
+            now = time.monotonic()
+            for entry_id in [i for i, e in self._entries.items() if e.expires_at <= now]:
+                self._remove(entry_id)
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+            entry_id = self._next_id
+            self._next_id += 1
+            for feature in features:
+                self._postings.setdefault(feature, set()).add(entry_id)
+            self._entries[entry_id] = _Entry(
+                namespace=namespace,
+                message=message,
+                response=response,
+                expires_at=now + self.ttl_seconds,
+            )
+            entry = self._entries[entry_id]
+            entry.weights, entry.norm = self._weigh(features)
+
+    def clear(self) -> None:
+        """Drop every cached entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+
+    def stats(self) -> dict:
+        """Snapshot of cache size and counters."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "indexed_features": len(self._postings),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global semantic cache instance
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get the global semantic cache instance (singleton)."""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache(
+            threshold=settings.semantic_cache_threshold,
+            max_entries=settings.semantic_cache_max_entries,
+            ttl_seconds=settings.response_cache_ttl_seconds,
+            enabled=settings.semantic_cache_enabled,
+        )
+    return _semantic_cache
@@ -0,0 +1,458 @@
+"""
+Pluggable session backends for conversation history.
+``get_agent_session`` reads and writes history through the backend selected
+by ``SESSION_BACKEND``:
+
+- ``sqlite``: the pooled ``conversations.db`` store (one host; workers on that
+  host share it)
+- ``memory``: an in-process LRU (fastest, nothing persisted, one worker only)
+- ``kv``: a network key-value server (Redis protocol) shared by every worker
+  and node; ``SESSION_KV_URL=local`` swaps in an in-process stand-in
+- ``tiered``: an in-process hot tier in front of SQLite with batched
+  write-behind (one worker only; see ``services/tiered_session.py``)
+"""
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+from agents.items import TResponseInputItem
+from agents.memory import SessionABC
+
+from config import settings
+from services.metrics import SESSION_LOAD_DURATION, SESSION_WRITE_DURATION
+
+logger = logging.getLogger(__name__)
+
+SESSION_BACKENDS = ("sqlite", "memory", "kv", "tiered")
+
+# Backends whose sessions are visible to every worker process
+SHARED_BACKENDS = ("sqlite", "kv")
+
+# Backends whose durable copy is the SQLite database (schema, trimming and maintenance apply)
+SQLITE_BACKENDS = ("sqlite", "tiered")
+
+
+def usage_totals(requests: int, input_tokens: int, output_tokens: int) -> dict:
+    return {
+        "requests": requests,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+    }
+
+
+class StoredSession(SessionABC):
+    """
+    Agents SDK session with the extra reads the history policy relies on:
+    items newer than a position, and a running summary of older items.
+    """
+
+    session_id: str
+
+    @abstractmethod
+    async def get_items_after(self, after_id: int) -> list[tuple[int, TResponseInputItem]]:
+        """``(position, item)`` pairs newer than ``after_id``, oldest first."""
+
+    @abstractmethod
+    async def get_summary(self) -> tuple[str, int]:
+        """``(summary, through_id)``; ``("", 0)`` if nothing has been summarized."""
+
+    @abstractmethod
+    async def set_summary(self, summary: str, through_id: int) -> None:
+        """Store the summary of every item up to ``through_id`` (only ever moves forward)."""
+
+
+class SessionBackend(ABC):
+    """Where conversation history and per-session usage totals live."""
+
+    name: str = ""
+
+    @abstractmethod
+    def get_session(self, session_id: str) -> StoredSession:
+        """Session object for ``session_id`` (created on first write)."""
+
+    @abstractmethod
+    async def record_usage(
+        self, session_id: str, requests: int, input_tokens: int, output_tokens: int
+    ) -> None:
+        """Add model calls and token counts to a session's running totals."""
+
+    @abstractmethod
+    async def load_usage(self, session_id: str) -> dict:
+        """Running usage totals for a session (zeros if it has none)."""
+
+    async def aclose(self) -> None:
+        """Release connections held by the backend."""
+
+
+class MemorySession(StoredSession):
+    """Session history held in process memory."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.items: list[tuple[int, TResponseInputItem]] = []
+        self.next_id = 1
+        self.summary = ""
+        self.through_id = 0
+        self.usage = [0, 0, 0]
+        self._lock = threading.Lock()
+
+    async def get_items(self, limit: Optional[int] = None) -> list[TResponseInputItem]:
+        with self._lock:
+            rows = self.items[-limit:] if limit else self.items
+            return [item for _, item in rows]
+
+    async def add_items(self, items: list[TResponseInputItem]) -> None:
+        with self._lock:
+            for item in items:
+                self.items.append((self.next_id, item))
+                self.next_id += 1
+
+    async def get_items_after(self, after_id: int) -> list[tuple[int, TResponseInputItem]]:
+        with self._lock:
+            return [row for row in self.items if row[0] > after_id]
+
+    async def get_summary(self) -> tuple[str, int]:
+        return self.summary, self.through_id
+
+    async def set_summary(self, summary: str, through_id: int) -> None:
+        with self._lock:
+            if through_id > self.through_id:
+                self.summary, self.through_id = summary, through_id
+
+    async def pop_item(self) -> Optional[TResponseInputItem]:
+        with self._lock:
+            return self.items.pop()[1] if self.items else None
+
+    async def clear_session(self) -> None:
+        with self._lock:
+            self.items.clear()
+            self.summary, self.through_id = "", 0
+
+
+class MemorySessionBackend(SessionBackend):
+    """
+    In-process LRU of sessions. Nothing is persisted and workers do not share
+    sessions; the least recently used session is dropped past ``max_sessions``.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_sessions: int = 10000):
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: OrderedDict[str, MemorySession] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _session(self, session_id: str) -> MemorySession:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+            session = self._sessions[session_id] = MemorySession(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def get_session(self, session_id: str) -> MemorySession:
+        return self._session(session_id)
+
+    async def record_usage(
+        self, session_id: str, requests: int, input_tokens: int, output_tokens: int
+    ) -> None:
+        usage = self._session(session_id).usage
+        usage[0] += requests
+        usage[1] += input_tokens
+        usage[2] += output_tokens
+
+    async def load_usage(self, session_id: str) -> dict:
+        return usage_totals(*self._session(session_id).usage)
+
+    def session_count(self) -> int:
+        return len(self._sessions)
+
+
+# Allocates ids for ARGV (JSON items) and appends them to the list in one
+# atomic step; KEYS are the message list and the id counter
+APPEND_ITEMS_SCRIPT = """
+local last = redis.call('INCRBY', KEYS[2], #ARGV)
+local first = last - #ARGV
+for i, item in ipairs(ARGV) do
+    redis.call('RPUSH', KEYS[1], '{"id": ' .. (first + i) .. ', "item": ' .. item .. '}')
+end
+return last
+"""
+
+
+class LocalKVClient:
+    """
+    In-process stand-in for a Redis server (the subset of ``redis.asyncio``
+    commands the ``kv`` backend uses, with ``decode_responses=True`` semantics).
+    Lets the network backend run in tests and single-process setups. The
+    backend's Lua scripts run as Python equivalents.
+    """
+
+    def __init__(self):
+        self._data: dict[str, Any] = {}
+        self.commands = 0
+        self._scripts = {APPEND_ITEMS_SCRIPT: self._append_items}
+
+    def _list(self, key: str) -> list[str]:
+        return self._data.setdefault(key, [])
+
+    async def lrange(self, key: str, start: int, stop: int) -> list[str]:
+        self.commands += 1
+        values = self._data.get(key, [])
+        start = max(0, len(values) + start) if start < 0 else start
+        stop = len(values) + stop if stop < 0 else stop
+        return values[start:stop + 1]
+
+    async def rpop(self, key: str) -> Optional[str]:
+        self.commands += 1
+        values = self._data.get(key)
+        return values.pop() if values else None
+
+    async def get(self, key: str) -> Optional[str]:
+        self.commands += 1
+        return self._data.get(key)
+
+    async def set(self, key: str, value: str) -> bool:
+        self.commands += 1
+        self._data[key] = value
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        self.commands += 1
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        self.commands += 1
+        fields = self._data.setdefault(key, {})
+        fields[field] = str(int(fields.get(field, 0)) + amount)
+        return int(fields[field])
+
+    async def hgetall(self, key: str) -> dict[str, str]:
+        self.commands += 1
+        return dict(self._data.get(key, {}))
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        # Keys never expire in the stand-in
+        self.commands += 1
+        return key in self._data
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: str) -> Any:
+        self.commands += 1
+        if script not in self._scripts:
+            raise NotImplementedError("LocalKVClient only runs the kv backend's own scripts")
+        return self._scripts[script](list(keys_and_args[:numkeys]), list(keys_and_args[numkeys:]))
+
+    def _append_items(self, keys: list[str], args: list[str]) -> int:
+        messages, sequence = keys
+        last = int(self._data.get(sequence, 0)) + len(args)
+        self._data[sequence] = last
+        first = last - len(args)
+        self._list(messages).extend(
+            f'{{"id": {first + i}, "item": {item}}}' for i, item in enumerate(args, 1)
+        )
+        return last
+
+    async def aclose(self) -> None:
+        return None
+
+
+class KVSession(StoredSession):
+    """
+    Session history in a key-value server.
+
+    Items are JSON ``{"id", "item"}`` entries in a list; ids come from a
+    per-session counter so positions stay monotonic across pops, as they do
+    with SQLite row ids. Ids are allocated and the entries appended in one
+    script, so concurrent writers never push rows out of id order.
+    """
+
+    def __init__(self, session_id: str, backend: "KVSessionBackend"):
+        self.session_id = session_id
+        self.backend = backend
+        self.client = backend.client
+        self._messages = backend.key("messages", session_id)
+        self._sequence = backend.key("sequence", session_id)
+        self._summary = backend.key("summary", session_id)
+
+    async def _rows(self, start: int = 0) -> list[tuple[int, TResponseInputItem]]:
+        rows = []
+        for raw in await self.client.lrange(self._messages, start, -1):
+            try:
+                entry = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            rows.append((entry["id"], entry["item"]))
+        return rows
+
+    async def get_items(self, limit: Optional[int] = None) -> list[TResponseInputItem]:
+        with SESSION_LOAD_DURATION.time(operation="get_items"):
+            return [item for _, item in await self._rows(-limit if limit else 0)]
+
+    async def add_items(self, items: list[TResponseInputItem]) -> None:
+        if not items:
+            return
+        with SESSION_WRITE_DURATION.time(operation="add_items"):
+            await self.client.eval(
+                APPEND_ITEMS_SCRIPT, 2, self._messages, self._sequence,
+                *(json.dumps(item) for item in items),
+            )
+            await self.backend.touch(self._messages, self._sequence, self._summary)
+
+    async def get_items_after(self, after_id: int) -> list[tuple[int, TResponseInputItem]]:
+        with SESSION_LOAD_DURATION.time(operation="get_items_after"):
+            return [row for row in await self._rows() if row[0] > after_id]
+
+    async def get_summary(self) -> tuple[str, int]:
+        with SESSION_LOAD_DURATION.time(operation="get_summary"):
+            raw = await self.client.get(self._summary)
+        if not raw:
+            return "", 0
+        data = json.loads(raw)
+        return data["summary"], data["through_id"]
+
+    async def set_summary(self, summary: str, through_id: int) -> None:
+        # Read-then-write: a concurrent fold of the same turns writes the same summary
+        if through_id <= (await self.get_summary())[1]:
+            return
+        with SESSION_WRITE_DURATION.time(operation="set_summary"):
+            await self.client.set(
+                self._summary, json.dumps({"summary": summary, "through_id": through_id})
+            )
+            await self.backend.touch(self._summary)
+
+    async def pop_item(self) -> Optional[TResponseInputItem]:
+        raw = await self.client.rpop(self._messages)
+        return json.loads(raw)["item"] if raw else None
+
+    async def clear_session(self) -> None:
+        await self.client.delete(self._messages, self._sequence, self._summary)
+
+
+class KVSessionBackend(SessionBackend):
+    """Sessions in a key-value server shared by every worker and node."""
+
+    name = "kv"
+
+    def __init__(self, client: Any, prefix: str = "portfolio", ttl_seconds: float = 0):
+        """
+        Args:
+            client: ``redis.asyncio.Redis`` (``decode_responses=True``) or :class:`LocalKVClient`
+            prefix: Namespace for every key
+            ttl_seconds: Idle time after which a session's keys expire (0 keeps them)
+        """
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = int(ttl_seconds)
+
+    def key(self, kind: str, session_id: str) -> str:
+        return f"{self.prefix}:session:{session_id}:{kind}"
+
+    async def touch(self, *keys: str) -> None:
+        """Restart the idle TTL of ``keys``."""
+        if self.ttl_seconds:
+            for key in keys:
+                await self.client.expire(key, self.ttl_seconds)
+
+    def get_session(self, session_id: str) -> KVSession:
+        return KVSession(session_id, self)
+
+    async def record_usage(
+        self, session_id: str, requests: int, input_tokens: int, output_tokens: int
+    ) -> None:
+        key = self.key("usage", session_id)
+        with SESSION_WRITE_DURATION.time(operation="add_usage"):
+            for field, amount in (
+                ("requests", requests), ("input_tokens", input_tokens), ("output_tokens", output_tokens)
+            ):
+                await self.client.hincrby(key, field, amount)
+            await self.touch(key)
+
+    async def load_usage(self, session_id: str) -> dict:
+        fields = await self.client.hgetall(self.key("usage", session_id))
+        return usage_totals(
+            int(fields.get("requests", 0)),
+            int(fields.get("input_tokens", 0)),
+            int(fields.get("output_tokens", 0)),
+        )
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def create_kv_client(url: str) -> Any:
+    """
+    Client for ``SESSION_KV_URL``: ``local`` for the in-process stand-in,
+    otherwise a Redis URL (needs the optional ``redis`` package).
+    """
+    if url == "local":
+        return LocalKVClient()
+    try:
+        import redis.asyncio as redis
+    except ImportError as e:
+        raise RuntimeError(
+            "SESSION_BACKEND=kv needs the 'redis' package (pip install redis) "
+            "or SESSION_KV_URL=local"
+        ) from e
+    return redis.from_url(url, decode_responses=True)
+
+
+def create_session_backend(kind: str) -> SessionBackend:
+    """Build the session backend named ``kind`` from settings."""
+    if kind == "sqlite":
+        from services.session_store import get_session_store
+        return get_session_store()
+    if kind == "memory":
+        return MemorySessionBackend(max_sessions=settings.session_memory_max_sessions)
+    if kind == "kv":
+        return KVSessionBackend(
+            create_kv_client(settings.session_kv_url),
+            prefix=settings.session_kv_prefix,
+            ttl_seconds=settings.session_ttl_hours * 3600,
+        )
+    if kind == "tiered":
+        from services.session_store import get_session_store
+        from services.tiered_session import TieredSessionBackend
+        return TieredSessionBackend(
+            get_session_store(),
+            max_bytes=settings.session_hot_max_bytes,
+            max_pending=settings.session_flush_max_pending,
+            max_attempts=settings.session_flush_max_attempts,
+        )
+    raise ValueError(f"Unknown session backend '{kind}' (expected one of {', '.join(SESSION_BACKENDS)})")
+
+
+# Global session backend
+_session_backend: Optional[SessionBackend] = None
+_session_backend_lock = threading.Lock()
+
+
+def get_session_backend() -> SessionBackend:
+    """Get the configured session backend (created on first use)."""
+    global _session_backend
+    if _session_backend is None:
+        with _session_backend_lock:
+            if _session_backend is None:
+                _session_backend = create_session_backend(settings.session_backend)
+                logger.info(f"Session backend: {_session_backend.name}")
+    return _session_backend
+
+
+async def close_session_backend() -> None:
+    """Close the session backend, if open."""
+    global _session_backend
+    backend, _session_backend = _session_backend, None
+    if backend is None:
+        return
+    if backend.name != "sqlite":
+        # The tiered backend flushes its queued writes here, before SQLite closes
+        await backend.aclose()
+    if backend.name in SQLITE_BACKENDS:
+        from services.session_store import close_session_store
+        close_session_store()
@@ -0,0 +1,99 @@
+"""
+Per-session concurrency control.
+Serializes turns within one conversation (read history, run the agent, append
+the result) while different sessions run fully in parallel. The registry is
+bounded: locks nobody holds or waits on are evicted once idle or when the
+registry is over capacity.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _LockEntry:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SessionLockRegistry:
+    """Bounded registry of per-session asyncio locks with idle eviction."""
+
+    def __init__(self, max_locks: int = 10000, idle_seconds: float = 300.0):
+        """
+        Args:
+            max_locks: Soft cap on tracked sessions (locks in use are never evicted)
+            idle_seconds: Unused locks older than this are evicted
+        """
+        self.max_locks = max(1, max_locks)
+        self.idle_seconds = idle_seconds
+        self._locks: OrderedDict[str, _LockEntry] = OrderedDict()
+        self.contended = 0
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for session_id in list(self._locks):
+            entry = self._locks[session_id]
+            over_capacity = len(self._locks) > self.max_locks
+            if not over_capacity and now - entry.last_used < self.idle_seconds:
+                # Entries are in LRU order; the rest are more recent
+                break
+            if entry.users == 0:
+                del self._locks[session_id]
+
+    @asynccontextmanager
+    async def hold(self, session_id: str) -> AsyncIterator[None]:
+        """Hold the lock for ``session_id`` for the duration of the block."""
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = _LockEntry()
+            self._locks[session_id] = entry
+        else:
+            self._locks.move_to_end(session_id)
+        # Count ourselves as a user first so eviction never drops this entry
+        entry.users += 1
+        self._evict()
+        if entry.lock.locked():
+            self.contended += 1
+            logger.debug(f"Waiting for in-progress turn on session {session_id}")
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            entry.last_used = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def stats(self) -> dict:
+        """Snapshot of registry size and contention."""
+        return {
+            "tracked_sessions": len(self._locks),
+            "max_locks": self.max_locks,
+            "contended_acquisitions": self.contended,
+        }
+
+
+# Global lock registry instance
+_session_locks: Optional[SessionLockRegistry] = None
+
+
+def get_session_locks() -> SessionLockRegistry:
+    """Get the global session lock registry (singleton)."""
+    global _session_locks
+    if _session_locks is None:
+        _session_locks = SessionLockRegistry(
+            max_locks=settings.session_lock_max,
+            idle_seconds=settings.session_lock_idle_seconds,
+        )
+    return _session_locks
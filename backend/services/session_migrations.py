@@ -0,0 +1,62 @@
+"""
+One-off data migrations for the session store.
+Before session ids were issued per client, every anonymous request appended
+to one shared session ("default_session", and "chainlit_session" for the
+Chainlit UI). That history mixes unrelated visitors, so it cannot be split
+back per client; it is trimmed to its most recent turns instead.
+
+Run manually (from the backend directory):
+    python -m services.session_migrations [--keep-turns N]
+"""
+import argparse
+import logging
+from typing import Optional
+
+from config import settings
+from services.session_store import SessionStore, get_session_store
+
+logger = logging.getLogger(__name__)
+
+
+def trim_legacy_shared_sessions(
+    store: Optional[SessionStore] = None,
+    session_ids: Optional[list[str]] = None,
+    keep_turns: Optional[int] = None,
+) -> dict[str, int]:
+    """
+    Trim legacy shared sessions down to their most recent turns.
+    Idempotent: sessions already within the limit are left untouched.
+    
+    Args:
+        store: Session store (defaults to the process-wide store)
+        session_ids: Shared session ids to trim (defaults to ``LEGACY_SHARED_SESSIONS``)
+        keep_turns: Turns to keep per session (defaults to ``LEGACY_SESSION_KEEP_TURNS``)
+        
+    Returns:
+        Mapping of session id to number of deleted messages
+    """
+    store = store or get_session_store()
+    session_ids = settings.legacy_shared_sessions if session_ids is None else session_ids
+    keep_turns = settings.legacy_session_keep_turns if keep_turns is None else keep_turns
+
+    deleted = {}
+    for session_id in session_ids:
+        deleted[session_id] = store.trim_session(session_id, keep_turns)
+        if deleted[session_id]:
+            logger.info(
+                f"Trimmed legacy shared session '{session_id}': "
+                f"{deleted[session_id]} messages removed (kept {keep_turns} turns)"
+            )
+    return deleted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Trim legacy shared sessions")
+    parser.add_argument("--keep-turns", type=int, default=settings.legacy_session_keep_turns)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    print(trim_legacy_shared_sessions(keep_turns=args.keep_turns))
+
+
+if __name__ == "__main__":
+    main()
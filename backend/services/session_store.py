@@ -0,0 +1,571 @@
+"""
+Pooled SQLite session store for agent conversation history.
+Keeps one long-lived store per process: a fixed pool of shared connections,
+WAL/pragma tuning applied once at startup, and an LRU of live session objects
+keyed by session_id. Uses the same schema as the agents SDK ``SQLiteSession``
+so existing ``conversations.db`` files keep working.
+"""
+import asyncio
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from agents.items import TResponseInputItem
+
+from config import settings
+from services.metrics import SESSION_LOAD_DURATION, SESSION_WRITE_DURATION
+from services.session_backend import SessionBackend, StoredSession
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_TABLE = "agent_sessions"
+MESSAGES_TABLE = "agent_messages"
+SUMMARIES_TABLE = "session_summaries"
+USAGE_TABLE = "session_usage"
+
+# Only ever move the summary forward (concurrent folds are idempotent)
+UPSERT_SUMMARY_SQL = f"""
+    INSERT INTO {SUMMARIES_TABLE} (session_id, summary, through_id)
+    VALUES (?, ?, ?)
+    ON CONFLICT(session_id) DO UPDATE SET
+        summary = excluded.summary,
+        through_id = excluded.through_id,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE excluded.through_id > {SUMMARIES_TABLE}.through_id
+"""
+ADD_USAGE_SQL = f"""
+    INSERT INTO {USAGE_TABLE} (session_id, requests, input_tokens, output_tokens)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(session_id) DO UPDATE SET
+        requests = requests + excluded.requests,
+        input_tokens = input_tokens + excluded.input_tokens,
+        output_tokens = output_tokens + excluded.output_tokens,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def make_turn_items(user_message: str, assistant_reply: str) -> list[TResponseInputItem]:
+    """
+    Build session items for a turn answered without running the agent
+    (e.g. served from a cache), so the conversation history stays complete.
+    """
+    return [
+        {"role": "user", "content": user_message},
+        {"role": "assistant", "content": assistant_reply},
+    ]
+
+
+@dataclass
+class SessionWrite:
+    """
+    One deferred change to a session, applied by :meth:`SessionStore.write_batch`.
+
+    ``kind`` is ``items`` (``rows`` of ``(id, message JSON)``), ``summary``,
+    ``usage``, ``pop`` (delete ``row_id``) or ``clear``.
+    """
+    kind: str
+    session_id: str
+    rows: tuple[tuple[int, str], ...] = ()
+    summary: str = ""
+    through_id: int = 0
+    usage: tuple[int, int, int] = (0, 0, 0)
+    row_id: int = 0
+    # Failed flushes so far (the tiered backend gives up after a limit)
+    attempts: int = 0
+
+
+@dataclass
+class SessionSnapshot:
+    """What a session needs to serve history: its summary and the rows after it."""
+    summary: str
+    through_id: int
+    rows: list[tuple[int, str]]
+    usage: tuple[int, int, int]
+
+
+class SessionStore(SessionBackend):
+    """Process-wide SQLite store with a connection pool and session LRU."""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str, pool_size: int = 4, max_cached_sessions: int = 1024):
+        """
+        Args:
+            db_path: Path to the SQLite database file (or ':memory:')
+            pool_size: Number of pooled connections
+            max_cached_sessions: Maximum number of live session objects kept in the LRU
+        """
+        self.db_path = db_path
+        # Every ':memory:' connection is a separate database, so share a single one
+        self.pool_size = 1 if db_path == ":memory:" else max(1, pool_size)
+        self.max_cached_sessions = max(1, max_cached_sessions)
+        self._pool: queue.Queue[sqlite3.Connection] = queue.Queue()
+        self._connections: list[sqlite3.Connection] = []
+        self._write_lock = threading.Lock()
+        self._sessions: OrderedDict[str, "PooledSQLiteSession"] = OrderedDict()
+        self._sessions_lock = threading.Lock()
+        self._closed = False
+
+        for _ in range(self.pool_size):
+            conn = self._connect()
+            self._connections.append(conn)
+            self._pool.put(conn)
+
+        with self.connection() as conn:
+            self._init_schema(conn)
+
+        logger.info(
+            f"Session store opened at {db_path} "
+            f"(pool_size={self.pool_size}, max_cached_sessions={self.max_cached_sessions})"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the store's pragmas applied."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @staticmethod
+    def _init_schema(conn: sqlite3.Connection) -> None:
+        """Create tables and indexes if missing (once per process)."""
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {SESSIONS_TABLE} (
+                session_id TEXT PRIMARY KEY,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {MESSAGES_TABLE} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                message_data TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (session_id) REFERENCES {SESSIONS_TABLE} (session_id)
+                    ON DELETE CASCADE
+            )
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_{MESSAGES_TABLE}_session_id
+            ON {MESSAGES_TABLE} (session_id, created_at)
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {SUMMARIES_TABLE} (
+                session_id TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                through_id INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {USAGE_TABLE} (
+                session_id TEXT PRIMARY KEY,
+                requests INTEGER NOT NULL DEFAULT 0,
+                input_tokens INTEGER NOT NULL DEFAULT 0,
+                output_tokens INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.commit()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check a connection out of the pool for the duration of the block."""
+        if self._closed:
+            raise RuntimeError("Session store is closed")
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def write_connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Check out a connection for writing.
+        SQLite allows one writer at a time; serializing writers in-process
+        avoids busy-wait retries on the database lock.
+        """
+        with self._write_lock, self.connection() as conn:
+            yield conn
+
+    def get_session(self, session_id: str) -> "PooledSQLiteSession":
+        """Return the live session object for ``session_id``, creating it if needed."""
+        with self._sessions_lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+            session = PooledSQLiteSession(session_id, self)
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_cached_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def trim_session(self, session_id: str, keep_turns: int) -> int:
+        """
+        Delete all but the most recent ``keep_turns`` turns of a session
+        (a turn starts at a user message). The running summary is dropped too.
+        
+        Returns:
+            Number of deleted messages
+        """
+        with self.write_connection() as conn:
+            cutoff = None
+            if keep_turns > 0:
+                row = conn.execute(
+                    f"""
+                    SELECT id FROM {MESSAGES_TABLE}
+                    WHERE session_id = ? AND json_extract(message_data, '$.role') = 'user'
+                    ORDER BY id DESC LIMIT 1 OFFSET ?
+                    """,
+                    (session_id, keep_turns - 1),
+                ).fetchone()
+                if row is None:
+                    return 0
+                cutoff = row[0]
+
+            if cutoff is None:
+                deleted = conn.execute(
+                    f"DELETE FROM {MESSAGES_TABLE} WHERE session_id = ?", (session_id,)
+                ).rowcount
+                conn.execute(f"DELETE FROM {SESSIONS_TABLE} WHERE session_id = ?", (session_id,))
+            else:
+                deleted = conn.execute(
+                    f"DELETE FROM {MESSAGES_TABLE} WHERE session_id = ? AND id < ?",
+                    (session_id, cutoff),
+                ).rowcount
+            conn.execute(f"DELETE FROM {SUMMARIES_TABLE} WHERE session_id = ?", (session_id,))
+            conn.commit()
+            return deleted
+
+    def add_usage(
+        self, session_id: str, requests: int, input_tokens: int, output_tokens: int
+    ) -> None:
+        """Add model calls and token counts to a session's running usage totals."""
+        with self.write_connection() as conn:
+            conn.execute(ADD_USAGE_SQL, (session_id, requests, input_tokens, output_tokens))
+            conn.commit()
+
+    def get_usage(self, session_id: str) -> dict:
+        """Running usage totals for a session (zeros if it has none)."""
+        with self.connection() as conn:
+            row = conn.execute(
+                f"SELECT requests, input_tokens, output_tokens FROM {USAGE_TABLE} "
+                "WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        requests, input_tokens, output_tokens = row or (0, 0, 0)
+        return {
+            "requests": requests,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def load_snapshot(self, session_id: str) -> SessionSnapshot:
+        """Read a session's summary, the raw rows after it and its usage totals."""
+        with self.connection() as conn:
+            row = conn.execute(
+                f"SELECT summary, through_id FROM {SUMMARIES_TABLE} WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            summary, through_id = row or ("", 0)
+            rows = conn.execute(
+                f"SELECT id, message_data FROM {MESSAGES_TABLE} "
+                "WHERE session_id = ? AND id > ? ORDER BY id ASC",
+                (session_id, through_id),
+            ).fetchall()
+            usage = conn.execute(
+                f"SELECT requests, input_tokens, output_tokens FROM {USAGE_TABLE} "
+                "WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        return SessionSnapshot(summary, through_id, rows, tuple(usage or (0, 0, 0)))
+
+    def max_message_id(self) -> int:
+        """Highest message id ever assigned (ids are never reused)."""
+        with self.connection() as conn:
+            (max_id,) = conn.execute(f"SELECT MAX(id) FROM {MESSAGES_TABLE}").fetchone()
+            sequence = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = ?", (MESSAGES_TABLE,)
+            ).fetchone()
+        return max(max_id or 0, sequence[0] if sequence else 0)
+
+    def write_batch(self, writes: list[SessionWrite]) -> None:
+        """
+        Apply deferred session changes in order, in a single transaction.
+        Messages keep the ids they were given when queued.
+        """
+        if not writes:
+            return
+        with self.write_connection() as conn:
+            try:
+                for write in writes:
+                    self._apply(conn, write)
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, write: SessionWrite) -> None:
+        session_id = write.session_id
+        if write.kind == "items":
+            conn.execute(
+                f"INSERT OR IGNORE INTO {SESSIONS_TABLE} (session_id) VALUES (?)", (session_id,)
+            )
+            conn.executemany(
+                f"INSERT INTO {MESSAGES_TABLE} (id, session_id, message_data) VALUES (?, ?, ?)",
+                [(row_id, session_id, data) for row_id, data in write.rows],
+            )
+            conn.execute(
+                f"UPDATE {SESSIONS_TABLE} SET updated_at = CURRENT_TIMESTAMP WHERE session_id = ?",
+                (session_id,),
+            )
+        elif write.kind == "summary":
+            conn.execute(UPSERT_SUMMARY_SQL, (session_id, write.summary, write.through_id))
+        elif write.kind == "usage":
+            conn.execute(ADD_USAGE_SQL, (session_id, *write.usage))
+        elif write.kind == "pop":
+            conn.execute(f"DELETE FROM {MESSAGES_TABLE} WHERE id = ?", (write.row_id,))
+        elif write.kind == "clear":
+            for table in (MESSAGES_TABLE, SUMMARIES_TABLE, SESSIONS_TABLE):
+                conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+        else:
+            raise ValueError(f"Unknown session write '{write.kind}'")
+
+    async def record_usage(
+        self, session_id: str, requests: int, input_tokens: int, output_tokens: int
+    ) -> None:
+        await asyncio.to_thread(self.add_usage, session_id, requests, input_tokens, output_tokens)
+
+    async def load_usage(self, session_id: str) -> dict:
+        return await asyncio.to_thread(self.get_usage, session_id)
+
+    async def aclose(self) -> None:
+        self.close()
+
+    def cached_session_count(self) -> int:
+        """Number of live session objects in the LRU."""
+        return len(self._sessions)
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        if self._closed:
+            return
+        self._closed = True
+        with self._sessions_lock:
+            self._sessions.clear()
+        for conn in self._connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing session store connection: {e}")
+        self._connections.clear()
+        logger.info("Session store closed")
+
+
+class PooledSQLiteSession(StoredSession):
+    """Agents SDK session backed by the shared :class:`SessionStore`."""
+
+    def __init__(self, session_id: str, store: SessionStore):
+        self.session_id = session_id
+        self.store = store
+
+    async def get_items(self, limit: Optional[int] = None) -> list[TResponseInputItem]:
+        """Retrieve the conversation history for this session in chronological order."""
+
+        def _get_items_sync() -> list[TResponseInputItem]:
+            with self.store.connection() as conn:
+                if limit is None:
+                    rows = conn.execute(
+                        f"SELECT message_data FROM {MESSAGES_TABLE} "
+                        "WHERE session_id = ? ORDER BY id ASC",
+                        (self.session_id,),
+                    ).fetchall()
+                else:
+                    rows = conn.execute(
+                        f"SELECT message_data FROM {MESSAGES_TABLE} "
+                        "WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                        (self.session_id, limit),
+                    ).fetchall()
+                    rows.reverse()
+
+            items = []
+            for (message_data,) in rows:
+                try:
+                    items.append(json.loads(message_data))
+                except json.JSONDecodeError:
+                    continue
+            return items
+
+        with SESSION_LOAD_DURATION.time(operation="get_items"):
+            return await asyncio.to_thread(_get_items_sync)
+
+    async def add_items(self, items: list[TResponseInputItem]) -> None:
+        """Append items to the conversation history."""
+        if not items:
+            return
+
+        def _add_items_sync() -> None:
+            with self.store.write_connection() as conn:
+                conn.execute(
+                    f"INSERT OR IGNORE INTO {SESSIONS_TABLE} (session_id) VALUES (?)",
+                    (self.session_id,),
+                )
+                conn.executemany(
+                    f"INSERT INTO {MESSAGES_TABLE} (session_id, message_data) VALUES (?, ?)",
+                    [(self.session_id, json.dumps(item)) for item in items],
+                )
+                conn.execute(
+                    f"UPDATE {SESSIONS_TABLE} SET updated_at = CURRENT_TIMESTAMP "
+                    "WHERE session_id = ?",
+                    (self.session_id,),
+                )
+                conn.commit()
+
+        with SESSION_WRITE_DURATION.time(operation="add_items"):
+            await asyncio.to_thread(_add_items_sync)
+
+    async def get_items_after(self, after_id: int) -> list[tuple[int, TResponseInputItem]]:
+        """
+        Retrieve ``(row id, item)`` pairs newer than ``after_id`` in chronological order.
+        Lets callers read only the part of the history they have not processed yet.
+        """
+
+        def _get_items_after_sync() -> list[tuple[int, TResponseInputItem]]:
+            with self.store.connection() as conn:
+                rows = conn.execute(
+                    f"SELECT id, message_data FROM {MESSAGES_TABLE} "
+                    "WHERE session_id = ? AND id > ? ORDER BY id ASC",
+                    (self.session_id, after_id),
+                ).fetchall()
+            items = []
+            for row_id, message_data in rows:
+                try:
+                    items.append((row_id, json.loads(message_data)))
+                except json.JSONDecodeError:
+                    continue
+            return items
+
+        with SESSION_LOAD_DURATION.time(operation="get_items_after"):
+            return await asyncio.to_thread(_get_items_after_sync)
+
+    async def get_summary(self) -> tuple[str, int]:
+        """Return ``(summary, through_id)``; ``("", 0)`` if nothing has been summarized."""
+
+        def _get_summary_sync() -> tuple[str, int]:
+            with self.store.connection() as conn:
+                row = conn.execute(
+                    f"SELECT summary, through_id FROM {SUMMARIES_TABLE} WHERE session_id = ?",
+                    (self.session_id,),
+                ).fetchone()
+            return (row[0], row[1]) if row else ("", 0)
+
+        with SESSION_LOAD_DURATION.time(operation="get_summary"):
+            return await asyncio.to_thread(_get_summary_sync)
+
+    async def set_summary(self, summary: str, through_id: int) -> None:
+        """Store the running summary covering every message up to ``through_id``."""
+
+        def _set_summary_sync() -> None:
+            with self.store.write_connection() as conn:
+                conn.execute(UPSERT_SUMMARY_SQL, (self.session_id, summary, through_id))
+                conn.commit()
+
+        with SESSION_WRITE_DURATION.time(operation="set_summary"):
+            await asyncio.to_thread(_set_summary_sync)
+
+    async def pop_item(self) -> Optional[TResponseInputItem]:
+        """Remove and return the most recent item from the session."""
+
+        def _pop_item_sync() -> Optional[TResponseInputItem]:
+            with self.store.write_connection() as conn:
+                row = conn.execute(
+                    f"""
+                    DELETE FROM {MESSAGES_TABLE}
+                    WHERE id = (
+                        SELECT id FROM {MESSAGES_TABLE}
+                        WHERE session_id = ?
+                        ORDER BY id DESC
+                        LIMIT 1
+                    )
+                    RETURNING message_data
+                    """,
+                    (self.session_id,),
+                ).fetchone()
+                conn.commit()
+            if not row:
+                return None
+            try:
+                return json.loads(row[0])
+            except json.JSONDecodeError:
+                return None
+
+        return await asyncio.to_thread(_pop_item_sync)
+
+    async def clear_session(self) -> None:
+        """Clear all items for this session."""
+
+        def _clear_session_sync() -> None:
+            with self.store.write_connection() as conn:
+                conn.execute(
+                    f"DELETE FROM {MESSAGES_TABLE} WHERE session_id = ?", (self.session_id,)
+                )
+                conn.execute(
+                    f"DELETE FROM {SUMMARIES_TABLE} WHERE session_id = ?", (self.session_id,)
+                )
+                conn.execute(
+                    f"DELETE FROM {SESSIONS_TABLE} WHERE session_id = ?", (self.session_id,)
+                )
+                conn.commit()
+
+        await asyncio.to_thread(_clear_session_sync)
+
+
+# Global session store instance
+_session_store: Optional[SessionStore] = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Get the process-wide session store (created on first use)."""
+    global _session_store
+    if _session_store is None:
+        with _session_store_lock:
+            if _session_store is None:
+                _session_store = SessionStore(
+                    db_path=settings.session_db_path,
+                    pool_size=settings.session_pool_size,
+                    max_cached_sessions=settings.session_cache_size,
+                )
+    return _session_store
+
+
+def close_session_store() -> None:
+    """Close the process-wide session store, if open."""
+    global _session_store
+    with _session_store_lock:
+        if _session_store is not None:
+            _session_store.close()
+            _session_store = None
@@ -0,0 +1,88 @@
+"""
+Request coalescing (single-flight) for identical in-flight work.
+Concurrent callers with the same key share one execution of the underlying
+coroutine and all receive its result (or its exception).
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key."""
+
+    def __init__(self, enabled: bool = True):
+        """
+        Args:
+            enabled: When False every call runs independently
+        """
+        self.enabled = enabled
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``fn`` once for all concurrent callers with the same ``key``.
+
+        The shared call runs in its own task, so a cancelled caller (e.g. a
+        disconnected client) does not cancel the work the other callers await.
+
+        Args:
+            key: Identity of the work being requested
+            fn: Zero-argument coroutine factory performing the work
+
+        Returns:
+            The shared result
+        """
+        if not self.enabled:
+            return await fn()
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._on_done(key, done))
+        else:
+            self.followers += 1
+            logger.debug(f"Coalescing request onto in-flight call {key[:12]}")
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight_count(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._in_flight)
+
+    def stats(self) -> dict:
+        """Snapshot of coalescing counters."""
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._in_flight),
+            "upstream_calls": self.leaders,
+            "coalesced_requests": self.followers,
+        }
+
+
+# Global single-flight instance
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the global single-flight instance (singleton)."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight(enabled=settings.single_flight_enabled)
+    return _single_flight
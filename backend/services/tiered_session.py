@@ -0,0 +1,380 @@
+"""
+Two-tier session backend: an in-memory hot tier in front of the SQLite store.
+Recently used sessions are served from memory (bounded by size, least
+recently used evicted first) and every change is queued and written to
+SQLite in batches by a background flusher, so a turn on a hot session does
+no database I/O. Queued changes are flushed on shutdown; a crash loses at
+most one flush interval of history. A change that keeps failing to write is
+dropped (dead-lettered) after a few flushes instead of blocking the queue.
+
+The hot tier lives in one process, so this backend is for a single worker.
+"""
+import asyncio
+import json
+import logging
+from collections import OrderedDict, deque
+from typing import Optional
+
+from agents.items import TResponseInputItem
+
+from services.metrics import (
+    SESSION_DEAD_LETTERED_WRITES,
+    SESSION_FLUSH_DURATION,
+    SESSION_FLUSHED_WRITES,
+    SESSION_HOT_TIER_LOOKUPS,
+    SESSION_LOAD_DURATION,
+    SESSION_WRITE_DURATION,
+)
+from services.session_backend import SessionBackend, StoredSession, usage_totals
+from services.session_store import SessionSnapshot, SessionStore, SessionWrite
+
+logger = logging.getLogger(__name__)
+
+
+class HotSessionEntry:
+    """
+    A session's summary, the rows after it and its usage totals.
+    Rows already folded into the summary are not kept.
+    """
+
+    __slots__ = ("summary", "through_id", "rows", "usage", "size", "pending")
+
+    def __init__(self, snapshot: SessionSnapshot):
+        self.summary = snapshot.summary
+        self.through_id = snapshot.through_id
+        # (id, item, serialized size)
+        self.rows: list[tuple[int, TResponseInputItem, int]] = []
+        for row_id, data in snapshot.rows:
+            try:
+                self.rows.append((row_id, json.loads(data), len(data)))
+            except json.JSONDecodeError:
+                continue
+        self.usage = list(snapshot.usage)
+        self.size = len(self.summary) + sum(size for _, _, size in self.rows)
+        # Queued changes not yet written to SQLite; the entry is not evicted until they are
+        self.pending = 0
+
+
+class TieredSession(StoredSession):
+    """Session handle that reads and writes through the hot tier."""
+
+    def __init__(self, session_id: str, backend: "TieredSessionBackend"):
+        self.session_id = session_id
+        self.backend = backend
+
+    async def _cold(self):
+        # Older history than the hot tier holds: make SQLite current, then read it there
+        await self.backend.flush()
+        return self.backend.store.get_session(self.session_id)
+
+    async def get_items(self, limit: Optional[int] = None) -> list[TResponseInputItem]:
+        entry = await self.backend.entry(self.session_id)
+        # Rows are complete when nothing has been summarized away
+        if entry.through_id == 0 or (limit and limit <= len(entry.rows)):
+            rows = entry.rows[-limit:] if limit else entry.rows
+            return [item for _, item, _ in rows]
+        return await (await self._cold()).get_items(limit)
+
+    async def add_items(self, items: list[TResponseInputItem]) -> None:
+        if not items:
+            return
+        entry = await self.backend.entry(self.session_id)
+        with SESSION_WRITE_DURATION.time(operation="add_items"):
+            rows = []
+            for item in items:
+                data = json.dumps(item)
+                row_id = self.backend.next_id()
+                entry.rows.append((row_id, item, len(data)))
+                rows.append((row_id, data))
+            self.backend.resize(entry, sum(len(data) for _, data in rows))
+            self.backend.queue(entry, SessionWrite("items", self.session_id, rows=tuple(rows)))
+        await self.backend.apply_backpressure()
+
+    async def get_items_after(self, after_id: int) -> list[tuple[int, TResponseInputItem]]:
+        entry = await self.backend.entry(self.session_id)
+        if after_id < entry.through_id:
+            return await (await self._cold()).get_items_after(after_id)
+        with SESSION_LOAD_DURATION.time(operation="get_items_after"):
+            return [(row_id, item) for row_id, item, _ in entry.rows if row_id > after_id]
+
+    async def get_summary(self) -> tuple[str, int]:
+        entry = await self.backend.entry(self.session_id)
+        return entry.summary, entry.through_id
+
+    async def set_summary(self, summary: str, through_id: int) -> None:
+        entry = await self.backend.entry(self.session_id)
+        if through_id <= entry.through_id:
+            return
+        with SESSION_WRITE_DURATION.time(operation="set_summary"):
+            kept = [row for row in entry.rows if row[0] > through_id]
+            delta = len(summary) - len(entry.summary)
+            delta -= sum(size for _, _, size in entry.rows) - sum(size for _, _, size in kept)
+            entry.summary, entry.through_id, entry.rows = summary, through_id, kept
+            self.backend.resize(entry, delta)
+            self.backend.queue(
+                entry, SessionWrite("summary", self.session_id, summary=summary, through_id=through_id)
+            )
+        await self.backend.apply_backpressure()
+
+    async def pop_item(self) -> Optional[TResponseInputItem]:
+        entry = await self.backend.entry(self.session_id)
+        if not entry.rows:
+            return await (await self._cold()).pop_item()
+        row_id, item, size = entry.rows.pop()
+        self.backend.resize(entry, -size)
+        self.backend.queue(entry, SessionWrite("pop", self.session_id, row_id=row_id))
+        return item
+
+    async def clear_session(self) -> None:
+        entry = await self.backend.entry(self.session_id)
+        self.backend.resize(entry, -entry.size)
+        entry.summary, entry.through_id, entry.rows = "", 0, []
+        self.backend.queue(entry, SessionWrite("clear", self.session_id))
+
+
+class TieredSessionBackend(SessionBackend):
+    """
+    Hot tier of recent sessions over a :class:`SessionStore`, with write-behind.
+
+    Reads are served from memory after a session's first load; writes update
+    memory and queue a :class:`SessionWrite` that :meth:`flush` applies to
+    SQLite in one transaction per batch. Message ids are assigned here (after
+    the highest id in the database) so positions match once rows are flushed.
+    """
+
+    name = "tiered"
+
+    def __init__(
+        self,
+        store: SessionStore,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_pending: int = 1000,
+        max_attempts: int = 5,
+    ):
+        """
+        Args:
+            store: SQLite store that holds the durable copy
+            max_bytes: Approximate size of serialized history kept in memory
+            max_pending: Queued changes that start a flush before the next interval
+            max_attempts: Failed flushes after which a change is dead-lettered
+        """
+        self.store = store
+        self.max_bytes = max(1, max_bytes)
+        self.max_pending = max(1, max_pending)
+        self.max_attempts = max(1, max_attempts)
+        self._entries: OrderedDict[str, HotSessionEntry] = OrderedDict()
+        self._bytes = 0
+        self._pending: list[SessionWrite] = []
+        self._flush_lock = asyncio.Lock()
+        self._early_flush: Optional[asyncio.Future] = None
+        self._last_id = store.max_message_id()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flushed_writes = 0
+        self.flush_batches = 0
+        self.flush_errors = 0
+        self.dead_lettered = 0
+        # Most recent dropped changes, kept for inspection
+        self.dead_letters: deque[SessionWrite] = deque(maxlen=100)
+
+    def next_id(self) -> int:
+        self._last_id += 1
+        return self._last_id
+
+    async def entry(self, session_id: str) -> HotSessionEntry:
+        """The hot entry for ``session_id``, loaded from SQLite on a miss."""
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            SESSION_HOT_TIER_LOOKUPS.inc(result="hit")
+            return entry
+        self.misses += 1
+        SESSION_HOT_TIER_LOOKUPS.inc(result="miss")
+        with SESSION_LOAD_DURATION.time(operation="load_snapshot"):
+            snapshot = await asyncio.to_thread(self.store.load_snapshot, session_id)
+        # Another request may have loaded it meanwhile; keep the first copy
+        entry = self._entries.get(session_id)
+        if entry is None:
+            entry = self._entries[session_id] = HotSessionEntry(snapshot)
+            self._bytes += entry.size
+            self._evict()
+        return entry
+
+    def resize(self, entry: HotSessionEntry, delta: int) -> None:
+        entry.size += delta
+        self._bytes += delta
+        if delta > 0:
+            self._evict()
+
+    def queue(self, entry: HotSessionEntry, write: SessionWrite) -> None:
+        entry.pending += 1
+        self._pending.append(write)
+
+    async def apply_backpressure(self) -> None:
+        """
+        Start a flush early once ``max_pending`` changes are queued; writers only
+        wait for one when twice that many are (SQLite is falling behind), so
+        the queue stays bounded.
+        """
+        pending = len(self._pending)
+        if pending >= 2 * self.max_pending:
+            await self.flush()
+        elif pending >= self.max_pending and (self._early_flush is None or self._early_flush.done()):
+            self._early_flush = asyncio.ensure_future(self.flush())
+
+    def _evict(self) -> None:
+        if self._bytes <= self.max_bytes:
+            return
+        # Oldest first; sessions with unflushed changes and the one in use stay
+        for session_id in list(self._entries)[:-1]:
+            if self._bytes <= self.max_bytes:
+                break
+            entry = self._entries[session_id]
+            if entry.pending:
+                continue
+            del self._entries[session_id]
+            self._bytes -= entry.size
+            self.evictions += 1
+
+    async def flush(self) -> int:
+        """
+        Write every queued change to SQLite.
+        Shielded from cancellation so a batch is never half-accounted.
+
+        Returns:
+            Number of changes written
+        """
+        return await asyncio.shield(self._flush())
+
+    async def _flush(self) -> int:
+        async with self._flush_lock:
+            writes, self._pending = self._pending, []
+            if not writes:
+                return 0
+            try:
+                with SESSION_FLUSH_DURATION.time():
+                    await asyncio.to_thread(self.store.write_batch, writes)
+            except Exception as e:
+                self.flush_errors += 1
+                logger.error(f"Failed to flush {len(writes)} session changes: {e}", exc_info=True)
+                writes = await self._flush_each(writes)
+            for write in writes:
+                self._settle(write)
+            if writes:
+                self.flushed_writes += len(writes)
+                self.flush_batches += 1
+                SESSION_FLUSHED_WRITES.inc(len(writes))
+            self._evict()
+            return len(writes)
+
+    async def _flush_each(self, writes: list[SessionWrite]) -> list[SessionWrite]:
+        """
+        Write the changes of a failed batch one transaction each, so one bad
+        change does not hold back the others. A change that fails is queued
+        again, followed by the later changes of its session (in order), until
+        it has failed ``max_attempts`` flushes; then it is dead-lettered.
+
+        Returns:
+            The changes written
+        """
+        written: list[SessionWrite] = []
+        retry: list[SessionWrite] = []
+        blocked: set[str] = set()
+        for write in writes:
+            if write.session_id in blocked:
+                retry.append(write)
+                continue
+            try:
+                await asyncio.to_thread(self.store.write_batch, [write])
+            except Exception as e:
+                write.attempts += 1
+                if write.attempts < self.max_attempts:
+                    blocked.add(write.session_id)
+                    retry.append(write)
+                else:
+                    self._dead_letter(write, e)
+                continue
+            written.append(write)
+        # Ahead of anything queued during the flush
+        self._pending[:0] = retry
+        return written
+
+    def _dead_letter(self, write: SessionWrite, error: Exception) -> None:
+        # The hot tier still holds the change until the session is evicted
+        self._settle(write)
+        self.dead_letters.append(write)
+        self.dead_lettered += 1
+        SESSION_DEAD_LETTERED_WRITES.inc()
+        logger.error(
+            f"Dropped {write.kind} change to session {write.session_id} "
+            f"after {write.attempts} failed flushes: {error}"
+        )
+
+    def _settle(self, write: SessionWrite) -> None:
+        entry = self._entries.get(write.session_id)
+        if entry is not None:
+            entry.pending -= 1
+
+    def get_session(self, session_id: str) -> TieredSession:
+        return TieredSession(session_id, self)
+
+    async def record_usage(
+        self, session_id: str, requests: int, input_tokens: int, output_tokens: int
+    ) -> None:
+        entry = await self.entry(session_id)
+        for i, amount in enumerate((requests, input_tokens, output_tokens)):
+            entry.usage[i] += amount
+        self.queue(
+            entry,
+            SessionWrite("usage", session_id, usage=(requests, input_tokens, output_tokens)),
+        )
+        await self.apply_backpressure()
+
+    async def load_usage(self, session_id: str) -> dict:
+        return usage_totals(*(await self.entry(session_id)).usage)
+
+    async def aclose(self) -> None:
+        """
+        Flush every queued change (the durable copy is complete after this).
+        Flushes are retried, with a short pause, until the queue is empty or
+        ``max_attempts`` flushes in a row have written nothing; whatever is
+        still queued then is dead-lettered.
+        """
+        failures = 0
+        while self._pending and failures < self.max_attempts:
+            if await self.flush():
+                failures = 0
+                continue
+            failures += 1
+            # Give a transient lock time to clear
+            await asyncio.sleep(0.05 * failures)
+        writes, self._pending = self._pending, []
+        for write in writes:
+            self._dead_letter(write, RuntimeError("not written before close"))
+
+    def stats(self) -> dict:
+        """Hot tier size, hit rate and write-behind progress."""
+        lookups = self.hits + self.misses
+        return {
+            "sessions": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "pending_writes": len(self._pending),
+            "flushed_writes": self.flushed_writes,
+            "flush_batches": self.flush_batches,
+            "flush_errors": self.flush_errors,
+            "dead_lettered": self.dead_lettered,
+        }
+
+
+async def run_flush_loop(backend: TieredSessionBackend, interval_seconds: float) -> None:
+    """Flush queued session changes every ``interval_seconds`` until cancelled."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await backend.flush()
@@ -0,0 +1,176 @@
+"""
+Token usage and cost accounting.
+Records the usage reported on each agent ``RunResult`` per model (in memory)
+and per session (persisted in the session backend), exposes it to the metrics
+surface and enforces an optional per-session token budget.
+"""
+import logging
+import threading
+from typing import Optional
+
+from agents.usage import Usage
+
+from config import settings
+from services.metrics import metrics_registry
+from services.session_backend import SessionBackend, get_session_backend
+
+logger = logging.getLogger(__name__)
+
+TOKENS = metrics_registry.counter(
+    "portfolio_tokens_total",
+    "Model tokens by model and direction (input/output).",
+    ("model", "direction"),
+)
+COST = metrics_registry.counter(
+    "portfolio_cost_usd_total",
+    "Estimated model spend in USD.",
+    ("model",),
+)
+PROMPT_TOKENS = metrics_registry.histogram(
+    "portfolio_prompt_tokens",
+    "Input tokens per agent run.",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000),
+)
+BUDGET_REJECTIONS = metrics_registry.counter(
+    "portfolio_token_budget_rejections_total",
+    "Turns refused because the session token budget was spent.",
+)
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a session has used up its token budget."""
+
+    def __init__(self, session_id: str, used: int, budget: int):
+        super().__init__(f"Session token budget exhausted ({used}/{budget} tokens)")
+        self.session_id = session_id
+        self.used = used
+        self.budget = budget
+
+
+def usage_to_dict(usage: Usage) -> dict:
+    """Plain-dict view of an SDK ``Usage``."""
+    return {
+        "requests": usage.requests,
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "total_tokens": usage.input_tokens + usage.output_tokens,
+    }
+
+
+class UsageTracker:
+    """Aggregates token usage per model and per session."""
+
+    def __init__(
+        self,
+        store: Optional[SessionBackend] = None,
+        pricing: Optional[dict[str, tuple[float, float]]] = None,
+        session_token_budget: int = 0,
+    ):
+        """
+        Args:
+            store: Session backend holding the per-session totals
+                (default: the configured backend)
+            pricing: USD per million ``(input, output)`` tokens by model name
+            session_token_budget: Tokens a session may consume (0 = unlimited)
+        """
+        self._store = store
+        self.pricing = pricing or {}
+        self.session_token_budget = session_token_budget
+        self._models: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def store(self) -> SessionBackend:
+        return self._store or get_session_backend()
+
+    def cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+        """Estimated USD cost of the given token counts (0 for unpriced models)."""
+        input_price, output_price = self.pricing.get(model, (0.0, 0.0))
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    async def record(self, model: str, usage: Usage, session_id: Optional[str] = None) -> None:
+        """
+        Record the usage of one agent run.
+
+        Args:
+            model: Model that served the run
+            usage: Usage from ``RunResult.context_wrapper.usage``
+            session_id: Session to charge (None for stateless runs)
+        """
+        if not usage.requests and not usage.input_tokens and not usage.output_tokens:
+            return
+        cost = self.cost(model, usage.input_tokens, usage.output_tokens)
+        with self._lock:
+            totals = self._models.setdefault(model, {
+                "runs": 0, "requests": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0,
+            })
+            totals["runs"] += 1
+            totals["requests"] += usage.requests
+            totals["input_tokens"] += usage.input_tokens
+            totals["output_tokens"] += usage.output_tokens
+            totals["cost_usd"] += cost
+
+        TOKENS.inc(usage.input_tokens, model=model, direction="input")
+        TOKENS.inc(usage.output_tokens, model=model, direction="output")
+        COST.inc(cost, model=model)
+        PROMPT_TOKENS.observe(usage.input_tokens)
+
+        if session_id:
+            await self.store.record_usage(
+                session_id,
+                usage.requests,
+                usage.input_tokens,
+                usage.output_tokens,
+            )
+
+    async def session_usage(self, session_id: str) -> dict:
+        """Running totals, estimated cost and remaining budget for a session."""
+        totals = await self.store.load_usage(session_id)
+        budget = self.session_token_budget
+        return {
+            "session_id": session_id,
+            **totals,
+            "cost_usd": round(
+                self.cost(settings.default_model, totals["input_tokens"], totals["output_tokens"]), 6
+            ),
+            "token_budget": budget or None,
+            "remaining_tokens": max(0, budget - totals["total_tokens"]) if budget else None,
+        }
+
+    async def check_budget(self, session_id: Optional[str]) -> None:
+        """
+        Refuse a turn once the session has spent its token budget.
+
+        Raises:
+            TokenBudgetExceeded: If the budget is set and used up
+        """
+        if not session_id or not self.session_token_budget:
+            return
+        used = (await self.store.load_usage(session_id))["total_tokens"]
+        if used >= self.session_token_budget:
+            BUDGET_REJECTIONS.inc()
+            logger.info(f"Session {session_id} exceeded its token budget ({used} tokens)")
+            raise TokenBudgetExceeded(session_id, used, self.session_token_budget)
+
+    def model_stats(self) -> dict:
+        """Aggregated usage and estimated cost per model."""
+        with self._lock:
+            return {
+                model: {**totals, "cost_usd": round(totals["cost_usd"], 6)}
+                for model, totals in self._models.items()
+            }
+
+
+# Global usage tracker instance
+_usage_tracker: Optional[UsageTracker] = None
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Get the global usage tracker (singleton)."""
+    global _usage_tracker
+    if _usage_tracker is None:
+        _usage_tracker = UsageTracker(
+            pricing=settings.model_pricing,
+            session_token_budget=settings.session_token_budget,
+        )
+    return _usage_tracker
@@ -0,0 +1,140 @@
+"""
+Startup warm-up and readiness.
+Exercises the request path once before traffic arrives: opens the session
+store (schema and pooled connections), primes the shared HTTP pool with
+connections to every model endpoint, and optionally answers canned questions
+to fill the response cache. The worker reports ready only once this is done,
+so load balancers can route on readiness while liveness stays unaffected.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from config import settings
+from services.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+READY = metrics_registry.gauge(
+    "portfolio_ready",
+    "1 once the worker has finished warming up and accepts traffic.",
+)
+WARMUP_STEP_DURATION = metrics_registry.gauge(
+    "portfolio_warmup_step_seconds",
+    "Time taken by each warm-up step.",
+    ("step",),
+)
+
+WARMUP_SESSION_ID = "__warmup__"
+
+
+class Warmup:
+    """Runs the warm-up steps and tracks readiness."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        queries: Optional[list[str]] = None,
+        connections: int = 2,
+        step_timeout: float = 30.0,
+    ):
+        """
+        Args:
+            enabled: When False the worker is ready immediately
+            queries: Canned questions answered at startup to fill the response cache
+            connections: Connections opened per model endpoint
+            step_timeout: Seconds allowed for each step
+        """
+        self.enabled = enabled
+        self.queries = list(queries or [])
+        self.connections = connections
+        self.step_timeout = step_timeout
+        self.reset()
+
+    def reset(self) -> None:
+        """Mark the worker not ready (e.g. at the start of a new lifespan)."""
+        self.status = "pending" if self.enabled else "ready"
+        self.steps: dict[str, dict] = {}
+        READY.set(0 if self.enabled else 1)
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    async def _step(self, name: str, fn: Callable[[], Awaitable[None]]) -> None:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(fn(), self.step_timeout)
+            outcome = {"ok": True}
+        except Exception as e:
+            # A failed step slows the first request down but must not keep the worker out
+            logger.warning(f"Warm-up step {name} failed: {type(e).__name__}: {e}")
+            outcome = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        duration = time.perf_counter() - start
+        WARMUP_STEP_DURATION.set(duration, step=name)
+        self.steps[name] = {**outcome, "duration_ms": round(duration * 1000, 2)}
+
+    async def _open_session_store(self) -> None:
+        from services.session_backend import get_session_backend
+
+        await get_session_backend().get_session(WARMUP_SESSION_ID).get_items()
+
+    async def _prime_http_pool(self) -> None:
+        from portfolio_agents.stub_model import STUB_MODEL_NAME
+        from services.http_client import get_http_client
+
+        client = get_http_client()
+        base_urls = {url for model, url in settings.model_endpoints if model != STUB_MODEL_NAME}
+        headers = {"Authorization": f"Bearer {settings.gemini_api_key}"}
+
+        async def connect(url: str) -> None:
+            # Any HTTP response means the connection (and TLS session) is pooled
+            await client.get(url.rstrip("/") + "/models", headers=headers)
+
+        await asyncio.gather(*(
+            connect(url) for url in base_urls for _ in range(max(1, self.connections))
+        ))
+
+    async def run(self, answer: Optional[Callable[[str], Awaitable[object]]] = None) -> None:
+        """
+        Run every warm-up step, then mark the worker ready.
+
+        Args:
+            answer: Produces a (cached) reply for a canned question
+        """
+        if not self.enabled:
+            return
+        self.status = "warming"
+        start = time.perf_counter()
+        await self._step("session_store", self._open_session_store)
+        await self._step("http_pool", self._prime_http_pool)
+        if answer is not None and self.queries:
+            async def fill_cache() -> None:
+                for query in self.queries:
+                    await answer(query)
+            await self._step("response_cache", fill_cache)
+        self.status = "ready"
+        READY.set(1)
+        logger.info(f"Warm-up finished in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    def stats(self) -> dict:
+        """Readiness and per-step outcomes."""
+        return {"status": self.status, "steps": self.steps}
+
+
+# Global warm-up instance
+_warmup: Optional[Warmup] = None
+
+
+def get_warmup() -> Warmup:
+    """Get the process warm-up tracker (singleton)."""
+    global _warmup
+    if _warmup is None:
+        _warmup = Warmup(
+            enabled=settings.warmup_enabled,
+            queries=settings.warmup_queries,
+            connections=settings.warmup_connections,
+            step_timeout=settings.warmup_timeout_seconds,
+        )
+    return _warmup
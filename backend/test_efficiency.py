@@ -3,6 +3,7 @@ Efficiency testing script using Playwright to test the backend API.
 Measures response times, tests endpoints, and generates a performance report.
 """
 import asyncio
+import math
 import time
 import json
 from datetime import datetime
@@ -209,6 +210,12 @@ class PerformanceTester:
             print(f"   Fastest Response: {min_response_time:.2f}ms")
             print(f"   Slowest Response: {max_response_time:.2f}ms")
             
+            # Tail latency (what users notice), nearest-rank percentiles
+            times = sorted(r['response_time_ms'] for r in successful)
+            for pct in (50, 95, 99):
+                rank = max(1, math.ceil(pct / 100 * len(times)))
+                print(f"   p{pct} Response Time: {times[rank - 1]:.2f}ms")
+            
             # Performance ratings
             if avg_response_time < 50:
                 rating = "🚀 Excellent"
@@ -0,0 +1,55 @@
+"""
+Shared pytest fixtures.
+Configures the backend to use the offline stub model and a temporary
+session database before any application module is imported.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+_TMP_DIR = tempfile.mkdtemp(prefix="portfolio-tests-")
+os.environ["DEFAULT_MODEL"] = "stub"
+os.environ["GEMINI_API_KEY"] = "test-key"
+os.environ["SESSION_DB_PATH"] = os.path.join(_TMP_DIR, "conversations.db")
+os.environ["OPENAI_AGENTS_DISABLE_TRACING"] = "1"
+# Tests send many requests from one client; rate limiting is tested explicitly
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+# Tests exercise the agent path; the fast path is tested explicitly
+os.environ["FAST_PATH_ENABLED"] = "false"
+
+
+@pytest.fixture
+def client():
+    """FastAPI test client with the application lifespan running."""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def admin_headers(monkeypatch):
+    """Configure an admin token and return the headers that carry it."""
+    from config import settings
+
+    monkeypatch.setattr(settings, "admin_token", "test-admin-token")
+    return {"X-Admin-Token": "test-admin-token"}
+
+
+@pytest.fixture(autouse=True)
+def reset_response_caches():
+    """Start every test with empty response caches."""
+    from services.response_cache import get_response_cache
+    from services.semantic_cache import get_semantic_cache
+
+    get_response_cache().clear()
+    get_semantic_cache().clear()
+    yield
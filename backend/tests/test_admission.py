@@ -0,0 +1,122 @@
+"""
+Tests for admission control in front of agent runs.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import services.admission as admission
+from main import app
+from portfolio_agents import get_portfolio_agent
+from services.admission import AdmissionController, AdmissionRejected
+from services.resilience import base_model
+
+RUN_LATENCY = 0.2
+
+
+@pytest.mark.asyncio
+async def test_in_flight_is_capped():
+    controller = AdmissionController(max_in_flight=2, max_queue=10, queue_timeout=5)
+    running = peak = 0
+
+    async def run():
+        nonlocal running, peak
+        async with controller.admit():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+    await asyncio.gather(*(run() for _ in range(8)))
+    assert peak == 2
+    assert controller.stats()["admitted"] == 8
+    assert controller.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejected_with_429():
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5)
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.admit():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.admit():
+            pass
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after >= 1
+
+    release.set()
+    await asyncio.gather(holder, waiter)
+
+
+@pytest.mark.asyncio
+async def test_queue_deadline_rejected_with_503():
+    controller = AdmissionController(max_in_flight=1, max_queue=5, queue_timeout=0.05)
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.admit():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.admit():
+            pass
+    assert exc_info.value.status_code == 503
+
+    release.set()
+    await holder
+    # The timed-out waiter must not leak its slot
+    async with controller.admit():
+        assert controller.stats()["in_flight"] == 1
+    assert controller.stats()["queued"] == 0
+
+
+@pytest.fixture
+def overloaded(monkeypatch):
+    """Slow stub model behind a small admission controller."""
+    model = base_model(get_portfolio_agent().model)
+    monkeypatch.setattr(model, "latency", RUN_LATENCY)
+    controller = AdmissionController(max_in_flight=4, max_queue=4, queue_timeout=2 * RUN_LATENCY)
+    monkeypatch.setattr(admission, "_admission_controller", controller)
+    return controller
+
+
+@pytest.mark.asyncio
+async def test_goodput_holds_under_overload(overloaded):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def ask(i):
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/assistant/chat",
+                json={"message": f"overload question {i}", "session_id": f"overload-{i}"},
+            )
+            return response, time.perf_counter() - start
+
+        results = await asyncio.gather(*(ask(i) for i in range(40)))
+
+    ok = [elapsed for response, elapsed in results if response.status_code == 200]
+    rejected = [
+        (response, elapsed) for response, elapsed in results if response.status_code in (429, 503)
+    ]
+    assert len(ok) + len(rejected) == len(results)
+    # Every slot and queue position turns into a completed answer
+    assert len(ok) >= overloaded.max_in_flight + overloaded.max_queue
+    # Admitted requests finish within one queue wait plus one run
+    assert max(ok) < 4 * RUN_LATENCY
+    # Excess load is shed quickly, with a hint when to come back
+    assert all("retry-after" in response.headers for response, _ in rejected)
+    assert min(elapsed for _, elapsed in rejected) < RUN_LATENCY
+    assert overloaded.stats()["in_flight"] == 0
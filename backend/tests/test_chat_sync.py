@@ -0,0 +1,58 @@
+"""
+Concurrency tests for the /chat/sync compatibility endpoint.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from main import app
+from portfolio_agents import get_portfolio_agent
+from services.resilience import base_model
+
+SYNC_CHAT_LATENCY = 0.5
+
+
+@pytest.fixture
+def slow_model():
+    model = base_model(get_portfolio_agent().model)
+    original = model.latency
+    model.latency = SYNC_CHAT_LATENCY
+    yield model
+    model.latency = original
+
+
+@pytest.mark.asyncio
+async def test_health_latency_flat_while_sync_chats_in_flight(slow_model):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        baseline = time.perf_counter()
+        assert (await client.get("/health")).status_code == 200
+        idle_latency = time.perf_counter() - baseline
+
+        chats = [
+            asyncio.create_task(
+                client.post(
+                    "/api/assistant/chat/sync",
+                    json={"message": f"question {i}", "session_id": f"sync-{i}"},
+                )
+            )
+            for i in range(4)
+        ]
+        await asyncio.sleep(0.05)
+
+        health_latencies = []
+        for _ in range(5):
+            start = time.perf_counter()
+            response = await client.get("/health")
+            health_latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200
+            await asyncio.sleep(0.02)
+
+        assert not any(task.done() for task in chats)
+        responses = await asyncio.gather(*chats)
+
+    assert all(r.status_code == 200 for r in responses)
+    assert max(health_latencies) < max(0.1, idle_latency * 10)
+    assert max(health_latencies) < SYNC_CHAT_LATENCY / 2
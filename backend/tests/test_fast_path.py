@@ -0,0 +1,139 @@
+"""
+Tests for the deterministic fast-path answerer.
+"""
+import json
+import uuid
+
+import pytest
+
+import services.fast_path as fast_path
+from config import settings
+from services.fast_path import FAST_PATH_MODEL, FastPath
+from services.knowledge import load_portfolio_data
+
+
+@pytest.fixture(scope="module")
+def data():
+    return load_portfolio_data(settings.knowledge_dir)
+
+
+@pytest.fixture
+def enabled_fast_path(monkeypatch, data):
+    answerer = FastPath(data)
+    monkeypatch.setattr(fast_path, "_fast_path", answerer)
+    return answerer
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("What's his email?", "contact"),
+    ("How can I contact him?", "contact"),
+    ("GitHub link", "github"),
+    ("LinkedIn?", "linkedin"),
+    ("what skills", "skills"),
+    ("What tech does Abdullah know?", "skills"),
+    ("Show me his projects", "projects"),
+    ("Where did he study?", "education"),
+])
+def test_common_questions_are_classified(data, message, intent):
+    name, confidence, outcome = FastPath(data).classify(message)
+    assert (name, outcome) == (intent, "match")
+    assert confidence >= 0.7
+
+
+@pytest.mark.parametrize("message, reason", [
+    ("Hello there", "low_confidence"),
+    ("What skills did he use in his projects?", "ambiguous"),
+    ("Describe the Python backend frameworks and projects in detail", "too_long"),
+    ("Why Python?", "deferred"),
+    ("Don't show his email", "deferred"),
+    ("???", "no_match"),
+    # A keyword match plus words that change what is asked
+    ("What's his email password?", "unexplained"),
+    ("Give me his GitHub token", "unexplained"),
+    ("What's his address?", "unexplained"),
+    ("What is his best project?", "unexplained"),
+    ("latest project?", "unexplained"),
+    ("Any Java projects?", "unexplained"),
+    ("What languages does he speak?", "unexplained"),
+    ("What tools does he use for CI?", "unexplained"),
+    ("What are his weaknesses in skills?", "unexplained"),
+    ("Where does he work?", "no_match"),
+])
+def test_other_questions_fall_through(data, message, reason):
+    assert FastPath(data).classify(message)[2] == reason
+
+
+def test_cache_synonyms_do_not_widen_intents(data, monkeypatch):
+    import services.semantic_cache as semantic_cache
+
+    # A broad fold in the cache's vocabulary must not make "work" mean projects here
+    monkeypatch.setitem(semantic_cache.SYNONYMS, "work", "projects")
+    assert FastPath(data).classify("Where does he work?")[2] != "match"
+
+
+def test_answers_are_filled_from_portfolio_data(data):
+    answerer = FastPath(data)
+    assert data["profile"]["email"] in answerer.answer("email address").text
+    skills = answerer.answer("tech stack").text
+    assert all(item in skills for group in data["skills"] for item in group["items"])
+
+    answerer.answer("Tell me a joke")
+    stats = answerer.stats()
+    assert stats["answered"] == 2 and stats["fall_through"] == 1
+    assert stats["absorbed_ratio"] == pytest.approx(2 / 3, abs=1e-3)
+    assert stats["by_intent"] == {"contact": 1, "skills": 1}
+
+
+def test_intents_without_data_are_dropped():
+    answerer = FastPath({"profile": {"name": "A"}, "skills": [], "projects": []})
+    assert answerer.intents == []
+    assert answerer.answer("What's his email?") is None
+
+
+def test_chat_answers_without_model_call(client, enabled_fast_path, data):
+    session_id = f"fast-{uuid.uuid4().hex}"
+    body = client.post(
+        "/api/assistant/chat", json={"message": "Where is his GitHub?", "session_id": session_id}
+    ).json()
+    assert body["model"] == FAST_PATH_MODEL
+    assert data["profile"]["github"] in body["response"]
+    assert body["usage"]["requests"] == 0
+
+    # The agent still sees the templated turn as history
+    follow_up = client.post(
+        "/api/assistant/chat", json={"message": "Tell me a joke", "session_id": session_id}
+    ).json()
+    assert follow_up["model"] != FAST_PATH_MODEL
+    assert follow_up["usage"]["requests"] == 1
+
+    stats = client.get("/api/assistant/cache/stats").json()["fast_path"]
+    assert stats["answered"] == 1 and stats["fall_through"] == 1
+    assert 'portfolio_fast_path_answers_total{intent="github"}' in client.get("/metrics").text
+
+
+def test_stream_answers_without_model_call(client, enabled_fast_path):
+    with client.stream(
+        "POST", "/api/assistant/chat/stream", json={"message": "What skills?"}
+    ) as response:
+        events = [
+            json.loads(line[len("data: "):])
+            for line in response.iter_lines()
+            if line.startswith("data: ")
+        ]
+    assert [event["type"] for event in events] == ["delta", "done"]
+    assert events[-1]["model"] == FAST_PATH_MODEL
+    assert events[-1]["usage"]["requests"] == 0
+
+
+def test_turns_with_client_history_skip_the_fast_path(client, enabled_fast_path):
+    history = [
+        {"role": "user", "content": "What has he built?"},
+        {"role": "assistant", "content": "A portfolio assistant and several agent projects."},
+    ]
+    body = client.post(
+        "/api/assistant/chat",
+        json={"message": "What skills?", "conversation_history": history},
+    ).json()
+    assert body["model"] != FAST_PATH_MODEL
+    assert body["usage"]["requests"] == 1
+    assert enabled_fast_path.stats()["answered"] == 0
@@ -0,0 +1,148 @@
+"""
+Tests for hedged stateless runs.
+"""
+import asyncio
+import time
+
+import agents as openai_agents
+import pytest
+
+import services.hedging as hedging
+from portfolio_agents.stub_model import StubModel
+from services.hedging import Hedger
+
+
+def _slow_then_fast(delays: list[float]):
+    """Coroutine factory whose n-th call sleeps ``delays[n]``; records cancellations."""
+    state = {"started": 0, "cancelled": 0}
+
+    async def attempt():
+        index = state["started"]
+        state["started"] += 1
+        try:
+            await asyncio.sleep(delays[index])
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+        return f"attempt-{index}"
+
+    return attempt, state
+
+
+@pytest.mark.asyncio
+async def test_slow_attempt_is_hedged_and_loser_cancelled():
+    hedger = Hedger(enabled=True, initial_delay=0.02, max_extra_ratio=1.0)
+    attempt, state = _slow_then_fast([1.0, 0.01])
+
+    start = time.perf_counter()
+    assert await hedger.run(attempt) == "attempt-1"
+    assert time.perf_counter() - start < 0.5
+    # The loser is cancelled as soon as the hedge wins
+    await asyncio.sleep(0)
+    assert state == {"started": 2, "cancelled": 1}
+    assert hedger.stats()["hedge_wins"] == 1
+    # The loser's time so far (a lower bound of its latency) is recorded, not the hedge's
+    assert len(hedger._latencies) == 1
+    assert 0.025 <= hedger._latencies[0] < 0.5
+
+
+@pytest.mark.asyncio
+async def test_delay_stays_stable_under_steady_load():
+    # Every 4th first attempt is slow (hedges are fast): the 80th percentile of
+    # first attempts is the slow latency, and hedged runs must not drag it down
+    hedger = Hedger(
+        enabled=True, percentile=80, initial_delay=0.2, min_samples=10, max_extra_ratio=1.0, window=50
+    )
+
+    def attempts(slow: bool):
+        started = 0
+
+        async def attempt():
+            nonlocal started
+            started += 1
+            await asyncio.sleep(0.1 if slow and started == 1 else 0.005)
+
+        return attempt
+
+    delays = []
+    for i in range(100):
+        await hedger.run(attempts(slow=i % 4 == 0))
+        delays.append(hedger.hedge_delay())
+    await asyncio.sleep(0.15)
+    assert min(delays[60:]) >= 0.09
+    assert hedger.hedges <= 10
+
+
+@pytest.mark.asyncio
+async def test_fast_attempt_is_not_hedged():
+    hedger = Hedger(enabled=True, initial_delay=0.2)
+    attempt, state = _slow_then_fast([0.0])
+    assert await hedger.run(attempt) == "attempt-0"
+    assert state["started"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedge_budget_caps_extra_load():
+    hedger = Hedger(enabled=True, initial_delay=0.01, max_extra_ratio=0.25)
+    for _ in range(8):
+        attempt, _ = _slow_then_fast([0.03, 0.03])
+        await hedger.run(attempt)
+    # One initial hedge plus a quarter of a hedge per call
+    assert hedger.hedges <= 1 + 8 * 0.25
+
+
+@pytest.mark.asyncio
+async def test_failed_attempt_falls_through_to_the_other():
+    hedger = Hedger(enabled=True, initial_delay=0.01, max_extra_ratio=1.0)
+    calls = 0
+
+    async def attempt():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(0.05)
+            return "primary"
+        raise RuntimeError("hedge failed")
+
+    assert await hedger.run(attempt) == "primary"
+
+
+def test_delay_follows_recent_latency_percentile():
+    hedger = Hedger(enabled=True, percentile=90, initial_delay=5.0, min_samples=10)
+    assert hedger.hedge_delay() == 5.0
+    hedger._latencies.extend([0.1] * 9 + [3.0])
+    assert hedger.hedge_delay() == pytest.approx(0.1)
+    hedger._latencies.extend([3.0])
+    assert hedger.hedge_delay() == pytest.approx(3.0)
+
+
+@pytest.mark.asyncio
+async def test_hedged_agent_run_with_stalling_model():
+    stub = StubModel(reply_fn=lambda _: "answer")
+    original = stub.get_response
+    stalls = [5.0]
+
+    async def stalling_get_response(*args, **kwargs):
+        if stalls:
+            await asyncio.sleep(stalls.pop())
+        return await original(*args, **kwargs)
+
+    stub.get_response = stalling_get_response
+    agent = openai_agents.Agent(name="HedgeTest", instructions="Be brief.", model=stub)
+    hedger = Hedger(enabled=True, initial_delay=0.02)
+
+    start = time.perf_counter()
+    result = await hedger.run(lambda: openai_agents.Runner.run(agent, "hello"))
+    assert result.final_output == "answer"
+    assert time.perf_counter() - start < 1.0
+
+
+def test_chat_uses_hedger(client, monkeypatch):
+    hedger = Hedger(enabled=True, initial_delay=1.0)
+    monkeypatch.setattr(hedging, "_hedger", hedger)
+    response = client.post(
+        "/api/assistant/chat", json={"message": "Hedging smoke test", "session_id": "hedge-1"}
+    )
+    assert response.status_code == 200
+    assert hedger.calls == 1
+    assert client.get("/api/assistant/cache/stats").json()["hedging"]["calls"] == 1
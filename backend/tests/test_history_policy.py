@@ -0,0 +1,77 @@
+"""
+Tests for the bounded history policy.
+"""
+import pytest
+
+from services.history_policy import SUMMARY_PREFIX, HistoryPolicySession
+from services.session_store import SessionStore, make_turn_items
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SessionStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+async def _seed_one(session, i):
+    await session.add_items(make_turn_items(f"question {i}", f"answer {i}. More detail."))
+
+
+async def _seed(session, turns):
+    for i in range(turns):
+        await _seed_one(session, i)
+
+
+@pytest.mark.asyncio
+async def test_short_history_is_untouched(store):
+    session = HistoryPolicySession(store.get_session("s"), max_turns=4)
+    await _seed(session, 3)
+    items = await session.get_items()
+    assert [item["content"] for item in items[::2]] == ["question 0", "question 1", "question 2"]
+
+
+@pytest.mark.asyncio
+async def test_old_turns_fold_into_summary(store):
+    session = HistoryPolicySession(store.get_session("s"), max_turns=2)
+    await _seed(session, 5)
+
+    items = await session.get_items()
+    assert items[0]["role"] == "system"
+    assert items[0]["content"].startswith(SUMMARY_PREFIX)
+    assert "question 0" in items[0]["content"] and "answer 2" in items[0]["content"]
+    assert [item["content"] for item in items[1:]] == [
+        "question 3", "answer 3. More detail.", "question 4", "answer 4. More detail."
+    ]
+
+    # Incremental: the next read only folds the newly aged-out turn
+    await _seed_one(session, 5)
+    items = await session.get_items()
+    assert "question 3" in items[0]["content"]
+    assert [item["content"] for item in items[1::2]] == ["question 4", "question 5"]
+    summary, through_id = await store.get_session("s").get_summary()
+    assert summary.count("User asked") == 4
+    assert through_id > 0
+
+
+@pytest.mark.asyncio
+async def test_token_budget_caps_verbatim_history(store):
+    session = HistoryPolicySession(
+        store.get_session("s"), max_turns=50, token_budget=300, summary_max_tokens=100
+    )
+    for i in range(20):
+        await session.add_items(make_turn_items(f"question {i}", "x" * 200))
+
+    items = await session.get_items()
+    verbatim_tokens = sum(len(str(item["content"])) // 4 for item in items[1:])
+    assert verbatim_tokens <= 200
+    assert items[-2]["content"] == "question 19"
+
+
+@pytest.mark.asyncio
+async def test_clear_session_drops_summary(store):
+    session = HistoryPolicySession(store.get_session("s"), max_turns=1)
+    await _seed(session, 3)
+    await session.get_items()
+    await session.clear_session()
+    assert await session.get_items() == []
@@ -0,0 +1,54 @@
+"""
+Tests for the shared upstream HTTP client.
+"""
+import asyncio
+
+import pytest
+
+import services.http_client as http_client
+from services.http_client import CONNECTIONS_OPENED, create_http_client
+
+
+async def _keep_alive_server() -> asyncio.AbstractServer:
+    """Minimal HTTP/1.1 server answering every request on a kept-alive connection."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused_and_counted():
+    server = await _keep_alive_server()
+    port = server.sockets[0].getsockname()[1]
+    client = create_http_client(max_connections=4, keepalive_expiry=30.0)
+    opened = CONNECTIONS_OPENED.value()
+    try:
+        for _ in range(3):
+            response = await client.get(f"http://127.0.0.1:{port}/")
+            assert response.text == "ok"
+        assert CONNECTIONS_OPENED.value() - opened == 1
+        assert client._transport.pool_stats() == {"connections": 1, "active": 0, "idle": 1}
+    finally:
+        await client.aclose()
+        server.close()
+        await server.wait_closed()
+
+
+def test_client_lives_with_the_application():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as client:
+        shared = http_client.get_http_client()
+        assert not shared.is_closed
+        text = client.get("/metrics").text
+        assert 'portfolio_http_pool_connections{state="idle"}' in text
+        assert "portfolio_http_pool_max_connections" in text
+    assert shared.is_closed
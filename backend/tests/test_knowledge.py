@@ -0,0 +1,120 @@
+"""
+Tests for the portfolio knowledge base and per-run retrieval.
+"""
+import uuid
+
+import pytest
+
+import agents as openai_agents
+
+from config import settings
+from portfolio_agents.portfolio_agent import INSTRUCTIONS_TEMPLATE
+from portfolio_agents.stub_model import StubModel
+from services.knowledge import (
+    KnowledgeBase,
+    KnowledgeInstructions,
+    load_knowledge,
+    retrieval_query,
+)
+
+
+@pytest.fixture(scope="module")
+def knowledge():
+    return KnowledgeBase(load_knowledge(settings.knowledge_dir), top_k=2)
+
+
+def _ids(chunks) -> list[str]:
+    return [chunk.id for chunk in chunks]
+
+
+def test_structured_files_are_chunked(knowledge):
+    ids = _ids(knowledge.chunks)
+    assert ids[:2] == ["profile", "contact"]
+    assert any(i.startswith("skills:") for i in ids)
+    assert "projects:agentic_ai" in ids
+    # The full render keeps every fact the old static instructions had
+    full = knowledge.render()
+    assert "Muhammad Abdullah Athar" in full
+    assert "https://github.com/AbdullahMalik17/Agentic_AI" in full
+
+
+def test_bm25_ranks_relevant_chunks_first(knowledge):
+    assert knowledge.index.search("What is his email address?", 1)[0][0].id == "contact"
+    assert knowledge.index.search("Has he built AI agents?", 1)[0][0].id == "projects:agentic_ai"
+    assert knowledge.index.search("zzz qqq", 3) == []
+
+
+def test_retrieval_keeps_pinned_profile_in_display_order(knowledge):
+    chunks = knowledge.retrieve("Which agent projects are there?")
+    assert chunks[0].id == "profile"
+    assert len(chunks) <= 1 + knowledge.top_k
+    order = _ids(knowledge.chunks)
+    assert _ids(chunks) == sorted(_ids(chunks), key=order.index)
+
+
+def test_instructions_render_per_query_with_stable_fingerprint(knowledge):
+    instructions = KnowledgeInstructions(INSTRUCTIONS_TEMPLATE, knowledge)
+    fingerprint = str(instructions)
+
+    with retrieval_query("How can I contact him?"):
+        contact = instructions(None, None)
+    with retrieval_query("Which frameworks does he use for the frontend?"):
+        frontend = instructions(None, None)
+    everything = instructions(None, None)
+
+    assert "Email" in contact and "Email" not in frontend
+    assert len(contact) < len(everything) and len(frontend) < len(everything)
+    assert str(instructions) == fingerprint
+    assert str(KnowledgeInstructions(INSTRUCTIONS_TEMPLATE, knowledge, retrieval_enabled=False)) != fingerprint
+
+
+def test_unmatched_follow_up_gets_the_full_knowledge(knowledge):
+    # Nothing beyond the pinned profile matches, so the question may be about anything
+    assert _ids(knowledge.retrieve("What about the second one?")) == ["profile"]
+    assert knowledge.context_for("What about the second one?") == knowledge.render()
+    assert knowledge.context_for("How can I contact him?") != knowledge.render()
+
+
+def test_follow_up_retrieves_with_the_previous_question(client, monkeypatch):
+    from portfolio_agents import get_portfolio_agent
+
+    instructions = get_portfolio_agent().instructions
+    queries = []
+    render = instructions.render
+
+    def spy(query):
+        queries.append(query)
+        return render(query)
+
+    session_id = f"follow-up-{uuid.uuid4().hex}"
+    client.post("/api/assistant/chat", json={"message": "Has he built AI agents?", "session_id": session_id})
+    monkeypatch.setattr(instructions, "render", spy)
+    response = client.post(
+        "/api/assistant/chat", json={"message": "Which one uses FastAPI?", "session_id": session_id}
+    )
+    assert response.status_code == 200
+    assert queries == ["Has he built AI agents?\nWhich one uses FastAPI?"]
+    assert "Agentic_AI" in render(queries[0])
+
+
+@pytest.mark.asyncio
+async def test_retrieval_reduces_prompt_tokens(knowledge):
+    question = "Tell me about his AI agent projects"
+
+    async def prompt_tokens(retrieval_enabled: bool) -> int:
+        agent = openai_agents.Agent(
+            name="KnowledgeTest",
+            instructions=KnowledgeInstructions(INSTRUCTIONS_TEMPLATE, knowledge, retrieval_enabled),
+            model=StubModel(),
+        )
+        with retrieval_query(question):
+            result = await openai_agents.Runner.run(starting_agent=agent, input=question)
+        return result.context_wrapper.usage.input_tokens
+
+    assert await prompt_tokens(True) < await prompt_tokens(False)
+
+
+def test_knowledge_index_stats_exposed(client):
+    stats = client.get("/api/assistant/cache/stats").json()["knowledge"]
+    assert stats["chunks"] > 0 and stats["terms"] > 0
+    assert stats["top_k"] == settings.knowledge_top_k
@@ -0,0 +1,63 @@
+"""
+Tests for the offline load-test suite (stub LLM server and report helpers).
+"""
+import agents as openai_agents
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from benchmarks.load_test import compare_to_baseline, percentile, summarize
+from benchmarks.stub_llm_server import StubLLMConfig, create_app
+
+
+@pytest.fixture
+def stub_agent():
+    config = StubLLMConfig(latency=0.0, tokens_per_second=0, reply="Stub server reply text")
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(config)))
+    client = AsyncOpenAI(api_key="stub", base_url="http://stub/v1/", http_client=http_client)
+    model = openai_agents.OpenAIChatCompletionsModel(model="gemini-2.5-flash", openai_client=client)
+    agent = openai_agents.Agent(name="StubServerAgent", instructions="Be brief.", model=model)
+    return agent, config
+
+
+@pytest.mark.asyncio
+async def test_stub_server_serves_chat_completions(stub_agent):
+    agent, config = stub_agent
+    result = await openai_agents.Runner.run(agent, "Hello")
+    assert result.final_output == "Stub server reply text"
+    assert result.context_wrapper.usage.output_tokens == 4
+    assert config.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_stub_server_streams_chat_completions(stub_agent):
+    agent, _ = stub_agent
+    result = openai_agents.Runner.run_streamed(agent, "Hello")
+    deltas = [
+        event.data.delta
+        async for event in result.stream_events()
+        if event.type == "raw_response_event" and getattr(event.data, "type", "") == "response.output_text.delta"
+    ]
+    assert "".join(deltas) == "Stub server reply text"
+    assert result.final_output == "Stub server reply text"
+
+
+def test_percentiles_and_summary():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    report = summarize(values, errors=2, elapsed=2.0)
+    assert report["requests"] == 102
+    assert report["throughput_rps"] == 50.0
+
+
+def test_compare_to_baseline_flags_regressions():
+    baseline = {"results": {"chat": {"p50_ms": 100, "p95_ms": 200, "p99_ms": 300,
+                                     "throughput_rps": 50, "errors": 0}}}
+    same = {"results": {"chat": {"p50_ms": 105, "p95_ms": 210, "p99_ms": 310,
+                                 "throughput_rps": 48, "errors": 0}}}
+    worse = {"results": {"chat": {"p50_ms": 100, "p95_ms": 400, "p99_ms": 300,
+                                  "throughput_rps": 20, "errors": 3}}}
+    assert compare_to_baseline(same, baseline, tolerance=0.2) == []
+    regressions = compare_to_baseline(worse, baseline, tolerance=0.2)
+    assert len(regressions) == 3
@@ -0,0 +1,65 @@
+"""
+Tests for session database maintenance.
+"""
+import pytest
+
+from services.maintenance import SessionMaintenance
+from services.session_store import SessionStore, make_turn_items
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SessionStore(str(tmp_path / "maintenance.db"))
+    yield store
+    store.close()
+
+
+def _age_session(store, session_id, days):
+    with store.write_connection() as conn:
+        conn.execute(
+            "UPDATE agent_sessions SET updated_at = datetime('now', ?) WHERE session_id = ?",
+            (f"-{days} days", session_id),
+        )
+        conn.commit()
+
+
+@pytest.mark.asyncio
+async def test_expires_only_idle_sessions(store):
+    for session_id in ("stale", "fresh"):
+        await store.get_session(session_id).add_items(make_turn_items("hi", "hello"))
+    _age_session(store, "stale", days=40)
+
+    report = SessionMaintenance(store, session_ttl_seconds=30 * 86400).run_once()
+
+    assert report.expired_sessions == 1
+    assert report.deleted_messages == 2
+    assert await store.get_session("stale").get_items() == []
+    assert len(await store.get_session("fresh").get_items()) == 2
+
+
+@pytest.mark.asyncio
+async def test_reclaims_space_after_expiry(store):
+    maintenance = SessionMaintenance(store, session_ttl_seconds=86400, expire_batch_size=7)
+    maintenance.run_once()
+    for i in range(40):
+        await store.get_session(f"s{i}").add_items(make_turn_items("q" * 2000, "a" * 4000))
+        _age_session(store, f"s{i}", days=2)
+    maintenance.checkpoint_wal()
+
+    report = maintenance.run_once()
+
+    assert report.expired_sessions == 40
+    assert report.vacuumed_pages > 0
+    assert report.reclaimed_bytes > 0
+    assert report.bytes_after < report.bytes_before
+    assert maintenance.last_report is report
+
+
+def test_zero_ttl_disables_expiry(store):
+    assert SessionMaintenance(store, session_ttl_seconds=0).expire_idle_sessions() == (0, 0)
+
+
+def test_maintenance_endpoint(client):
+    response = client.get("/api/assistant/maintenance")
+    assert response.status_code == 200
+    assert {"enabled", "last_run"} <= set(response.json())
@@ -0,0 +1,85 @@
+"""
+Tests for the metrics registry and the /metrics endpoint.
+"""
+import pytest
+
+from services.metrics import MetricsRegistry
+
+
+def _sample(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found in metrics output")
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, stage="run")
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert _sample(text, 'latency_seconds_bucket{stage="run",le="0.1"}') == 1
+    assert _sample(text, 'latency_seconds_bucket{stage="run",le="1"}') == 2
+    assert _sample(text, 'latency_seconds_bucket{stage="run",le="+Inf"}') == 3
+    assert _sample(text, 'latency_seconds_count{stage="run"}') == 3
+    assert _sample(text, 'latency_seconds_sum{stage="run"}') == pytest.approx(5.55)
+
+
+def test_labels_must_match_declaration():
+    counter = MetricsRegistry().counter("errors_total", "Errors.", ("type",))
+    with pytest.raises(ValueError):
+        counter.inc(kind="ValueError")
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("events_total", "Events.", ("name",)).inc(name='say "hi"\n')
+    assert 'events_total{name="say \\"hi\\"\\n"} 1' in registry.render()
+
+
+def test_metrics_endpoint_reports_stages(client):
+    client.post("/api/assistant/chat", json={"message": "What are his skills?", "session_id": "m-1"})
+    client.post("/api/assistant/chat", json={"message": "What are his skills?", "session_id": "m-2"})
+    client.post("/api/assistant/chat", json={"message": "And his projects?", "session_id": "m-1"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    route = 'method="POST",path="/api/assistant/chat",status="200"'
+    assert _sample(text, f"portfolio_request_duration_seconds_count{{{route}}}") >= 3
+    assert _sample(text, 'portfolio_agent_run_seconds_count{mode="stateless"}') >= 1
+    assert _sample(text, 'portfolio_agent_run_seconds_count{mode="session"}') >= 1
+    assert _sample(text, 'portfolio_session_load_seconds_count{operation="get_items"}') >= 1
+    assert _sample(text, 'portfolio_session_write_seconds_count{operation="add_items"}') >= 1
+    assert _sample(text, "portfolio_response_serialization_seconds_count") >= 3
+    assert _sample(text, 'portfolio_cache_hits_total{cache="exact"}') >= 1
+    assert _sample(text, "portfolio_agent_runs_in_flight") == 0
+
+
+def test_errors_are_counted_by_type(client):
+    from portfolio_agents import get_portfolio_agent
+    from services.resilience import base_model
+
+    model = base_model(get_portfolio_agent().model)
+    original = model.reply_fn
+
+    def fail(_message):
+        raise RuntimeError("model unavailable")
+
+    model.reply_fn = fail
+    try:
+        response = client.post(
+            "/api/assistant/chat", json={"message": "Trigger a failure", "session_id": "m-err"}
+        )
+    finally:
+        model.reply_fn = original
+    assert response.status_code == 500
+
+    text = client.get("/metrics").text
+    assert _sample(text, 'portfolio_errors_total{type="RuntimeError"}') >= 1
+    assert 'status="500"' in text
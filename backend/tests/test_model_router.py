@@ -0,0 +1,110 @@
+"""
+Tests for latency/error-aware routing and fallback across models.
+"""
+import agents as openai_agents
+import openai
+import pytest
+
+from config import _parse_model_endpoints
+from portfolio_agents.stub_model import StubModel
+from services.model_router import ModelRoute, RoutedModel, track_served_model
+from services.resilience import CircuitBreaker, ResilientModel, RetryPolicy
+
+NO_RETRIES = RetryPolicy(max_attempts=1, attempt_timeout=2.0)
+
+
+def _route(name: str, stub: StubModel, **breaker_kwargs) -> ModelRoute:
+    return ModelRoute(name, ResilientModel(stub, CircuitBreaker(**breaker_kwargs), NO_RETRIES))
+
+
+def _agent(model) -> openai_agents.Agent:
+    return openai_agents.Agent(name="RouterTest", instructions="Be brief.", model=model)
+
+
+def test_parse_model_endpoints():
+    assert _parse_model_endpoints("a, b@http://other/v1/,", "http://default/") == [
+        ("a", "http://default/"),
+        ("b", "http://other/v1/"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_next_model_on_failure():
+    primary = StubModel(reply_fn=lambda _: "primary")
+    secondary = StubModel(reply_fn=lambda _: "secondary")
+    primary.fail_next(1, status_code=503)
+    router = RoutedModel([_route("primary", primary), _route("secondary", secondary)])
+
+    with track_served_model() as served:
+        result = await openai_agents.Runner.run(_agent(router), "hello")
+    assert result.final_output == "secondary"
+    assert served.name == "secondary"
+    assert router.routes[0].error_ewma > 0
+
+    # The primary is still preferred once it answers again
+    result = await openai_agents.Runner.run(_agent(router), "hello")
+    assert result.final_output == "primary"
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_fall_back():
+    primary = StubModel()
+    secondary = StubModel()
+    primary.fail_next(1, status_code=400)
+    router = RoutedModel([_route("primary", primary), _route("secondary", secondary)])
+
+    with pytest.raises(openai.APIStatusError):
+        await openai_agents.Runner.run(_agent(router), "hello")
+    assert secondary.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_routes_around_slow_and_open_models():
+    slow = StubModel(reply_fn=lambda _: "slow", latency=0.05)
+    fast = StubModel(reply_fn=lambda _: "fast")
+    router = RoutedModel([_route("slow", slow), _route("fast", fast)], latency_tolerance=1.5)
+    router.routes[0].record_success(0.05)
+    router.routes[1].record_success(0.001)
+
+    assert [r.name for r in router.candidates()] == ["fast", "slow"]
+    result = await openai_agents.Runner.run(_agent(router), "hello")
+    assert result.final_output == "fast"
+
+    # An open breaker sends traffic elsewhere without touching the model
+    breaker = router.routes[1].breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    calls = fast.calls
+    result = await openai_agents.Runner.run(_agent(router), "hello")
+    assert result.final_output == "slow"
+    assert fast.calls == calls
+
+
+def test_stale_stats_are_probed_again():
+    primary = StubModel(reply_fn=lambda _: "primary")
+    secondary = StubModel(reply_fn=lambda _: "secondary")
+    router = RoutedModel([_route("primary", primary), _route("secondary", secondary)], stale_after=0.0)
+    for _ in range(5):
+        router.routes[0].record_failure()
+
+    assert router.candidates()[0].name == "primary"
+
+
+@pytest.mark.asyncio
+async def test_streaming_falls_back_before_first_event():
+    primary = StubModel(reply_fn=lambda _: "primary")
+    secondary = StubModel(reply_fn=lambda _: "streamed by secondary")
+    primary.fail_next(1)
+    router = RoutedModel([_route("primary", primary), _route("secondary", secondary)])
+
+    result = openai_agents.Runner.run_streamed(_agent(router), "hello")
+    async for _ in result.stream_events():
+        pass
+    assert result.final_output == "streamed by secondary"
+
+
+def test_latency_ewma_exported(client):
+    client.post("/api/assistant/chat", json={"message": "Routing check", "session_id": "route-1"})
+    text = client.get("/metrics").text
+    assert 'portfolio_model_latency_ewma_seconds{model="stub"}' in text
+    assert 'portfolio_model_calls_total{model="stub",outcome="success"}' in text
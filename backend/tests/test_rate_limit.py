@@ -0,0 +1,120 @@
+"""
+Tests for per-client token-bucket rate limiting.
+"""
+import pytest
+
+import services.rate_limit as rate_limit
+from services.rate_limit import (
+    BucketLimit,
+    MemoryBucketStore,
+    RateLimiter,
+    SQLiteBucketStore,
+)
+
+
+@pytest.mark.parametrize("store_type", ["memory", "sqlite"])
+def test_bucket_allows_burst_then_refills(store_type, tmp_path):
+    if store_type == "memory":
+        store = MemoryBucketStore()
+    else:
+        store = SQLiteBucketStore(str(tmp_path / "buckets.db"))
+    limit = BucketLimit(rate=1.0, burst=3)
+
+    assert [store.take("k", limit, now=100.0)[0] for _ in range(4)] == [True, True, True, False]
+    # One second later one token has come back
+    assert store.take("k", limit, now=101.0)[0] is True
+    assert store.take("k", limit, now=101.0)[0] is False
+    # Other keys have their own bucket
+    assert store.take("other", limit, now=101.0)[0] is True
+    store.close()
+
+
+def test_sqlite_buckets_shared_between_stores(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    worker_a, worker_b = SQLiteBucketStore(path), SQLiteBucketStore(path)
+    limit = BucketLimit(rate=0.0, burst=2)
+
+    assert worker_a.take("ip:1.2.3.4", limit, now=1.0)[0] is True
+    assert worker_b.take("ip:1.2.3.4", limit, now=1.0)[0] is True
+    assert worker_a.take("ip:1.2.3.4", limit, now=1.0)[0] is False
+    worker_a.close()
+    worker_b.close()
+
+
+def test_memory_store_is_bounded():
+    store = MemoryBucketStore(max_keys=100)
+    limit = BucketLimit(rate=1.0, burst=1)
+    for i in range(1000):
+        store.take(f"ip:{i}", limit, now=0.0)
+    assert len(store) == 100
+
+
+@pytest.fixture
+def strict_limiter(monkeypatch):
+    limiter = RateLimiter(
+        MemoryBucketStore(),
+        ip_limit=BucketLimit(rate=0.001, burst=4),
+        session_limit=BucketLimit(rate=0.001, burst=2),
+    )
+    monkeypatch.setattr(rate_limit, "_rate_limiter", limiter)
+    return limiter
+
+
+def test_session_limit_returns_429(client, strict_limiter):
+    statuses = [
+        client.post("/api/assistant/chat", json={"message": f"q{i}", "session_id": "rl-1"}).status_code
+        for i in range(3)
+    ]
+    assert statuses == [200, 200, 429]
+
+    limited = client.post("/api/chat", json={"message": "again", "session_id": "rl-1"})
+    assert limited.status_code == 429
+    assert int(limited.headers["retry-after"]) >= 1
+    assert "session" in limited.json()["detail"]
+
+    assert 'portfolio_rate_limited_total{scope="session"}' in client.get("/metrics").text
+
+
+def test_ip_limit_applies_across_sessions(client, strict_limiter):
+    statuses = [
+        client.post(
+            "/api/assistant/chat", json={"message": f"q{i}", "session_id": f"rl-ip-{i}"}
+        ).status_code
+        for i in range(5)
+    ]
+    assert statuses == [200, 200, 200, 200, 429]
+    # Non-chat endpoints are not limited
+    assert client.get("/health").status_code == 200
+
+
+def test_cross_origin_429_carries_cors_headers(client, strict_limiter):
+    origin = "http://localhost:3000"
+    for i in range(3):
+        limited = client.post(
+            "/api/assistant/chat",
+            json={"message": f"q{i}", "session_id": "rl-cors"},
+            headers={"Origin": origin},
+        )
+    assert limited.status_code == 429
+    assert limited.headers["access-control-allow-origin"] == origin
+    assert int(limited.headers["retry-after"]) >= 1
+
+
+def _scope(*forwarded: str) -> dict:
+    return {
+        "client": ("10.0.0.2", 5000),
+        "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded],
+    }
+
+
+def test_client_ip_is_the_entry_added_by_the_trusted_proxy():
+    # The client sent "1.2.3.4" itself; the proxy appended the address it saw
+    spoofed = _scope("1.2.3.4, 203.0.113.7")
+    assert rate_limit._client_ip(spoofed, trusted_proxies=1) == "203.0.113.7"
+    assert rate_limit._client_ip(_scope("1.2.3.4, 203.0.113.7, 10.0.0.1"), trusted_proxies=2) == "203.0.113.7"
+    # Separate headers count as one list; a short list falls back to its first entry
+    assert rate_limit._client_ip(_scope("1.2.3.4", "203.0.113.7"), trusted_proxies=1) == "203.0.113.7"
+    assert rate_limit._client_ip(_scope("203.0.113.7"), trusted_proxies=3) == "203.0.113.7"
+    # Not trusted, or no header: the peer address
+    assert rate_limit._client_ip(spoofed, trusted_proxies=0) == "10.0.0.2"
+    assert rate_limit._client_ip(_scope(), trusted_proxies=1) == "10.0.0.2"
@@ -0,0 +1,144 @@
+"""
+Tests for upstream deadlines, retries and the circuit breaker.
+"""
+import time
+
+import agents as openai_agents
+import httpx
+import openai
+import pytest
+
+from benchmarks.stub_llm_server import StubLLMConfig, create_app
+from portfolio_agents import get_portfolio_agent
+from portfolio_agents.stub_model import StubModel
+from services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    ResilientModel,
+    RetryPolicy,
+    base_model,
+    deadline_scope,
+    get_circuit_breaker,
+)
+
+FAST_RETRIES = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.002, attempt_timeout=2.0)
+
+
+def _agent(model) -> openai_agents.Agent:
+    return openai_agents.Agent(name="ResilienceTest", instructions="Be brief.", model=model)
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried():
+    stub = StubModel(reply_fn=lambda _: "recovered")
+    stub.fail_next(2, status_code=503)
+    model = ResilientModel(stub, CircuitBreaker(failure_threshold=5), FAST_RETRIES)
+
+    result = await openai_agents.Runner.run(_agent(model), "hello")
+    assert result.final_output == "recovered"
+    assert stub.calls == 3
+    assert model.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    stub = StubModel()
+    stub.fail_next(1, status_code=400)
+    model = ResilientModel(stub, CircuitBreaker(), FAST_RETRIES)
+
+    with pytest.raises(openai.APIStatusError):
+        await openai_agents.Runner.run(_agent(model), "hello")
+    assert stub.calls == 1
+    assert model.breaker.consecutive_failures == 0
+
+
+@pytest.mark.asyncio
+async def test_streaming_retries_before_first_event():
+    stub = StubModel(reply_fn=lambda _: "streamed after retry")
+    stub.fail_next(1)
+    model = ResilientModel(stub, CircuitBreaker(), FAST_RETRIES)
+
+    result = openai_agents.Runner.run_streamed(_agent(model), "hello")
+    async for _ in result.stream_events():
+        pass
+    assert result.final_output == "streamed after retry"
+    assert stub.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_recovers():
+    stub = StubModel(reply_fn=lambda _: "ok")
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    model = ResilientModel(stub, breaker, RetryPolicy(max_attempts=1, attempt_timeout=2.0))
+
+    stub.fail_next(2)
+    for _ in range(2):
+        with pytest.raises(openai.APIStatusError):
+            await openai_agents.Runner.run(_agent(model), "hello")
+    assert breaker.state == "open"
+
+    calls = stub.calls
+    with pytest.raises(CircuitOpenError):
+        await openai_agents.Runner.run(_agent(model), "hello")
+    assert stub.calls == calls
+
+    time.sleep(0.15)
+    assert breaker.state == "half_open"
+    result = await openai_agents.Runner.run(_agent(model), "hello")
+    assert result.final_output == "ok"
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_deadline_budget_bounds_slow_upstream():
+    stub = StubModel(latency=1.0)
+    model = ResilientModel(stub, CircuitBreaker(), FAST_RETRIES)
+
+    start = time.perf_counter()
+    with deadline_scope(0.1), pytest.raises(DeadlineExceeded):
+        await openai_agents.Runner.run(_agent(model), "hello")
+    assert time.perf_counter() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_retries_against_fault_injecting_stub_server():
+    config = StubLLMConfig(latency=0.0, tokens_per_second=0, reply="served by stub")
+    config.fail_next = 2
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(config)))
+    client = openai.AsyncOpenAI(
+        api_key="stub", base_url="http://stub/v1/", http_client=http_client, max_retries=0
+    )
+    upstream = openai_agents.OpenAIChatCompletionsModel(model="gemini-2.5-flash", openai_client=client)
+    model = ResilientModel(upstream, CircuitBreaker(), FAST_RETRIES)
+
+    result = await openai_agents.Runner.run(_agent(model), "hello")
+    assert result.final_output == "served by stub"
+    assert config.requests == 3
+    assert config.failures == 2
+
+
+@pytest.fixture
+def open_breaker():
+    breaker = get_circuit_breaker()
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    yield breaker
+    breaker.record_success()
+
+
+def test_open_breaker_reported_and_fails_fast(client, open_breaker):
+    stub = base_model(get_portfolio_agent().model)
+    calls = stub.calls
+
+    response = client.post(
+        "/api/assistant/chat", json={"message": "Is anyone there?", "session_id": "breaker-1"}
+    )
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+    assert stub.calls == calls
+
+    health = client.get("/health").json()
+    assert health["status"] == "degraded"
+    assert health["upstream"]["state"] == "open"
+    assert client.get("/api/assistant/health").json()["upstream"]["state"] == "open"
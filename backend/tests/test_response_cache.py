@@ -0,0 +1,84 @@
+"""
+Tests for the exact-match response cache.
+"""
+import uuid
+
+import pytest
+
+from portfolio_agents import get_agent_session, get_portfolio_agent
+from services.resilience import base_model
+from services.response_cache import ResponseCache, get_response_cache, normalize_message
+
+
+def test_normalize_message():
+    assert normalize_message("  What are   his SKILLS?? ") == "what are his skills"
+
+
+def test_key_depends_on_model_and_instructions():
+    key = ResponseCache.make_key("skills?", "gemini-2.5-flash", "instructions v1")
+    assert key == ResponseCache.make_key("Skills", "gemini-2.5-flash", "instructions v1")
+    assert key != ResponseCache.make_key("skills", "other-model", "instructions v1")
+    assert key != ResponseCache.make_key("skills", "gemini-2.5-flash", "instructions v2")
+
+
+def test_lru_eviction_and_counters():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("c") == "C"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("services.response_cache.time.monotonic", lambda: now[0])
+    cache = ResponseCache(ttl_seconds=10)
+    cache.set("a", "A")
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def _chat(client, message, session_id):
+    response = client.post(
+        "/api/assistant/chat", json={"message": message, "session_id": session_id}
+    )
+    assert response.status_code == 200
+    return response.json()["response"]
+
+
+@pytest.mark.asyncio
+async def test_stateless_repeat_served_from_cache(client):
+    model = base_model(get_portfolio_agent().model)
+    first = _chat(client, "What are his skills?", f"cache-{uuid.uuid4().hex}")
+    calls = model.calls
+    hits = get_response_cache().stats()["hits"]
+
+    session_id = f"cache-{uuid.uuid4().hex}"
+    assert _chat(client, "what are his skills", session_id) == first
+    assert model.calls == calls
+    assert get_response_cache().stats()["hits"] == hits + 1
+
+    items = await get_agent_session(session_id).get_items()
+    assert [item["role"] for item in items] == ["user", "assistant"]
+
+
+def test_follow_up_turns_bypass_cache(client):
+    model = base_model(get_portfolio_agent().model)
+    session_id = f"cache-{uuid.uuid4().hex}"
+    _chat(client, "Show me his projects", session_id)
+    calls = model.calls
+
+    _chat(client, "Show me his projects", session_id)
+    assert model.calls == calls + 1
+
+
+def test_cache_stats_endpoint(client):
+    response = client.get("/api/assistant/cache/stats")
+    assert response.status_code == 200
+    assert {"hits", "misses", "size"} <= set(response.json()["exact"])
@@ -0,0 +1,61 @@
+"""
+Tests for the lexical semantic cache.
+"""
+import uuid
+
+from portfolio_agents import get_portfolio_agent
+from services.resilience import base_model
+from services.semantic_cache import SemanticCache, canonicalize
+
+
+def test_canonicalize_folds_stopwords_and_synonyms():
+    assert canonicalize("What tech does Abdullah know?") == "skills"
+    assert canonicalize("list his skills") == "skills"
+
+
+def test_paraphrase_hits_and_unrelated_misses():
+    cache = SemanticCache(threshold=0.7)
+    cache.add("What are his skills?", "skills answer", "ns")
+    cache.add("What is his email?", "email answer", "ns")
+
+    match = cache.lookup("Which technologies does he use?", "ns")
+    assert match is not None and match.response == "skills answer"
+    assert cache.lookup("What is his LinkedIn?", "ns") is None
+    assert cache.lookup("What are his skills?", "other-namespace") is None
+
+
+def test_different_questions_sharing_a_broad_word_miss():
+    cache = SemanticCache(threshold=0.7)
+    cache.add("What projects use Python?", "projects answer", "ns")
+    cache.add("How many years of experience does he have?", "experience answer", "ns")
+
+    assert cache.lookup("Where does he work?", "ns") is None
+    assert cache.lookup("How old is he?", "ns") is None
+    assert canonicalize("Where does he work?") != canonicalize("What projects?")
+
+
+def test_bounded_entries_evict_oldest():
+    cache = SemanticCache(threshold=0.7, max_entries=2)
+    cache.add("What are his skills?", "skills", "ns")
+    cache.add("What is his email?", "email", "ns")
+    cache.add("Show me his projects", "projects", "ns")
+
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup("list his skills", "ns") is None
+
+
+def test_paraphrase_served_without_model_call(client):
+    model = base_model(get_portfolio_agent().model)
+    first = client.post(
+        "/api/assistant/chat",
+        json={"message": "What are his skills?", "session_id": f"sem-{uuid.uuid4().hex}"},
+    ).json()["response"]
+    calls = model.calls
+
+    second = client.post(
+        "/api/assistant/chat",
+        json={"message": "What tech does Abdullah know?", "session_id": f"sem-{uuid.uuid4().hex}"},
+    ).json()["response"]
+    assert second == first
+    assert model.calls == calls
@@ -0,0 +1,171 @@
+"""
+Tests for the pluggable session backends and multi-worker start checks.
+"""
+import asyncio
+import json
+import random
+import uuid
+
+import pytest
+
+import services.session_backend as session_backend
+from config import settings
+from services.history_policy import SUMMARY_PREFIX, HistoryPolicySession
+from services.maintenance import MaintenanceLock
+from services.session_backend import KVSessionBackend, LocalKVClient, MemorySessionBackend
+from services.session_store import SessionStore, make_turn_items
+from services.tiered_session import TieredSessionBackend
+
+
+@pytest.fixture(params=["sqlite", "memory", "kv", "tiered"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        store = SessionStore(str(tmp_path / "backend.db"), pool_size=1)
+        yield store
+        store.close()
+    elif request.param == "tiered":
+        store = SessionStore(str(tmp_path / "backend.db"), pool_size=1)
+        yield TieredSessionBackend(store)
+        store.close()
+    elif request.param == "memory":
+        yield MemorySessionBackend(max_sessions=8)
+    else:
+        yield KVSessionBackend(LocalKVClient(), prefix="test")
+
+
+@pytest.mark.asyncio
+async def test_history_round_trip(backend):
+    session = backend.get_session("s-1")
+    await session.add_items(make_turn_items("q0", "a0"))
+    await session.add_items(make_turn_items("q1", "a1"))
+
+    assert [item["content"] for item in await session.get_items()] == ["q0", "a0", "q1", "a1"]
+    assert [item["content"] for item in await session.get_items(limit=1)] == ["a1"]
+    assert await backend.get_session("s-2").get_items() == []
+
+    rows = await session.get_items_after(0)
+    ids = [row_id for row_id, _ in rows]
+    assert ids == sorted(ids) and len(set(ids)) == 4
+    assert [item["content"] for _, item in await session.get_items_after(ids[1])] == ["q1", "a1"]
+
+    assert (await session.pop_item())["content"] == "a1"
+    await session.add_items([{"role": "assistant", "content": "a1 again"}])
+    # Positions keep increasing after a pop
+    assert (await session.get_items_after(ids[2]))[-1][0] > ids[3]
+
+    await session.clear_session()
+    assert await session.get_items() == []
+
+
+@pytest.mark.asyncio
+async def test_summary_only_moves_forward(backend):
+    session = backend.get_session("s-1")
+    assert await session.get_summary() == ("", 0)
+    await session.set_summary("newer", 4)
+    await session.set_summary("older", 2)
+    assert await session.get_summary() == ("newer", 4)
+
+
+@pytest.mark.asyncio
+async def test_usage_totals(backend):
+    await backend.record_usage("s-1", 1, 30, 10)
+    await backend.record_usage("s-1", 1, 20, 5)
+    assert await backend.load_usage("s-1") == {
+        "requests": 2, "input_tokens": 50, "output_tokens": 15, "total_tokens": 65,
+    }
+    assert (await backend.load_usage("s-2"))["total_tokens"] == 0
+
+
+@pytest.mark.asyncio
+async def test_history_policy_on_every_backend(backend):
+    session = HistoryPolicySession(backend.get_session("s-1"), max_turns=2)
+    for i in range(5):
+        await session.add_items(make_turn_items(f"question {i}", f"answer {i}."))
+    items = await session.get_items()
+    assert items[0]["content"].startswith(SUMMARY_PREFIX)
+    assert [item["content"] for item in items[1:]] == [
+        "question 3", "answer 3.", "question 4", "answer 4.",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used():
+    backend = MemorySessionBackend(max_sessions=2)
+    await backend.get_session("a").add_items(make_turn_items("q", "a"))
+    backend.get_session("b")
+    backend.get_session("a")
+    backend.get_session("c")
+    assert backend.session_count() == 2
+    assert await backend.get_session("a").get_items() != []
+    assert await backend.get_session("b").get_items() == []
+
+
+class NetworkKVClient(LocalKVClient):
+    """Local stand-in whose commands yield to other tasks, like network round trips."""
+
+    async def _round_trip(self) -> None:
+        await asyncio.sleep(random.random() / 1000)
+
+    async def eval(self, *args):
+        await self._round_trip()
+        return await super().eval(*args)
+
+    async def lrange(self, *args):
+        await self._round_trip()
+        return await super().lrange(*args)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_kv_writers_keep_rows_in_id_order():
+    client = NetworkKVClient()
+    # Two workers appending to one session
+    sessions = [KVSessionBackend(client, prefix="test").get_session("s-1") for _ in range(2)]
+    await asyncio.gather(*(
+        sessions[i % 2].add_items(make_turn_items(f"q{i}", f"a{i}")) for i in range(40)
+    ))
+    ids = [json.loads(raw)["id"] for raw in client._data["test:session:s-1:messages"]]
+    assert ids == list(range(1, 81))
+    # Each turn's items stay adjacent
+    items = await sessions[0].get_items()
+    assert all(q["content"][1:] == a["content"][1:] for q, a in zip(items[::2], items[1::2]))
+
+
+def test_chat_uses_the_configured_backend(client, monkeypatch, admin_headers):
+    kv = KVSessionBackend(LocalKVClient(), prefix="app")
+    monkeypatch.setattr(session_backend, "_session_backend", kv)
+    session_id = f"kv-{uuid.uuid4().hex}"
+    for message in ("First question", "Second question"):
+        response = client.post(
+            "/api/assistant/chat", json={"message": message, "session_id": session_id}
+        )
+        assert response.status_code == 200
+    assert kv.client.commands > 0
+    usage = client.get(f"/api/assistant/usage/{session_id}", headers=admin_headers).json()
+    assert usage["requests"] == 2
+
+
+def test_start_refuses_per_process_sessions_with_several_workers(monkeypatch):
+    from main import check_worker_settings
+
+    monkeypatch.setattr(settings, "session_backend", "memory")
+    assert check_worker_settings(1) == ([], [])
+    errors, _ = check_worker_settings(4)
+    assert "SESSION_BACKEND=memory" in errors[0]
+    monkeypatch.setattr(settings, "session_backend", "tiered")
+    assert "SESSION_BACKEND=tiered" in check_worker_settings(4)[0][0]
+
+    monkeypatch.setattr(settings, "session_backend", "sqlite")
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_backend", "memory")
+    errors, warnings = check_worker_settings(4)
+    assert errors == [] and "RATE_LIMIT_BACKEND=memory" in warnings[0]
+
+
+def test_maintenance_lock_has_one_holder(tmp_path):
+    path = str(tmp_path / "db.maintenance.lock")
+    first, second = MaintenanceLock(path), MaintenanceLock(path)
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
@@ -0,0 +1,81 @@
+"""
+Tests for server-issued session ids, stateless mode and legacy session trimming.
+"""
+import pytest
+
+from config import settings
+from services.session_migrations import trim_legacy_shared_sessions
+from services.session_store import SessionStore, make_turn_items
+
+
+def test_anonymous_client_is_issued_a_session(client):
+    first = client.post("/api/assistant/chat", json={"message": "Hello there"})
+    session_id = first.json()["session_id"]
+    assert session_id and session_id != "default_session"
+    assert first.cookies.get(settings.session_cookie_name) == session_id
+
+    # The cookie carries the conversation forward
+    second = client.post("/api/assistant/chat", json={"message": "And his projects?"})
+    assert second.json()["session_id"] == session_id
+
+
+def test_distinct_anonymous_clients_get_distinct_sessions(client):
+    ids = set()
+    for _ in range(3):
+        client.cookies.clear()
+        ids.add(client.post("/api/chat", json={"message": "Hi"}).json()["session_id"])
+    assert len(ids) == 3
+
+
+@pytest.mark.asyncio
+async def test_stateless_mode_stores_nothing(client, monkeypatch):
+    from services.session_store import get_session_store
+
+    monkeypatch.setattr(settings, "anonymous_session_mode", "stateless")
+    client.cookies.clear()
+    response = client.post("/api/assistant/chat", json={"message": "One-shot question"})
+    assert response.status_code == 200
+    assert response.json()["session_id"] is None
+    assert settings.session_cookie_name not in response.cookies
+
+    with get_session_store().connection() as conn:
+        rows = conn.execute(
+            "SELECT COUNT(*) FROM agent_messages WHERE message_data LIKE '%One-shot question%'"
+        ).fetchone()
+    assert rows[0] == 0
+
+
+def test_stateless_turn_without_caches(client, monkeypatch):
+    from services.response_cache import get_response_cache
+    from services.semantic_cache import get_semantic_cache
+
+    # Not cacheable, so the turn runs the agent with no session at all
+    monkeypatch.setattr(settings, "anonymous_session_mode", "stateless")
+    monkeypatch.setattr(get_response_cache(), "enabled", False)
+    monkeypatch.setattr(get_semantic_cache(), "enabled", False)
+    client.cookies.clear()
+    response = client.post("/api/assistant/chat", json={"message": "Anything new?"})
+    assert response.status_code == 200
+    assert response.json()["session_id"] is None
+    assert response.json()["usage"]["requests"] == 1
+
+
+@pytest.mark.asyncio
+async def test_trim_legacy_shared_sessions(tmp_path):
+    store = SessionStore(str(tmp_path / "legacy.db"))
+    try:
+        shared = store.get_session("default_session")
+        for i in range(10):
+            await shared.add_items(make_turn_items(f"q{i}", f"a{i}"))
+
+        deleted = trim_legacy_shared_sessions(store, ["default_session"], keep_turns=2)
+        assert deleted == {"default_session": 16}
+        assert [item["content"] for item in await shared.get_items()] == ["q8", "a8", "q9", "a9"]
+        assert trim_legacy_shared_sessions(store, ["default_session"], keep_turns=2) == {
+            "default_session": 0
+        }
+
+        trim_legacy_shared_sessions(store, ["default_session"], keep_turns=0)
+        assert await shared.get_items() == []
+    finally:
+        store.close()
@@ -0,0 +1,84 @@
+"""
+Tests for per-session concurrency control.
+"""
+import asyncio
+import time
+import uuid
+
+import httpx
+import pytest
+
+from main import app
+from portfolio_agents import get_agent_session, get_portfolio_agent
+from services.resilience import base_model
+from services.session_locks import SessionLockRegistry
+from services.session_store import make_turn_items
+
+TURN_LATENCY = 0.2
+
+
+@pytest.fixture
+def slow_model():
+    model = base_model(get_portfolio_agent().model)
+    original = model.latency
+    model.latency = TURN_LATENCY
+    yield model
+    model.latency = original
+
+
+@pytest.mark.asyncio
+async def test_same_session_turns_are_serialized_in_order(slow_model):
+    session_id = f"locks-{uuid.uuid4().hex}"
+    await get_agent_session(session_id).add_items(make_turn_items("hello", "hi there"))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    "/api/assistant/chat",
+                    json={"message": f"question {i}", "session_id": session_id},
+                )
+                for i in range(3)
+            )
+        )
+    assert all(r.status_code == 200 for r in responses)
+
+    items = (await get_agent_session(session_id).get_items())[2:]
+    roles = [item["role"] for item in items]
+    assert roles == ["user", "assistant"] * 3
+    # Every reply directly follows the question it answers
+    for question, answer in zip(items[::2], items[1::2]):
+        assert question["content"] in answer["content"][0]["text"]
+
+
+@pytest.mark.asyncio
+async def test_distinct_sessions_run_in_parallel(slow_model):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    "/api/assistant/chat",
+                    json={"message": f"parallel {i}", "session_id": f"locks-{uuid.uuid4().hex}"},
+                )
+                for i in range(8)
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+    assert all(r.status_code == 200 for r in responses)
+    assert elapsed < TURN_LATENCY * 3
+
+
+@pytest.mark.asyncio
+async def test_registry_evicts_idle_locks_but_not_held_ones():
+    registry = SessionLockRegistry(max_locks=2, idle_seconds=60)
+    async with registry.hold("held"):
+        for i in range(5):
+            async with registry.hold(f"s{i}"):
+                pass
+        assert len(registry) <= 3
+        assert "held" in registry._locks
+    assert len(registry) <= 3
@@ -0,0 +1,58 @@
+"""
+Tests for the pooled session store.
+"""
+import pytest
+from agents.memory import SQLiteSession
+
+from services.session_store import SessionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.db"), pool_size=2, max_cached_sessions=2)
+    yield store
+    store.close()
+
+
+def test_get_session_reuses_live_object(store):
+    assert store.get_session("a") is store.get_session("a")
+
+
+def test_session_lru_is_bounded(store):
+    first = store.get_session("a")
+    store.get_session("b")
+    store.get_session("c")
+    assert store.cached_session_count() == 2
+    assert store.get_session("a") is not first
+
+
+@pytest.mark.asyncio
+async def test_items_round_trip_in_order(store):
+    session = store.get_session("a")
+    await session.add_items([{"role": "user", "content": "one"}])
+    await session.add_items([{"role": "assistant", "content": "two"}])
+    await session.add_items([{"role": "user", "content": "three"}])
+
+    items = await session.get_items()
+    assert [item["content"] for item in items] == ["one", "two", "three"]
+    assert [item["content"] for item in await session.get_items(limit=2)] == ["two", "three"]
+
+    popped = await session.pop_item()
+    assert popped["content"] == "three"
+    await session.clear_session()
+    assert await session.get_items() == []
+
+
+@pytest.mark.asyncio
+async def test_schema_compatible_with_sdk_sqlite_session(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    legacy = SQLiteSession("legacy", db_path=db_path)
+    await legacy.add_items([{"role": "user", "content": "hello"}])
+    legacy.close()
+
+    store = SessionStore(db_path)
+    try:
+        items = await store.get_session("legacy").get_items()
+        assert items == [{"role": "user", "content": "hello"}]
+    finally:
+        store.close()
@@ -0,0 +1,74 @@
+"""
+Tests for single-flight request coalescing.
+"""
+import asyncio
+import uuid
+
+import httpx
+import pytest
+
+from main import app
+from portfolio_agents import get_agent_session, get_portfolio_agent
+from services.resilience import base_model
+from services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert flight.stats()["coalesced_requests"] == 4
+    assert flight.in_flight_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_every_caller():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    results = await asyncio.gather(
+        *(flight.do("key", fail) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_identical_chat_burst_makes_one_upstream_call():
+    model = base_model(get_portfolio_agent().model)
+    model.latency, original_latency = 0.2, model.latency
+    calls = model.calls
+    session_ids = [f"burst-{uuid.uuid4().hex}" for _ in range(5)]
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(
+                *(
+                    client.post(
+                        "/api/assistant/chat",
+                        json={"message": "Tell me about his projects", "session_id": sid},
+                    )
+                    for sid in session_ids
+                )
+            )
+    finally:
+        model.latency = original_latency
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.json()["response"] for r in responses}) == 1
+    assert model.calls == calls + 1
+    for sid in session_ids:
+        items = await get_agent_session(sid).get_items()
+        assert [item["role"] for item in items] == ["user", "assistant"]
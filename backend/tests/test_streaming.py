@@ -0,0 +1,58 @@
+"""
+Tests for the Server-Sent Events chat endpoint.
+"""
+import json
+import uuid
+
+import pytest
+
+
+def _read_events(response) -> list[dict]:
+    events = []
+    for line in response.iter_lines():
+        if line.startswith("data: "):
+            events.append(json.loads(line[len("data: "):]))
+    return events
+
+
+def test_stream_emits_deltas_then_done(client):
+    session_id = f"stream-{uuid.uuid4().hex}"
+    with client.stream(
+        "POST",
+        "/api/assistant/chat/stream",
+        json={"message": "What are his skills?", "session_id": session_id},
+    ) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _read_events(response)
+
+    deltas = [e["delta"] for e in events if e["type"] == "delta"]
+    done = events[-1]
+    assert len(deltas) > 1
+    assert done["type"] == "done"
+    assert done["session_id"] == session_id
+    assert "".join(deltas) == done["response"]
+
+
+@pytest.mark.asyncio
+async def test_stream_writes_turn_to_session(client):
+    from portfolio_agents import get_agent_session
+
+    session_id = f"stream-{uuid.uuid4().hex}"
+    with client.stream(
+        "POST",
+        "/api/assistant/chat/stream",
+        json={"message": "Show me his projects", "session_id": session_id},
+    ) as response:
+        events = _read_events(response)
+
+    items = await get_agent_session(session_id).get_items()
+    assert items[0]["role"] == "user"
+    assert items[0]["content"] == "Show me his projects"
+    assert items[-1]["role"] == "assistant"
+    assert items[-1]["content"][0]["text"] == events[-1]["response"]
+
+
+def test_stream_rejects_blank_message(client):
+    response = client.post("/api/assistant/chat/stream", json={"message": "   "})
+    assert response.status_code == 400
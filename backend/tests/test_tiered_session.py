@@ -0,0 +1,266 @@
+"""
+Tests for the two-tier session backend (in-memory hot tier, write-behind to SQLite).
+"""
+import asyncio
+import contextlib
+import sqlite3
+import uuid
+
+import pytest
+
+import services.session_backend as session_backend
+from config import settings
+from services.history_policy import HistoryPolicySession
+from services.metrics import metrics_registry
+from services.session_store import SessionStore, close_session_store, make_turn_items
+from services.tiered_session import TieredSessionBackend, run_flush_loop
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SessionStore(str(tmp_path / "tiered.db"), pool_size=1)
+    yield store
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_writes_reach_sqlite_only_when_flushed(store):
+    backend = TieredSessionBackend(store)
+    session = backend.get_session("s-1")
+    await session.add_items(make_turn_items("q0", "a0"))
+    await backend.record_usage("s-1", 1, 30, 10)
+
+    durable = store.get_session("s-1")
+    assert await durable.get_items() == []
+    assert backend.stats()["pending_writes"] == 2
+
+    assert await backend.flush() == 2
+    # SQLite keeps the ids the hot tier handed out
+    rows = await session.get_items_after(0)
+    assert await durable.get_items_after(0) == rows
+    assert store.get_usage("s-1")["total_tokens"] == 40
+
+    # A fresh process serves the same history from the durable copy
+    restarted = TieredSessionBackend(store)
+    assert await restarted.get_session("s-1").get_items_after(0) == rows
+    assert (await restarted.load_usage("s-1"))["requests"] == 1
+    await restarted.get_session("s-1").add_items(make_turn_items("q1", "a1"))
+    assert (await restarted.get_session("s-1").get_items_after(0))[-1][0] > rows[-1][0]
+
+
+@pytest.mark.asyncio
+async def test_summarized_rows_leave_the_hot_tier(store):
+    backend = TieredSessionBackend(store)
+    policy = HistoryPolicySession(backend.get_session("s-1"), max_turns=2)
+    for i in range(5):
+        await policy.add_items(make_turn_items(f"question {i}", f"answer {i}."))
+    size_before = backend.stats()["bytes"]
+    await policy.get_items()
+
+    _, through_id = await backend.get_session("s-1").get_summary()
+    entry = await backend.entry("s-1")
+    assert through_id > 0 and all(row_id > through_id for row_id, _, _ in entry.rows)
+    assert backend.stats()["bytes"] < size_before
+
+    # Full history is read from SQLite after flushing what is queued
+    full = await backend.get_session("s-1").get_items()
+    assert len(full) == 10
+    assert backend.stats()["pending_writes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_only_flushed_sessions_are_evicted(store):
+    backend = TieredSessionBackend(store, max_bytes=200)
+    for session_id in ("a", "b", "c"):
+        await backend.get_session(session_id).add_items(
+            make_turn_items(f"question for {session_id}", "x" * 80)
+        )
+    assert backend.stats()["sessions"] == 3
+
+    await backend.flush()
+    stats = backend.stats()
+    assert stats["sessions"] == 1 and stats["evictions"] == 2
+    assert stats["bytes"] <= 200
+
+    items = await backend.get_session("a").get_items()
+    assert items[0]["content"] == "question for a"
+    assert backend.stats()["misses"] == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_changes_queued(store, monkeypatch):
+    backend = TieredSessionBackend(store)
+    await backend.get_session("s-1").add_items(make_turn_items("q0", "a0"))
+
+    write_batch = store.write_batch
+    locked = True
+
+    def flaky_write_batch(writes):
+        if locked:
+            raise sqlite3.OperationalError("database is locked")
+        write_batch(writes)
+
+    monkeypatch.setattr(store, "write_batch", flaky_write_batch)
+    assert await backend.flush() == 0
+    assert backend.stats()["flush_errors"] == 1
+    locked = False
+    await backend.get_session("s-1").add_items(make_turn_items("q1", "a1"))
+
+    assert await backend.flush() == 2
+    assert [item["content"] for item in await store.get_session("s-1").get_items()] == [
+        "q0", "a0", "q1", "a1",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failing_change_is_dead_lettered_without_blocking_others(store, monkeypatch):
+    backend = TieredSessionBackend(store, max_bytes=1, max_attempts=3)
+    write_batch = store.write_batch
+
+    def write_batch_failing_for_bad(writes):
+        if any(write.session_id == "bad" for write in writes):
+            raise sqlite3.IntegrityError("constraint failed")
+        write_batch(writes)
+
+    monkeypatch.setattr(store, "write_batch", write_batch_failing_for_bad)
+    await backend.get_session("bad").add_items(make_turn_items("q0", "a0"))
+    await backend.record_usage("bad", 1, 10, 5)
+    for i in range(3):
+        await backend.get_session("good").add_items(make_turn_items(f"q{i}", f"a{i}"))
+        # Other sessions are written; the bad change and the one after it wait
+        assert await backend.flush() == 1
+        assert backend.stats()["pending_writes"] == (2 if i < 2 else 1)
+
+    stats = backend.stats()
+    assert stats["dead_lettered"] == 1 and stats["flush_errors"] == 3
+    assert [write.kind for write in backend.dead_letters] == ["items"]
+    assert len(await store.get_session("good").get_items()) == 6
+
+
+@pytest.mark.asyncio
+async def test_always_failing_store_empties_the_queue(store, monkeypatch):
+    backend = TieredSessionBackend(store, max_bytes=1, max_attempts=2)
+    await backend.get_session("s-1").add_items(make_turn_items("q0", "a0"))
+    await backend.record_usage("s-1", 1, 10, 5)
+    await backend.get_session("s-2").add_items(make_turn_items("q1", "a1"))
+
+    def failing_write_batch(writes):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(store, "write_batch", failing_write_batch)
+    for _ in range(4):
+        await backend.flush()
+    stats = backend.stats()
+    assert stats["pending_writes"] == 0
+    assert stats["dead_lettered"] == 3 and stats["flushed_writes"] == 0
+    # Nothing unflushed is left, so the sessions can be evicted again
+    assert stats["sessions"] == 1
+    assert "portfolio_session_dead_lettered_writes_total" in metrics_registry.render()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_starts_an_early_flush(store, monkeypatch):
+    backend = TieredSessionBackend(store, max_pending=2)
+    await backend.get_session("s-1").add_items(make_turn_items("q0", "a0"))
+    await backend.record_usage("s-1", 1, 10, 5)
+    # The writer does not wait for the flush it started
+    assert backend.stats()["pending_writes"] == 2
+    await asyncio.sleep(0.1)
+    assert backend.stats()["pending_writes"] == 0
+    assert len(await store.get_session("s-1").get_items()) == 2
+
+    # While SQLite keeps failing, writers wait once the queue is twice the limit
+    def failing_write_batch(writes):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(store, "write_batch", failing_write_batch)
+    for i in range(4):
+        await backend.record_usage("s-1", 1, 10, 5)
+    assert backend.stats()["flush_errors"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_flush_loop_and_final_flush(store):
+    backend = TieredSessionBackend(store)
+    task = asyncio.create_task(run_flush_loop(backend, 0.01))
+    await backend.get_session("s-1").add_items(make_turn_items("q0", "a0"))
+    await asyncio.sleep(0.1)
+    assert backend.stats()["pending_writes"] == 0
+
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+    await backend.get_session("s-1").add_items(make_turn_items("q1", "a1"))
+    await backend.aclose()
+    assert len(await store.get_session("s-1").get_items()) == 4
+
+
+@pytest.mark.asyncio
+async def test_close_retries_a_failed_flush(store, monkeypatch):
+    backend = TieredSessionBackend(store)
+    await backend.get_session("s-1").add_items(make_turn_items("q0", "a0"))
+
+    write_batch = store.write_batch
+    calls = 0
+
+    def locked_at_first(writes):
+        nonlocal calls
+        calls += 1
+        # The batch and its one-by-one retry both hit a transient lock
+        if calls <= 2:
+            raise sqlite3.OperationalError("database is locked")
+        write_batch(writes)
+
+    monkeypatch.setattr(store, "write_batch", locked_at_first)
+    await backend.aclose()
+    stats = backend.stats()
+    assert stats["pending_writes"] == 0 and stats["dead_lettered"] == 0
+    assert len(await store.get_session("s-1").get_items()) == 2
+
+
+@pytest.mark.asyncio
+async def test_close_dead_letters_what_cannot_be_written(store, monkeypatch):
+    backend = TieredSessionBackend(store, max_attempts=2)
+    await backend.get_session("s-1").add_items(make_turn_items("q0", "a0"))
+    await backend.record_usage("s-1", 1, 10, 5)
+
+    def failing_write_batch(writes):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(store, "write_batch", failing_write_batch)
+    await backend.aclose()
+    stats = backend.stats()
+    assert stats["pending_writes"] == 0 and stats["dead_lettered"] == 2
+
+
+def test_app_flushes_history_on_shutdown(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    db_path = str(tmp_path / "app.db")
+    monkeypatch.setattr(settings, "session_backend", "tiered")
+    monkeypatch.setattr(settings, "session_db_path", db_path)
+    # Long interval: only the shutdown flush writes
+    monkeypatch.setattr(settings, "session_flush_interval_seconds", 3600)
+    monkeypatch.setattr(session_backend, "_session_backend", None)
+    close_session_store()
+
+    session_id = f"tiered-{uuid.uuid4().hex}"
+    with TestClient(app) as client:
+        for message in ("First question", "Second question"):
+            response = client.post(
+                "/api/assistant/chat", json={"message": message, "session_id": session_id}
+            )
+            assert response.status_code == 200
+        stats = client.get("/api/assistant/cache/stats").json()["session_hot_tier"]
+        assert stats["hits"] > 0 and stats["pending_writes"] > 0
+
+    store = SessionStore(db_path, pool_size=1)
+    try:
+        items = asyncio.run(store.get_session(session_id).get_items())
+        assert [item["content"] for item in items if item["role"] == "user"] == [
+            "First question", "Second question",
+        ]
+        assert store.get_usage(session_id)["requests"] == 2
+    finally:
+        store.close()
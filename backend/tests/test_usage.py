@@ -0,0 +1,119 @@
+"""
+Tests for token usage accounting and the per-session token budget.
+"""
+import uuid
+
+import pytest
+
+from agents.usage import Usage
+from services.session_store import SessionStore
+from services.usage import TokenBudgetExceeded, UsageTracker, get_usage_tracker
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    store = SessionStore(str(tmp_path / "usage.db"), pool_size=1)
+    yield UsageTracker(store, pricing={"model-a": (1.0, 4.0)}, session_token_budget=100)
+    store.close()
+
+
+def _usage(input_tokens: int, output_tokens: int) -> Usage:
+    return Usage(
+        requests=1,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        total_tokens=input_tokens + output_tokens,
+    )
+
+
+@pytest.mark.asyncio
+async def test_usage_aggregated_per_model_and_session(tracker):
+    await tracker.record("model-a", _usage(30, 10), "s-1")
+    await tracker.record("model-a", _usage(20, 5), "s-2")
+    await tracker.record("model-a", _usage(1000, 0))
+
+    stats = tracker.model_stats()["model-a"]
+    assert stats["runs"] == 3
+    assert stats["input_tokens"] == 1050
+    assert stats["output_tokens"] == 15
+    assert stats["cost_usd"] == pytest.approx((1050 * 1.0 + 15 * 4.0) / 1_000_000)
+
+    session = await tracker.session_usage("s-1")
+    assert session["input_tokens"] == 30
+    assert session["total_tokens"] == 40
+    assert session["remaining_tokens"] == 60
+
+
+@pytest.mark.asyncio
+async def test_budget_enforced_once_spent(tracker):
+    await tracker.check_budget("s-1")
+    await tracker.record("model-a", _usage(90, 10), "s-1")
+    with pytest.raises(TokenBudgetExceeded):
+        await tracker.check_budget("s-1")
+    # Other sessions and stateless turns are unaffected
+    await tracker.check_budget("s-2")
+    await tracker.check_budget(None)
+
+
+def test_chat_reports_and_records_usage(client, admin_headers):
+    session_id = f"usage-{uuid.uuid4().hex}"
+    first = client.post(
+        "/api/assistant/chat", json={"message": "What are his skills?", "session_id": session_id}
+    ).json()
+    assert first["usage"]["requests"] == 1
+    assert first["usage"]["input_tokens"] > 0
+
+    second = client.post(
+        "/api/assistant/chat", json={"message": "And his projects?", "session_id": session_id}
+    ).json()
+    report = client.get(f"/api/assistant/usage/{session_id}", headers=admin_headers).json()
+    assert report["input_tokens"] == first["usage"]["input_tokens"] + second["usage"]["input_tokens"]
+    assert report["requests"] == 2
+
+    models = client.get("/api/assistant/usage", headers=admin_headers).json()["models"]
+    assert models["stub"]["requests"] >= 2
+    assert 'portfolio_tokens_total{model="stub",direction="input"}' in client.get("/metrics").text
+
+
+def test_usage_reports_need_the_admin_token(client, monkeypatch):
+    from config import settings
+
+    # Hidden while no token is configured
+    monkeypatch.setattr(settings, "admin_token", "")
+    assert client.get("/api/assistant/usage").status_code == 404
+    assert client.get("/api/assistant/usage/some-session").status_code == 404
+
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    assert client.get("/api/assistant/usage").status_code == 403
+    assert client.get(
+        "/api/assistant/usage/some-session", headers={"X-Admin-Token": "wrong"}
+    ).status_code == 403
+    assert client.get("/api/assistant/usage", headers={"X-Admin-Token": "secret"}).status_code == 200
+
+
+def test_cached_reply_costs_nothing(client):
+    client.post("/api/assistant/chat", json={"message": "Where is his GitHub?", "session_id": "u-a"})
+    cached = client.post(
+        "/api/assistant/chat", json={"message": "where is his github", "session_id": "u-b"}
+    ).json()
+    assert cached["usage"]["total_tokens"] == 0
+
+
+def test_session_over_budget_is_refused(client, monkeypatch):
+    tracker = get_usage_tracker()
+    monkeypatch.setattr(tracker, "session_token_budget", 1)
+    session_id = f"budget-{uuid.uuid4().hex}"
+
+    assert client.post(
+        "/api/assistant/chat", json={"message": "Tell me about him", "session_id": session_id}
+    ).status_code == 200
+    refused = client.post(
+        "/api/assistant/chat", json={"message": "Tell me more", "session_id": session_id}
+    )
+    assert refused.status_code == 429
+    assert client.post(
+        "/api/chat", json={"message": "Tell me more", "session_id": session_id}
+    ).status_code == 429
+    assert client.post(
+        "/api/assistant/chat/stream", json={"message": "Tell me more", "session_id": session_id}
+    ).status_code == 429
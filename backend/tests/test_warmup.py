@@ -0,0 +1,79 @@
+"""
+Tests for the startup warm-up and the readiness probe.
+"""
+import asyncio
+import time
+
+import pytest
+
+import services.warmup as warmup_module
+from services.response_cache import ResponseCache, get_response_cache
+from services.warmup import Warmup
+
+
+def test_ready_after_warmup(client):
+    for _ in range(50):
+        response = client.get("/ready")
+        if response.status_code == 200:
+            break
+        time.sleep(0.02)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True
+    assert body["warmup"]["steps"]["session_store"]["ok"] is True
+    assert "portfolio_ready 1" in client.get("/metrics").text
+
+
+@pytest.mark.asyncio
+async def test_not_ready_until_warm():
+    warmup = Warmup(enabled=True)
+    assert not warmup.ready
+    assert warmup.stats()["status"] == "pending"
+
+    release = asyncio.Event()
+
+    async def slow_answer(_query: str) -> None:
+        await release.wait()
+
+    warmup.queries = ["What are his skills?"]
+    task = asyncio.create_task(warmup.run(answer=slow_answer))
+    await asyncio.sleep(0.05)
+    assert warmup.stats()["status"] == "warming"
+    release.set()
+    await task
+    assert warmup.ready
+
+
+@pytest.mark.asyncio
+async def test_failed_step_does_not_block_readiness():
+    warmup = Warmup(enabled=True, queries=["boom"], step_timeout=1.0)
+
+    async def failing_answer(_query: str) -> None:
+        raise RuntimeError("model unavailable")
+
+    await warmup.run(answer=failing_answer)
+    assert warmup.ready
+    assert warmup.steps["response_cache"]["ok"] is False
+
+
+def test_warmup_queries_fill_the_response_cache(monkeypatch):
+    from fastapi.testclient import TestClient
+    from main import app
+    from portfolio_agents import get_portfolio_agent
+
+    monkeypatch.setattr(
+        warmup_module, "_warmup", Warmup(enabled=True, queries=["What are his skills?"])
+    )
+    with TestClient(app) as client:
+        for _ in range(100):
+            if client.get("/ready").status_code == 200:
+                break
+            time.sleep(0.02)
+        key = ResponseCache.make_key(
+            "What are his skills?", "stub", get_portfolio_agent().instructions
+        )
+        assert get_response_cache().get(key) is not None
+
+
+def test_disabled_warmup_is_ready_immediately():
+    assert Warmup(enabled=False).ready
@@ -0,0 +1,35 @@
+"""
+Token estimation utilities.
+Uses a fast character-based heuristic (~4 characters per token) so prompt
+sizes can be budgeted without loading a tokenizer.
+"""
+import json
+from typing import Any
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def item_text(item: Any) -> str:
+    """Extract the plain text of a session/input item (message content only)."""
+    if not isinstance(item, dict):
+        return str(item)
+    content = item.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    return ""
+
+
+def estimate_item_tokens(item: Any) -> int:
+    """Estimate the prompt tokens an input item contributes."""
+    text = item_text(item)
+    if not text and isinstance(item, dict):
+        # Tool calls and other non-message items: size of their serialized form
+        text = json.dumps(item)
+    return estimate_tokens(text) + 4